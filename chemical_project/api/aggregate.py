@@ -0,0 +1,111 @@
+"""Aggregation queries over a batch's columns.
+
+A query names metrics, functions and an optional group-by column::
+
+    metrics=flowrate,pressure  functions=count,mean,p90  group_by=equipment_type
+
+Functions are ``count``, ``mean``, ``min``, ``max``, ``std`` (population,
+like the batch summary) and ``pNN`` percentiles (``p50``, ``p99.9``, linear
+interpolation). Rows are grouped once with a stable sort of the type codes;
+every function then runs as one numpy call per group and metric, so a query
+costs a few passes over the memory-mapped columns whatever the batch size.
+"""
+import numpy as np
+
+from .cache import get_or_compute
+from .columnar import NUMERIC_COLUMNS, load_columns
+
+FUNCTIONS = ("count", "mean", "min", "max", "std")
+DEFAULT_FUNCTIONS = ["count", "mean", "min", "max"]
+GROUP_BY = ("equipment_type",)
+
+
+class AggregateError(Exception):
+    """Raised when an aggregation query names unknown metrics, functions or groups."""
+
+
+def _split(value):
+    return [item.strip() for item in value.split(",") if item.strip()] if value else []
+
+
+def parse_query(params):
+    """Validate ``metrics``, ``functions`` and ``group_by`` query parameters.
+
+    Returns a normalized query dict, which is also the cache key.
+    """
+    metrics = _split(params.get("metrics")) or list(NUMERIC_COLUMNS)
+    unknown = [metric for metric in metrics if metric not in NUMERIC_COLUMNS]
+    if unknown:
+        raise AggregateError(f"Unknown metrics: {unknown}. Allowed: {list(NUMERIC_COLUMNS)}")
+
+    functions = _split(params.get("functions")) or DEFAULT_FUNCTIONS
+    for function in functions:
+        if function in FUNCTIONS:
+            continue
+        try:
+            valid = function.startswith("p") and 0 <= float(function[1:]) <= 100
+        except ValueError:
+            valid = False
+        if not valid:
+            raise AggregateError(
+                f"Unknown function '{function}'. Allowed: {list(FUNCTIONS)} and percentiles p0..p100"
+            )
+
+    group_by = params.get("group_by") or None
+    if group_by is not None and group_by not in GROUP_BY:
+        raise AggregateError(f"group_by must be one of {list(GROUP_BY)}")
+
+    return {
+        "metrics": list(dict.fromkeys(metrics)),
+        "functions": list(dict.fromkeys(functions)),
+        "group_by": group_by,
+    }
+
+
+def _apply(values, functions):
+    result = {}
+    percentiles = [f for f in functions if f not in FUNCTIONS]
+    if percentiles and len(values):
+        qs = np.percentile(values, [float(f[1:]) for f in percentiles])
+        result.update(zip(percentiles, qs.tolist()))
+    for function in functions:
+        if function == "count":
+            result[function] = len(values)
+        elif not len(values):
+            result[function] = None
+        elif function in FUNCTIONS:
+            result[function] = float(getattr(np, function)(values))
+    return {function: result[function] for function in functions}
+
+
+def aggregate(columns, query):
+    """Run a parsed ``query`` over ``columns`` and return ``{"groups": [...], "total": n}``.
+
+    Each group is ``{"key": label or None, "rows": n, "values": {metric: {function: value}}}``.
+    """
+    if query["group_by"] and columns.rows:
+        order = np.argsort(columns.type_codes, kind="stable")
+        counts = np.bincount(columns.type_codes, minlength=len(columns.types))
+        bounds = np.concatenate([[0], np.cumsum(counts)])
+        groups = [
+            (label, order[bounds[code]:bounds[code + 1]])
+            for code, label in enumerate(columns.types)
+            if counts[code]
+        ]
+    else:
+        groups = [(None, slice(None))]
+
+    result = []
+    for key, index in groups:
+        values = {}
+        for metric in query["metrics"]:
+            column = np.asarray(columns.metric(metric)[index])
+            values[metric] = _apply(column[~np.isnan(column)], query["functions"])
+        rows = columns.rows if isinstance(index, slice) else len(index)
+        result.append({"key": key, "rows": rows, "values": values})
+    return {"groups": result, "total": columns.rows}
+
+
+def batch_aggregate(batch, query):
+    """Cached ``aggregate`` of ``batch`` for a query from ``parse_query``."""
+    return get_or_compute(batch, "aggregate", query, lambda: aggregate(load_columns(batch), query))
@@ -0,0 +1,66 @@
+"""Binned aggregates of batch metrics for histograms and density plots.
+
+A scatter plot of a whole batch draws one marker per row; a density grid
+of a few hundred cells shows the same distribution at a fixed cost,
+whatever the batch size. Both aggregates are computed over the columnar
+copy and cached like the chart series.
+"""
+import numpy as np
+
+from .cache import get_or_compute
+from .columnar import load_columns
+
+DEFAULT_BINS = 30
+MAX_BINS = 200
+DEFAULT_GRID_BINS = 40
+MAX_GRID_BINS = 200
+
+
+def histogram(values, bins):
+    """Return ``(edges, counts)`` of ``bins`` equal-width bins over ``values``."""
+    values = np.asarray(values, dtype=np.float64)
+    counts, edges = np.histogram(values[~np.isnan(values)], bins=bins)
+    return edges, counts
+
+
+def grid_density(x, y, bins):
+    """Return ``(x_edges, y_edges, counts)`` of a ``bins`` x ``bins`` grid.
+
+    ``counts[j][i]`` is the number of points in x-bin ``i`` and y-bin ``j``,
+    the row-major layout matplotlib's ``pcolormesh`` expects.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    keep = ~(np.isnan(x) | np.isnan(y))
+    counts, x_edges, y_edges = np.histogram2d(x[keep], y[keep], bins=bins)
+    return x_edges, y_edges, counts.T.astype(np.int64)
+
+
+def batch_histogram(batch, metric, bins=DEFAULT_BINS):
+    """Histogram of ``metric`` as ``{"edges": [...], "counts": [...], "total": n}``, cached."""
+    def compute():
+        values = load_columns(batch).metric(metric)
+        edges, counts = histogram(values, bins)
+        return {"edges": edges.tolist(), "counts": counts.tolist(), "total": len(values)}
+
+    return get_or_compute(batch, "histogram", {"metric": metric, "bins": bins}, compute)
+
+
+def batch_density(batch, x_metric, y_metric, bins=DEFAULT_GRID_BINS):
+    """Density grid of ``x_metric`` against ``y_metric``, cached.
+
+    Returns ``{"x_edges", "y_edges", "counts", "max", "total"}``.
+    """
+    def compute():
+        columns = load_columns(batch)
+        x_edges, y_edges, counts = grid_density(columns.metric(x_metric), columns.metric(y_metric), bins)
+        return {
+            "x_edges": x_edges.tolist(),
+            "y_edges": y_edges.tolist(),
+            "counts": counts.tolist(),
+            "max": int(counts.max()) if counts.size else 0,
+            "total": columns.rows,
+        }
+
+    params = {"x": x_metric, "y": y_metric, "bins": bins}
+    return get_or_compute(batch, "density", params, compute)
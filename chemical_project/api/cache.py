@@ -0,0 +1,255 @@
+"""Cache of derived per-batch artifacts: chart series, aggregates, chart
+images, summary payloads and rendered reports.
+
+Entries are keyed by (user, batch, artifact, hash of the parameters) and kept
+in up to two tiers:
+
+* an in-process LRU bounded by ``ANALYTICS_CACHE_MAX_BYTES``, evicting the
+  least recently used entries by their pickled size;
+* optionally a SQLite file shared by all worker processes on the host
+  (``ANALYTICS_CACHE_SHARED_PATH``), bounded by
+  ``ANALYTICS_CACHE_SHARED_MAX_BYTES`` the same way.
+
+A batch's contents never change after ingest, so entries have no timeout.
+They are dropped per batch by ``invalidate_batch``, which the signals in
+``api.signals`` call when a batch is deleted (by the user or by the
+per-user eviction after an upload) and when its summary is written. That
+only reaches the calling process's LRU, so entries built from the stored
+summary, which ``recompute_summaries`` may rewrite from another process,
+also carry its ``computed_at`` in their parameters.
+"""
+import hashlib
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+MAX_BYTES = getattr(settings, "ANALYTICS_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+SHARED_PATH = getattr(settings, "ANALYTICS_CACHE_SHARED_PATH", None)
+SHARED_MAX_BYTES = getattr(settings, "ANALYTICS_CACHE_SHARED_MAX_BYTES", 512 * 1024 * 1024)
+
+
+def cache_key(user_id, batch_id, artifact, params):
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:32]
+    return f"{user_id}:{batch_id}:{artifact}:{digest}"
+
+
+class LRUTier:
+    """Thread-safe in-process LRU, bounded by the total size of its entries."""
+
+    name = "memory"
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, size, batch_id)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return ``(True, value)`` on a hit and ``(False, None)`` on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def set(self, key, value, blob, batch_id):
+        """Store ``value``; ``blob`` is its pickle, used for the size."""
+        size = len(blob)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self.size -= old[1]
+            self._entries[key] = (value, size, batch_id)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self.size -= evicted
+
+    def invalidate(self, batch_id):
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if entry[2] == batch_id]:
+                self.size -= self._entries.pop(key)[1]
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self.size}
+
+
+class SQLiteTier:
+    """Pickled entries in a SQLite file shared by the processes of one host.
+
+    Each thread has its own connection; WAL mode lets readers run while
+    another process writes.
+    """
+
+    name = "shared"
+
+    def __init__(self, path, max_bytes):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS artifact ("
+                " key TEXT PRIMARY KEY, batch_id INTEGER, value BLOB, size INTEGER, accessed REAL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS artifact_batch ON artifact (batch_id)")
+            db.execute("CREATE INDEX IF NOT EXISTS artifact_accessed ON artifact (accessed)")
+
+    def _connect(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def get(self, key):
+        db = self._connect()
+        row = db.execute("SELECT value FROM artifact WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return False, None
+        db.execute("UPDATE artifact SET accessed = ? WHERE key = ?", (time.time(), key))
+        self.hits += 1
+        return True, pickle.loads(row[0])
+
+    def set(self, key, value, blob, batch_id):
+        """Store the pickled ``blob`` of ``value``."""
+        size = len(blob)
+        if size > self.max_bytes:
+            return
+        db = self._connect()
+        db.execute(
+            "INSERT OR REPLACE INTO artifact (key, batch_id, value, size, accessed) VALUES (?, ?, ?, ?, ?)",
+            (key, batch_id, blob, size, time.time()),
+        )
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM artifact").fetchone()[0]
+        if total > self.max_bytes:
+            # Drop the least recently used entries until the rest fits.
+            rows = db.execute("SELECT key, size FROM artifact ORDER BY accessed").fetchall()
+            stale = []
+            for stale_key, stale_size in rows:
+                if total <= self.max_bytes:
+                    break
+                stale.append((stale_key,))
+                total -= stale_size
+            db.executemany("DELETE FROM artifact WHERE key = ?", stale)
+
+    def invalidate(self, batch_id):
+        self._connect().execute("DELETE FROM artifact WHERE batch_id = ?", (batch_id,))
+
+    def stats(self):
+        entries, size = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifact").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+
+class ArtifactCache:
+    """Read-through cache over a list of tiers, fastest first."""
+
+    def __init__(self, tiers):
+        self.tiers = tiers
+
+    def get_or_compute(self, batch, artifact, params, compute):
+        key = cache_key(batch.uploaded_by_id, batch.id, artifact, params)
+        found, value = self._lookup(key, batch.id)
+        if found:
+            return value
+        value = compute()
+        self._store(self.tiers, key, value, batch.id)
+        return value
+
+    def get_or_compute_many(self, batch, artifact, params_list, compute_many):
+        keys = [cache_key(batch.uploaded_by_id, batch.id, artifact, params) for params in params_list]
+        values = {}
+        missing = []
+        for key, params in zip(keys, params_list):
+            found, value = self._lookup(key, batch.id)
+            if found:
+                values[key] = value
+            else:
+                missing.append((key, params))
+        if missing:
+            computed = compute_many([params for _, params in missing])
+            for (key, _), value in zip(missing, computed):
+                self._store(self.tiers, key, value, batch.id)
+                values[key] = value
+        return [values[key] for key in keys]
+
+    def _lookup(self, key, batch_id):
+        for i, tier in enumerate(self.tiers):
+            found, value = tier.get(key)
+            if found:
+                # Promote to the faster tiers that missed.
+                if i:
+                    self._store(self.tiers[:i], key, value, batch_id)
+                return True, value
+        return False, None
+
+    def _store(self, tiers, key, value, batch_id):
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        for tier in tiers:
+            tier.set(key, value, blob, batch_id)
+
+    def invalidate(self, batch_id):
+        for tier in self.tiers:
+            tier.invalidate(batch_id)
+
+    def stats(self):
+        return {tier.name: tier.stats() for tier in self.tiers}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def artifact_cache():
+    """The process-wide ``ArtifactCache``, built from settings on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            tiers = [LRUTier(MAX_BYTES)]
+            if SHARED_PATH:
+                tiers.append(SQLiteTier(SHARED_PATH, SHARED_MAX_BYTES))
+            _cache = ArtifactCache(tiers)
+        return _cache
+
+
+def get_or_compute(batch, artifact, params, compute):
+    """Return the cached ``artifact`` of ``batch`` for ``params``, computing it on a miss.
+
+    ``compute`` takes no arguments; its result must be picklable.
+    """
+    return artifact_cache().get_or_compute(batch, artifact, params, compute)
+
+
+def get_or_compute_many(batch, artifact, params_list, compute_many):
+    """Like ``get_or_compute`` for several ``params`` at once.
+
+    ``compute_many`` gets the list of params that missed and returns their
+    values in the same order, so misses can be computed together.
+    """
+    return artifact_cache().get_or_compute_many(batch, artifact, params_list, compute_many)
+
+
+def invalidate_batch(batch_id):
+    artifact_cache().invalidate(batch_id)
+
+
+def cache_stats():
+    """Hit/miss counters (of this process) and size of each tier."""
+    return artifact_cache().stats()
@@ -0,0 +1,87 @@
+"""Matplotlib drawing of report charts.
+
+This module runs in the report's chart worker processes (see
+``reports.draw_charts``), so it imports nothing from Django: each chart
+arrives as plain data from ``reports.chart_data`` and leaves as PNG bytes.
+"""
+import io
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+FIGSIZE = (3.2, 2.3)
+DPI = 140
+
+
+def warm_up():
+    """Worker initializer: load pyplot, the Agg backend and the font cache once."""
+    draw_chart("error", "", None, {"message": "warm-up"})
+
+
+def _png(fig):
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=DPI)
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def draw_chart(chart_type, title, color, data):
+    """PNG bytes of one chart; chart type ``"error"`` draws ``data["message"]``."""
+    fig, ax = plt.subplots(figsize=FIGSIZE, dpi=DPI)
+
+    if chart_type == "error":
+        ax.text(0.5, 0.5, data["message"], ha="center", va="center", fontsize=9)
+        ax.axis("off")
+        return _png(fig)
+
+    labels = data.get("labels")
+    values = data.get("values")
+    if chart_type == "radar":
+        angles = np.linspace(0, 2 * np.pi, len(values), endpoint=False).tolist()
+        values = list(values) + [values[0]]
+        angles = angles + [angles[0]]
+        ax = fig.add_subplot(111, polar=True)
+        ax.plot(angles, values, color=color or "#3b82f6", linewidth=2)
+        ax.fill(angles, values, color=color or "#93c5fd", alpha=0.3)
+        ax.set_xticks(angles[:-1])
+        ax.set_xticklabels(labels, fontsize=6)
+    elif chart_type == "polar":
+        ax = fig.add_subplot(111, polar=True)
+        angles = np.linspace(0, 2 * np.pi, len(values), endpoint=False)
+        ax.bar(angles, values, color=color or "#3b82f6", alpha=0.8, width=0.6)
+        ax.set_xticks(angles)
+        ax.set_xticklabels(labels, fontsize=6)
+    elif chart_type == "bar":
+        ax.bar(labels, values, color=color or "#3b82f6", alpha=0.85)
+        ax.tick_params(axis="x", rotation=30, labelsize=6)
+    elif chart_type in ["line", "area"]:
+        ax.plot(data["x"], data["y"], color=color or "#3b82f6", linewidth=2)
+        if chart_type == "area":
+            ax.fill_between(data["x"], data["y"], color=color or "#93c5fd", alpha=0.4)
+    elif chart_type == "pie":
+        pie_colors = [color] if color not in ["multi", None] else None
+        ax.pie(values, labels=labels, autopct="%1.0f%%", textprops={"fontsize": 6}, colors=pie_colors)
+    elif chart_type == "doughnut":
+        pie_colors = [color] if color not in ["multi", None] else None
+        ax.pie(values, labels=labels, autopct="%1.0f%%", textprops={"fontsize": 6}, colors=pie_colors)
+        centre_circle = plt.Circle((0, 0), 0.55, fc="white")
+        ax.add_artist(centre_circle)
+    elif chart_type == "scatter":
+        ax.scatter(data["x"], data["y"], color=color or "#10b981", alpha=0.7, s=12)
+    elif chart_type == "density":
+        counts = np.ma.masked_equal(np.asarray(data["counts"]), 0)
+        mesh = ax.pcolormesh(data["x_edges"], data["y_edges"], counts, cmap="viridis")
+        fig.colorbar(mesh, ax=ax).ax.tick_params(labelsize=6)
+        ax.set_xlabel(data["x_label"], fontsize=7)
+        ax.set_ylabel(data["y_label"], fontsize=7)
+        ax.tick_params(labelsize=6)
+    elif chart_type == "histogram":
+        ax.stairs(data["counts"], data["edges"], fill=True, color=color or "#3b82f6", alpha=0.85)
+        ax.set_xlabel(data["x_label"], fontsize=7)
+        ax.tick_params(labelsize=6)
+
+    ax.set_title(title, fontsize=8)
+    return _png(fig)
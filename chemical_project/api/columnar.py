@@ -0,0 +1,204 @@
+"""Per-batch columnar copy of EquipmentData for vectorized reads.
+
+Each batch gets a directory under ``COLUMNAR_ROOT`` holding one raw
+little-endian file per column, which readers memory-map instead of loading
+model instances::
+
+    flowrate.f8, pressure.f8, temperature.f8   float64 values
+    type_codes.i4                               int32 index into meta["types"]
+    names.bin, name_offsets.i8                  UTF-8 names and n+1 byte offsets
+    meta.json                                   row count and type labels
+
+``meta.json`` is written last and the directory is renamed into place, so a
+batch directory either is complete or does not exist. The ``EquipmentData``
+table stays the source of truth: a missing directory is rebuilt from it.
+"""
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+ROOT = Path(getattr(settings, "COLUMNAR_ROOT", Path(settings.BASE_DIR) / "var" / "columns"))
+FORMAT_VERSION = 1
+NUMERIC_COLUMNS = ["flowrate", "pressure", "temperature"]
+REBUILD_CHUNK_SIZE = 50000
+
+_DTYPES = {
+    "flowrate.f8": "<f8",
+    "pressure.f8": "<f8",
+    "temperature.f8": "<f8",
+    "type_codes.i4": "<i4",
+    "name_offsets.i8": "<i8",
+}
+
+
+def batch_dir(batch_id):
+    return ROOT / str(batch_id)
+
+
+class ColumnWriter:
+    """Append coerced ingest chunks to a new columnar batch directory."""
+
+    def __init__(self, batch_id):
+        self.batch_id = batch_id
+        self.rows = 0
+        self.types = {}
+        self._name_bytes = 0
+        self._tmp = ROOT / f".{batch_id}.{uuid.uuid4().hex}.tmp"
+        self._tmp.mkdir(parents=True)
+        self._files = {name: open(self._tmp / name, "wb") for name in (*_DTYPES, "names.bin")}
+        self._write("name_offsets.i8", np.zeros(1))
+
+    def _write(self, name, values):
+        self._files[name].write(np.ascontiguousarray(values, dtype=_DTYPES[name]).tobytes())
+
+    def append(self, columns):
+        """Append one chunk of ``{field: array}`` as produced by ``coerce_columns``."""
+        for field in NUMERIC_COLUMNS:
+            self._write(f"{field}.f8", columns[field])
+
+        # Codes follow first appearance, matching the old dict-building loops.
+        labels, first, inverse = np.unique(
+            columns["equipment_type"].astype(str), return_index=True, return_inverse=True
+        )
+        for i in np.argsort(first, kind="stable"):
+            self.types.setdefault(str(labels[i]), len(self.types))
+        lookup = np.array([self.types[str(label)] for label in labels], dtype=np.int64)
+        self._write("type_codes.i4", lookup[inverse])
+
+        encoded = [name.encode("utf-8") for name in columns["equipment_name"]]
+        lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+        self._write("name_offsets.i8", self._name_bytes + np.cumsum(lengths))
+        self._files["names.bin"].write(b"".join(encoded))
+        self._name_bytes += int(lengths.sum())
+
+        self.rows += len(encoded)
+
+    def close(self):
+        """Finish the files and move the directory into place."""
+        for f in self._files.values():
+            f.close()
+        meta = {
+            "version": FORMAT_VERSION,
+            "rows": self.rows,
+            "types": sorted(self.types, key=self.types.get),
+        }
+        with open(self._tmp / "meta.json", "w") as f:
+            json.dump(meta, f)
+
+        final = batch_dir(self.batch_id)
+        try:
+            os.replace(self._tmp, final)
+        except OSError:
+            # Another writer (e.g. a concurrent rebuild) got there first.
+            shutil.rmtree(self._tmp, ignore_errors=True)
+
+    def abort(self):
+        for f in self._files.values():
+            f.close()
+        shutil.rmtree(self._tmp, ignore_errors=True)
+
+
+class BatchColumns:
+    """Read-only, memory-mapped view of one batch's columns."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path / "meta.json") as f:
+            meta = json.load(f)
+        self.rows = meta["rows"]
+        self.types = meta["types"]
+        self.flowrate = self._map("flowrate.f8")
+        self.pressure = self._map("pressure.f8")
+        self.temperature = self._map("temperature.f8")
+        self.type_codes = self._map("type_codes.i4")
+
+    def _map(self, name):
+        if not self.rows and name != "name_offsets.i8":
+            return np.zeros(0, dtype=_DTYPES[name])
+        return np.memmap(self.path / name, dtype=_DTYPES[name], mode="r")
+
+    def metric(self, name):
+        """Return the float64 column called ``name`` (flowrate, pressure, temperature)."""
+        if name not in NUMERIC_COLUMNS:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def type_counts(self):
+        """Rows per equipment type, in order of first appearance."""
+        counts = np.bincount(self.type_codes, minlength=len(self.types))
+        return dict(zip(self.types, counts.tolist()))
+
+    def equipment_types(self, index=slice(None)):
+        """Type labels for the rows selected by ``index`` as an object array."""
+        return np.asarray(self.types, dtype=object)[self.type_codes[index]]
+
+    def names(self, start=0, stop=None):
+        """Decode equipment names for rows ``start:stop``."""
+        stop = self.rows if stop is None else min(stop, self.rows)
+        if start >= stop:
+            return []
+        offsets = self._map("name_offsets.i8")[start:stop + 1]
+        with open(self.path / "names.bin", "rb") as f:
+            f.seek(int(offsets[0]))
+            blob = f.read(int(offsets[-1] - offsets[0]))
+        rel = (offsets - offsets[0]).tolist()
+        return [blob[a:b].decode("utf-8") for a, b in zip(rel, rel[1:])]
+
+    def names_at(self, index):
+        """Decode equipment names for the rows at positions ``index``."""
+        index = np.asarray(index, dtype=np.int64)
+        if not len(index):
+            return []
+        offsets = self._map("name_offsets.i8")
+        names = []
+        with open(self.path / "names.bin", "rb") as f:
+            for start, stop in zip(offsets[index].tolist(), offsets[index + 1].tolist()):
+                f.seek(start)
+                names.append(f.read(stop - start).decode("utf-8"))
+        return names
+
+
+def rebuild_columns(batch):
+    """Write the columnar copy of ``batch`` from its EquipmentData rows."""
+    fields = ["equipment_name", "equipment_type", *NUMERIC_COLUMNS]
+    writer = ColumnWriter(batch.id)
+    try:
+        rows = batch.equipment.order_by("id").values_list(*fields)
+        chunk = []
+        for row in rows.iterator(chunk_size=REBUILD_CHUNK_SIZE):
+            chunk.append(row)
+            if len(chunk) == REBUILD_CHUNK_SIZE:
+                writer.append(_rows_to_columns(fields, chunk))
+                chunk = []
+        if chunk or not writer.rows:
+            writer.append(_rows_to_columns(fields, chunk))
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+
+
+def _rows_to_columns(fields, rows):
+    values = list(zip(*rows)) if rows else [()] * len(fields)
+    columns = {}
+    for field, column in zip(fields, values):
+        dtype = np.float64 if field in NUMERIC_COLUMNS else object
+        columns[field] = np.array(column, dtype=dtype)
+    return columns
+
+
+def load_columns(batch):
+    """Return the memory-mapped columns of ``batch``, rebuilding them if missing."""
+    path = batch_dir(batch.id)
+    if not (path / "meta.json").exists():
+        rebuild_columns(batch)
+    return BatchColumns(path)
+
+
+def remove_columns(batch_id):
+    shutil.rmtree(batch_dir(batch_id), ignore_errors=True)
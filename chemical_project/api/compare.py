@@ -0,0 +1,120 @@
+"""Comparison of two batches, aligned by equipment name.
+
+The names of the other batch are hashed once into a ``pandas.Index`` and
+every name of the base batch is looked up in it (``get_indexer``), which is
+a hash join in C. Deltas (``other - base``) are then plain array
+arithmetic over the matched positions, and per-type figures come from
+``bincount`` over the type codes, so the cost stays linear in the batch
+sizes. If a name appears more than once in a batch, its first row is used.
+"""
+import numpy as np
+import pandas as pd
+
+from .cache import get_or_compute
+from .columnar import NUMERIC_COLUMNS, load_columns
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+
+
+def _first_rows(names):
+    """``(index, positions)``: unique names and the row of their first occurrence."""
+    index = pd.Index(names)
+    first = ~index.duplicated()
+    return index[first], np.flatnonzero(first)
+
+
+def _mean(values):
+    return float(values.mean()) if len(values) else None
+
+
+def compare(base, other, limit=DEFAULT_LIMIT, sort="flowrate"):
+    """Compare two ``BatchColumns``; see ``CompareView`` for the result layout."""
+    base_names, base_rows = _first_rows(base.names())
+    other_names, other_rows = _first_rows(other.names())
+
+    hit = other_names.get_indexer(base_names)
+    matched = hit >= 0
+    a = base_rows[matched]
+    b = other_rows[hit[matched]]
+    removed = np.flatnonzero(~matched)
+    added = np.setdiff1d(np.arange(len(other_names)), hit[matched], assume_unique=True)
+
+    # Type codes of both batches mapped onto one sorted label list.
+    labels = sorted(set(base.types) | set(other.types))
+    base_map = np.searchsorted(labels, base.types).astype(np.int64)
+    other_map = np.searchsorted(labels, other.types).astype(np.int64)
+    matched_codes = base_map[base.type_codes[a]]
+    removed_codes = base_map[base.type_codes[base_rows[removed]]]
+    added_codes = other_map[other.type_codes[other_rows[added]]]
+    type_changed = matched_codes != other_map[other.type_codes[b]]
+
+    deltas = {metric: other.metric(metric)[b] - base.metric(metric)[a] for metric in NUMERIC_COLUMNS}
+    metrics = {}
+    for metric, delta in deltas.items():
+        # Rows where either side is missing the value carry no delta.
+        magnitude = np.abs(delta[~np.isnan(delta)])
+        metrics[metric] = {
+            "mean_delta": _mean(delta[~np.isnan(delta)]),
+            "mean_abs_delta": _mean(magnitude),
+            "max_abs_delta": float(magnitude.max()) if len(magnitude) else None,
+            "changed": int(np.count_nonzero(magnitude)),
+        }
+
+    size = len(labels)
+    matched_count = np.bincount(matched_codes, minlength=size)
+    added_count = np.bincount(added_codes, minlength=size)
+    removed_count = np.bincount(removed_codes, minlength=size)
+    delta_sums = {}
+    delta_counts = {}
+    for metric, delta in deltas.items():
+        valid = ~np.isnan(delta)
+        delta_sums[metric] = np.bincount(matched_codes[valid], weights=delta[valid], minlength=size)
+        delta_counts[metric] = np.bincount(matched_codes[valid], minlength=size)
+    by_type = []
+    for code, label in enumerate(labels):
+        count = int(matched_count[code])
+        by_type.append({
+            "equipment_type": label,
+            "matched": count,
+            "added": int(added_count[code]),
+            "removed": int(removed_count[code]),
+            "mean_delta": {
+                metric: float(sums[code] / delta_counts[metric][code]) if delta_counts[metric][code] else None
+                for metric, sums in delta_sums.items()
+            },
+        })
+
+    # The largest changes of the sort metric, unchanged equipment left out.
+    magnitude = np.nan_to_num(np.abs(deltas[sort]))
+    order = np.argsort(-magnitude, kind="stable")[:limit]
+    order = order[magnitude[order] != 0]
+    matched_names = base_names[matched]
+    changes = [
+        {
+            "equipment_name": str(matched_names[i]),
+            "equipment_type": labels[matched_codes[i]],
+            "deltas": {metric: None if np.isnan(delta[i]) else float(delta[i]) for metric, delta in deltas.items()},
+        }
+        for i in order.tolist()
+    ]
+
+    return {
+        "matched": int(matched.sum()),
+        "added": len(added),
+        "removed": len(removed),
+        "type_changed": int(type_changed.sum()),
+        "metrics": metrics,
+        "by_type": by_type,
+        "changes": changes,
+        "added_names": [str(name) for name in other_names[added[:limit]]],
+        "removed_names": [str(name) for name in base_names[removed[:limit]]],
+    }
+
+
+def batch_compare(base, other, limit=DEFAULT_LIMIT, sort="flowrate"):
+    """Cached ``compare`` of two batches; entries live under ``base``."""
+    params = {"other": other.id, "limit": limit, "sort": sort}
+    return get_or_compute(
+        base, "compare", params, lambda: compare(load_columns(base), load_columns(other), limit, sort)
+    )
@@ -0,0 +1,87 @@
+"""ETags for conditional GETs of batch-derived responses.
+
+A batch never changes after ingest, so its responses are identified by the
+batch id and the time its summary was computed (``recompute_summaries``
+replaces it). Each function below costs at most one small query and is run by
+``django.views.decorators.http.condition`` before the view body, so a
+matching ``If-None-Match`` is answered with 304 without loading or rendering
+anything. Returning None skips conditional handling, e.g. for a missing batch.
+
+``ETAG_VERSION`` is part of every tag; bump it when a payload format changes.
+"""
+import hashlib
+import json
+
+from django.db.models import Count, Max
+
+from .models import UploadBatch
+from .reports import report_key
+from .selection import DEFAULT_DETAIL, DETAIL_LEVELS
+
+ETAG_VERSION = 1
+
+
+def make_etag(*parts):
+    return hashlib.sha256(json.dumps([ETAG_VERSION, *parts], default=str).encode()).hexdigest()[:32]
+
+
+def summary_computed_at(request, batch_id):
+    """Computed time of the batch summary, or None if the batch or its summary is missing."""
+    return (
+        UploadBatch.objects.filter(id=batch_id, uploaded_by=request.user, is_complete=True)
+        .values_list("summary__computed_at", flat=True)
+        .first()
+    )
+
+
+def summary_etag(request, batch_id):
+    computed_at = summary_computed_at(request, batch_id)
+    return make_etag("summary", batch_id, computed_at) if computed_at else None
+
+
+def history_etag(request):
+    # Batch ids only grow, so the count and the highest id identify the set.
+    # A duplicate re-upload moves an existing batch to the top by bumping its
+    # uploaded_at, so the latest upload time identifies the order.
+    state = UploadBatch.objects.filter(uploaded_by=request.user, is_complete=True).aggregate(
+        count=Count("id"), last=Max("id"), latest=Max("uploaded_at")
+    )
+    user = request.user
+    return make_etag(
+        "history", user.pk, state["count"], state["last"], state["latest"],
+        user.username, user.email, user.first_name, user.last_name,
+    )
+
+
+def report_chart_config(request):
+    """Chart config of a report request: the ``chart_config`` JSON query parameter
+    for GET, the body for POST. Raises ValueError if it is not valid JSON."""
+    if request.method in ("GET", "HEAD"):
+        raw = request.query_params.get("chart_config")
+        return json.loads(raw) if raw else []
+    return request.data.get("chart_config", []) if request.data else []
+
+
+def report_detail(request):
+    """Detail level of a report request: the ``detail`` query parameter for GET,
+    the body for POST. Defaults to a full report."""
+    if request.method in ("GET", "HEAD"):
+        return request.query_params.get("detail") or DEFAULT_DETAIL
+    return (request.data.get("detail") if request.data else None) or DEFAULT_DETAIL
+
+
+def report_etag(request, batch_id):
+    computed_at = summary_computed_at(request, batch_id)
+    if not computed_at:
+        return None
+    try:
+        chart_config = report_chart_config(request)
+    except ValueError:
+        return None
+    if not isinstance(chart_config, list) or not all(isinstance(cfg, dict) for cfg in chart_config):
+        return None
+    detail = report_detail(request)
+    if detail not in DETAIL_LEVELS:
+        return None
+    # Reports are stored until the summary changes, render date included.
+    return make_etag("report", batch_id, computed_at, report_key(chart_config, detail))
@@ -0,0 +1,85 @@
+"""Downsampling of per-row metric series for charts.
+
+Both algorithms keep real data points (indexes into the batch) rather than
+averages, so spikes survive:
+
+* ``lttb`` - Largest-Triangle-Three-Buckets: one point per bucket, chosen to
+  maximise the triangle area with its neighbours. Best for line shapes.
+* ``minmax`` - the lowest and highest point of every bucket. Keeps the full
+  envelope of noisy series, which LTTB may thin out.
+"""
+import numpy as np
+
+from .cache import get_or_compute
+from .columnar import load_columns
+
+METHODS = ("lttb", "minmax")
+DEFAULT_POINTS = 500
+MAX_POINTS = 5000
+
+
+def lttb(values, points):
+    """Return the indexes of ``points`` samples of ``values`` picked by LTTB."""
+    n = len(values)
+    if points >= n:
+        return np.arange(n)
+    if points < 3:
+        return np.linspace(0, n - 1, points).astype(np.int64)
+
+    y = np.asarray(values, dtype=np.float64)
+    # The first and last points are always kept; the rest are split evenly.
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    starts, stops = edges[:-1], edges[1:]
+    # Average of each following bucket (the last bucket looks at the final point).
+    sums = np.add.reduceat(y[:n - 1], starts)
+    avg_y = np.append((sums / (stops - starts))[1:], y[-1])
+    avg_x = np.append(((starts + stops - 1) / 2.0)[1:], n - 1)
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i, (start, stop) in enumerate(zip(starts, stops), 1):
+        xs = np.arange(start, stop)
+        ys = y[start:stop]
+        # Twice the triangle area; the constant factor does not change the argmax.
+        area = np.abs((a - avg_x[i - 1]) * (ys - y[a]) - (a - xs) * (avg_y[i - 1] - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i] = a
+    return selected
+
+
+def minmax(values, points):
+    """Return the indexes of the min and max of ``points // 2`` equal buckets, in order."""
+    n = len(values)
+    if points >= n:
+        return np.arange(n)
+
+    # Equal buckets as rows of a 2-D view; only the last one is NaN-padded.
+    buckets = max(points // 2, 1)
+    size = -(-n // buckets)
+    buckets = -(-n // size)
+    padded = np.full(size * buckets, np.nan)
+    padded[:n] = values
+    grid = padded.reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    low = offsets + np.nanargmin(grid, axis=1)
+    high = offsets + np.nanargmax(grid, axis=1)
+    return np.unique(np.concatenate([low, high]))
+
+
+def downsample(values, points, method="lttb"):
+    """Return ``(indexes, values)`` of a downsampled series."""
+    indexes = lttb(values, points) if method == "lttb" else minmax(values, points)
+    return indexes, np.asarray(values)[indexes]
+
+
+def batch_series(batch, metric, points=DEFAULT_POINTS, method="lttb"):
+    """Downsampled ``metric`` of ``batch`` as ``{"x": [...], "y": [...], "total": n}``, cached."""
+    def compute():
+        values = load_columns(batch).metric(metric)
+        x, y = downsample(values, points, method)
+        return {"x": x.tolist(), "y": y.tolist(), "total": len(values)}
+
+    params = {"metric": metric, "points": points, "method": method}
+    return get_or_compute(batch, "series", params, compute)
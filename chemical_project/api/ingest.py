@@ -0,0 +1,402 @@
+"""Column-oriented CSV ingest for equipment uploads.
+
+The upload path works on whole columns instead of rows: the five required
+columns are coerced and validated as NumPy arrays (see ``validation``), rows
+that fail are dropped, and the rest are written to the database in batches
+of multi-row INSERT statements (SQLite) or a single ``COPY FROM STDIN``
+(PostgreSQL).  No model instances are created.
+
+Files are streamed in fixed-size chunks, so peak memory depends on
+``INGEST_CHUNK_SIZE`` and not on the size of the upload. gzip, zstd and
+single-file zip uploads are decompressed on the fly into the parser.
+
+With ``INGEST_PARSE_WORKERS`` above one, uploads of at least
+``INGEST_PARALLEL_MIN_BYTES`` are cut into blocks on line boundaries and
+parsed and coerced in a process pool; the results are inserted in file
+order. This assumes no quoted field spans a line break, which holds for
+the equipment CSV format.
+"""
+import collections
+import csv
+import gzip
+import io
+import itertools
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import EquipmentData
+from .validation import (
+    DUPLICATE_NAME,
+    INVALID,
+    MISSING,
+    DuplicateNames,
+    Rejections,
+    check_values,
+)
+
+try:
+    import zstandard
+except ImportError:  # only needed for .csv.zst uploads
+    zstandard = None
+
+REQUIRED_COLUMNS = ["Equipment Name", "Type", "Flowrate", "Pressure", "Temperature"]
+
+# CSV header -> EquipmentData field
+COLUMN_FIELDS = {
+    "Equipment Name": "equipment_name",
+    "Type": "equipment_type",
+    "Flowrate": "flowrate",
+    "Pressure": "pressure",
+    "Temperature": "temperature",
+}
+FIELD_HEADERS = {field: header for header, field in COLUMN_FIELDS.items()}
+TEXT_FIELDS = ["equipment_name", "equipment_type"]
+NUMERIC_FIELDS = ["flowrate", "pressure", "temperature"]
+FIELDS = TEXT_FIELDS + NUMERIC_FIELDS
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ZIP_MAGIC = b"PK\x03\x04"
+
+INSERT_BATCH_SIZE = getattr(settings, "INGEST_INSERT_BATCH_SIZE", 2000)
+CHUNK_SIZE = getattr(settings, "INGEST_CHUNK_SIZE", 50000)
+PARSE_WORKERS = getattr(settings, "INGEST_PARSE_WORKERS", 1)
+PARALLEL_MIN_BYTES = getattr(settings, "INGEST_PARALLEL_MIN_BYTES", 32 * 1024 * 1024)
+PARALLEL_BLOCK_SIZE = getattr(settings, "INGEST_PARALLEL_BLOCK_SIZE", 4 * 1024 * 1024)
+
+# Errors from parsing or decompressing an upload; they are reported as a
+# CSV parse error. A corrupt zip member (e.g. a bad CRC) only shows up
+# while it is read.
+PARSE_ERRORS = (
+    pd.errors.ParserError,
+    pd.errors.EmptyDataError,
+    UnicodeDecodeError,
+    ValueError,
+    EOFError,
+    OSError,
+    zipfile.BadZipFile,
+)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class IngestError(Exception):
+    """Raised when an upload cannot be ingested. The message is shown to the user."""
+
+
+def check_columns(df):
+    """Raise IngestError if any required column is missing from ``df``."""
+    if not all(col in df.columns for col in REQUIRED_COLUMNS):
+        raise IngestError(f"Missing columns. Required: {REQUIRED_COLUMNS}")
+
+
+@contextmanager
+def open_csv_stream(file_obj):
+    """Yield a binary stream of CSV bytes from an upload.
+
+    The format is sniffed from the first bytes, not the filename. gzip, zstd
+    and zip members are decompressed as the parser reads, without a
+    temporary copy. ``file_obj`` must be seekable.
+    """
+    head = file_obj.read(4)
+    file_obj.seek(0)
+
+    if head.startswith(GZIP_MAGIC):
+        with gzip.GzipFile(fileobj=file_obj, mode="rb") as stream:
+            yield stream
+    elif head.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise IngestError("zstd uploads need the 'zstandard' package on the server")
+        with zstandard.ZstdDecompressor().stream_reader(file_obj, closefd=False) as raw:
+            # The reader has no readline(), which parse_parallel needs.
+            yield io.BufferedReader(raw)
+    elif head.startswith(ZIP_MAGIC):
+        try:
+            archive = zipfile.ZipFile(file_obj)
+        except zipfile.BadZipFile as e:
+            raise IngestError(f"CSV Parse Error: {str(e)}") from e
+        with archive:
+            members = [info for info in archive.infolist() if not info.is_dir()]
+            if len(members) != 1:
+                raise IngestError("Zip uploads must contain exactly one CSV file")
+            with archive.open(members[0]) as stream:
+                yield stream
+    else:
+        yield file_obj
+
+
+def read_chunks(file_obj, chunk_size=None):
+    """Yield DataFrames of at most ``chunk_size`` rows from a CSV file object.
+
+    Only the required columns are parsed. The header is validated once,
+    before the first chunk is yielded.
+    """
+    try:
+        reader = pd.read_csv(
+            file_obj,
+            chunksize=chunk_size or CHUNK_SIZE,
+            compression=None,
+            usecols=lambda col: col in COLUMN_FIELDS,
+            dtype={"Equipment Name": str, "Type": str},
+        )
+        with reader:
+            first = True
+            for chunk in reader:
+                if first:
+                    check_columns(chunk)
+                    first = False
+                yield chunk
+    except PARSE_ERRORS as e:
+        raise IngestError(f"CSV Parse Error: {str(e)}") from e
+
+
+def ingest_csv(batch_id, file_obj, chunk_size=None, progress=None, on_chunk=None, workers=None, rejections=None):
+    """Stream a CSV file object into EquipmentData rows for ``batch_id``.
+
+    Compressed uploads are unpacked by ``open_csv_stream``. Each chunk goes
+    through parse, validate and insert before the next one is read, and is
+    written in its own transaction (a savepoint when the caller already
+    holds one). Rows that fail validation are dropped and recorded in
+    ``rejections`` (a ``validation.Rejections``); if no row survives,
+    IngestError is raised. ``on_chunk`` receives the accepted columns of
+    every chunk once they are inserted, and ``progress`` the running row
+    count. ``workers`` overrides ``INGEST_PARSE_WORKERS``. Returns the total
+    number of rows written.
+    """
+    workers = PARSE_WORKERS if workers is None else workers
+    parallel = workers > 1 and _stream_size(file_obj) >= PARALLEL_MIN_BYTES
+    rejections = Rejections() if rejections is None else rejections
+    duplicates = DuplicateNames(batch_id)
+    rows = 0
+    rows_read = 0
+    with open_csv_stream(file_obj) as stream:
+        if parallel:
+            chunks = parse_parallel(stream, workers)
+        else:
+            chunks = parse_serial(stream, chunk_size)
+        for columns, problems in chunks:
+            count = len(columns[FIELDS[0]])
+            columns = accept_rows(columns, problems, rows_read, duplicates, rejections)
+            rows_read += count
+            with transaction.atomic():
+                rows += insert_columns(batch_id, columns)
+            if on_chunk:
+                on_chunk(columns)
+            if progress:
+                progress(rows)
+    if not rows and rejections.rows:
+        raise IngestError(f"No valid rows. {rejections.describe()}")
+    return rows
+
+
+def _stream_size(file_obj):
+    position = file_obj.tell()
+    size = file_obj.seek(0, os.SEEK_END)
+    file_obj.seek(position)
+    return size
+
+
+def parse_serial(stream, chunk_size=None):
+    """Yield ``(columns, problems)`` for each chunk of ``stream``, parsed in this process."""
+    for chunk in read_chunks(stream, chunk_size):
+        yield validate_chunk(chunk)
+
+
+def parse_parallel(stream, workers, block_size=None):
+    """Yield ``(columns, problems)`` for blocks of ``stream``, parsed in a process pool.
+
+    The stream is read in blocks of about ``block_size`` bytes, each
+    extended to the end of its last line, and every block is parsed with
+    the header line prepended. At most two blocks per worker are in flight
+    and results come back in file order, so memory stays bounded.
+    """
+    block_size = block_size or PARALLEL_BLOCK_SIZE
+    try:
+        header = stream.readline()
+        check_columns(pd.read_csv(io.BytesIO(header), nrows=0))
+    except PARSE_ERRORS as e:
+        raise IngestError(f"CSV Parse Error: {str(e)}") from e
+
+    pool = _get_pool(workers)
+    pending = collections.deque()
+    eof = False
+    try:
+        while pending or not eof:
+            while not eof and len(pending) < 2 * workers:
+                block = _read_block(stream, block_size)
+                if not block:
+                    eof = True
+                    break
+                pending.append(pool.submit(_parse_block, header, block))
+            if not pending:
+                break
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _read_block(stream, block_size):
+    """Read about ``block_size`` bytes of ``stream``, up to the end of a line."""
+    try:
+        block = stream.read(block_size)
+        if block and not block.endswith(b"\n"):
+            block += stream.readline()
+    except PARSE_ERRORS as e:
+        raise IngestError(f"CSV Parse Error: {str(e)}") from e
+    return block
+
+
+def _parse_block(header, block):
+    """Process-pool task: parse and validate one block of whole CSV lines."""
+    for chunk in read_chunks(io.BytesIO(header + block), chunk_size=len(block)):
+        return validate_chunk(chunk)
+    empty = {field: np.empty(0, dtype=object if field in TEXT_FIELDS else np.float64) for field in FIELDS}
+    return empty, []
+
+
+def _get_pool(workers):
+    # Workers are spawned rather than forked (the caller may be a job
+    # thread) and run django.setup() once so this module can be imported.
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            import django
+
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+            _pools[workers] = pool
+        return pool
+
+
+def coerce_columns(df):
+    """Return the required columns of ``df`` as NumPy arrays keyed by field name.
+
+    Text columns become object arrays of ``str`` and numeric columns become
+    ``float64`` arrays. Blank and non-numeric cells become ``""``/NaN and
+    are listed in the returned ``(mask, header, reason)`` problems.
+    """
+    columns = {}
+    problems = []
+    for header, field in COLUMN_FIELDS.items():
+        raw = df[header]
+        missing = raw.isna().to_numpy()
+        if missing.any():
+            problems.append((missing, header, MISSING))
+        if field in NUMERIC_FIELDS:
+            values = pd.to_numeric(raw, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            invalid = np.isnan(values) & ~missing
+            if invalid.any():
+                problems.append((invalid, header, INVALID))
+        else:
+            values = raw.fillna("").to_numpy(dtype=object).astype(str).astype(object)
+        columns[field] = values
+    return columns, problems
+
+
+def validate_chunk(df):
+    """Coerce and check one parsed chunk.
+
+    Returns the coerced columns of every row and ``(rows, header, reason)``
+    problems, with ``rows`` as 0-based indexes into the chunk. Duplicate
+    names need state across chunks and are handled by ``accept_rows``.
+    """
+    columns, problems = coerce_columns(df)
+    problems.extend((mask, FIELD_HEADERS[field], reason) for mask, field, reason in check_values(columns))
+    return columns, [(np.flatnonzero(mask), header, reason) for mask, header, reason in problems]
+
+
+def accept_rows(columns, problems, row_offset, duplicates, rejections):
+    """Drop the rows named in ``problems``, and repeated names, from ``columns``.
+
+    Dropped rows are recorded in ``rejections`` with ``row_offset`` data
+    rows before this chunk. Returns the columns of the accepted rows.
+    """
+    bad = np.zeros(len(columns[FIELDS[0]]), dtype=bool)
+    for rows, _, _ in problems:
+        bad[rows] = True
+    duplicate = duplicates.check(columns["equipment_name"], ~bad)
+    if duplicate.any():
+        problems = problems + [(np.flatnonzero(duplicate), FIELD_HEADERS["equipment_name"], DUPLICATE_NAME)]
+        bad |= duplicate
+    if not bad.any():
+        return columns
+
+    rejections.add(problems, row_offset, int(bad.sum()))
+    keep = ~bad
+    return {field: values[keep] for field, values in columns.items()}
+
+
+def insert_columns(batch_id, columns, batch_size=None):
+    """Write coerced ``columns`` as EquipmentData rows belonging to ``batch_id``.
+
+    Returns the number of rows written.
+    """
+    count = len(columns[FIELDS[0]])
+    if not count:
+        return 0
+    if connection.vendor == "postgresql":
+        _copy_rows(batch_id, columns)
+    else:
+        _insert_rows(batch_id, columns, batch_size or INSERT_BATCH_SIZE)
+    return count
+
+
+def _target():
+    quote = connection.ops.quote_name
+    opts = EquipmentData._meta
+    names = ["batch_id"] + [opts.get_field(f).column for f in FIELDS]
+    return quote(opts.db_table), ", ".join(quote(n) for n in names), len(names)
+
+
+def _insert_rows(batch_id, columns, batch_size):
+    table, column_list, width = _target()
+    max_params = connection.features.max_query_params
+    if max_params:
+        batch_size = max(1, min(batch_size, max_params // width))
+
+    count = len(columns[FIELDS[0]])
+    rows = zip(itertools.repeat(batch_id, count), *(columns[f].tolist() for f in FIELDS))
+    row_sql = "(" + ", ".join(["%s"] * width) + ")"
+    statements = {}
+
+    with connection.cursor() as cursor:
+        while True:
+            chunk = list(itertools.islice(rows, batch_size))
+            if not chunk:
+                break
+            sql = statements.get(len(chunk))
+            if sql is None:
+                sql = f"INSERT INTO {table} ({column_list}) VALUES " + ", ".join([row_sql] * len(chunk))
+                statements[len(chunk)] = sql
+            cursor.execute(sql, list(itertools.chain.from_iterable(chunk)))
+
+
+def _copy_rows(batch_id, columns):
+    table, column_list, _ = _target()
+    frame = pd.DataFrame({"batch_id": batch_id, **{f: columns[f] for f in FIELDS}})
+    buf = io.StringIO()
+    frame.to_csv(buf, header=False, index=False, quoting=csv.QUOTE_NONNUMERIC)
+    buf.seek(0)
+
+    sql = f"COPY {table} ({column_list}) FROM STDIN WITH (FORMAT csv)"
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, "copy_expert"):
+            raw.copy_expert(sql, buf)
+        else:
+            with raw.copy(sql) as copy:
+                copy.write(buf.getvalue())
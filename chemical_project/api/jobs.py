@@ -0,0 +1,238 @@
+"""Local background job runner.
+
+Jobs are rows in the ``Job`` table and run on a small in-process thread
+pool, so no external broker is needed. Views create the row, hand over any
+input files and call ``enqueue``; clients poll ``/api/jobs/<id>/``.
+
+Jobs that were pending or running when the process stopped are not
+resumed. Such a job stops being updated; once it has been idle for
+``JOB_STALE_SECONDS`` it is no longer handed out as in flight (see
+``find_running_report``) and is marked failed instead.
+"""
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .columnar import ColumnWriter
+from .ingest import IngestError, ingest_csv
+from .models import Job, UploadBatch
+from .reports import stored_report
+from .summary import SummaryAccumulator, load_summary
+from .validation import Rejections
+
+WORKERS = getattr(settings, "JOB_WORKERS", 2)
+SPOOL_DIR = Path(getattr(settings, "INGEST_SPOOL_DIR", Path(settings.BASE_DIR) / "var" / "spool"))
+MAX_BATCHES_PER_USER = getattr(settings, "MAX_BATCHES_PER_USER", 5)
+STALE_SECONDS = getattr(settings, "JOB_STALE_SECONDS", 900)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="chemviz-job")
+        return _executor
+
+
+def enqueue(job):
+    """Run ``job`` on the worker pool once the current transaction commits.
+
+    With ``JOB_WORKERS = 0`` it runs in the calling thread instead, on the
+    caller's database connection (tests use this).
+    """
+    job_id = job.id
+    if WORKERS:
+        transaction.on_commit(lambda: _get_executor().submit(_run, job_id))
+    else:
+        transaction.on_commit(lambda: _execute(job_id))
+
+
+def spool_path(job_id):
+    return SPOOL_DIR / f"{job_id}.upload"
+
+
+def spool_upload(job, file_obj):
+    """Copy an uploaded file into the spool directory for the job's worker.
+
+    The request's own temporary file disappears when the response is sent,
+    so the worker reads this copy instead. The content is hashed on the way
+    through; returns the hex SHA-256 digest.
+    """
+    SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    with open(spool_path(job.id), "wb") as out:
+        for chunk in file_obj.chunks():
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest()
+
+
+def find_duplicate(user, digest):
+    """Return the user's complete batch with the same content hash, if any."""
+    if not digest:
+        return None
+    return (
+        UploadBatch.objects.filter(uploaded_by=user, content_sha256=digest, is_complete=True)
+        .order_by("-uploaded_at")
+        .first()
+    )
+
+
+def find_running_report(user, batch, chart_config, detail):
+    """Return the user's pending or running report job for the same request, if any.
+
+    Jobs not updated for ``STALE_SECONDS`` were lost with a stopped process:
+    they are marked failed and not reused.
+    """
+    in_flight = Job.objects.filter(
+        kind=Job.KIND_REPORT,
+        created_by=user,
+        batch=batch,
+        chart_config=chart_config,
+        detail=detail,
+        status__in=[Job.STATUS_PENDING, Job.STATUS_RUNNING],
+    )
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=STALE_SECONDS)
+    in_flight.filter(updated_at__lt=cutoff).update(
+        status=Job.STATUS_FAILED,
+        error="Report job was interrupted",
+        updated_at=now,
+        finished_at=now,
+    )
+    return in_flight.filter(updated_at__gte=cutoff).order_by("-created_at").first()
+
+
+def complete_as_duplicate(job, batch):
+    """Finish ``job`` by pointing it at an identical existing batch.
+
+    Nothing is parsed or inserted. The batch moves to the top of the history,
+    so the per-user retention treats the re-upload as the newest dataset.
+    """
+    now = timezone.now()
+    summary = load_summary(batch)
+    UploadBatch.objects.filter(id=batch.id).update(uploaded_at=now)
+    _update(
+        job.id,
+        status=Job.STATUS_DONE,
+        batch=batch,
+        content_sha256=batch.content_sha256,
+        rows_processed=summary.row_count,
+        rows_rejected=summary.rejected_rows,
+        bytes_processed=job.bytes_total,
+        finished_at=now,
+    )
+    spool_path(job.id).unlink(missing_ok=True)
+
+
+def evict_old_batches(user):
+    """Keep only the user's newest MAX_BATCHES_PER_USER complete batches."""
+    stale = UploadBatch.objects.filter(uploaded_by=user, is_complete=True).order_by("-uploaded_at")[MAX_BATCHES_PER_USER:]
+    for batch in stale:
+        batch.delete()
+
+
+def _update(job_id, **fields):
+    Job.objects.filter(id=job_id).update(updated_at=timezone.now(), **fields)
+
+
+def run_ingest(job):
+    """Stream the job's spooled CSV into a new batch, committing chunk by chunk.
+
+    The batch stays hidden (``is_complete=False``) until every row is in, and
+    is deleted again if ingest fails part-way. The columnar copy and the
+    ``BatchSummary`` are built from the same chunks on the way through, and
+    rows rejected by validation are stored as the batch's ``RowRejection``s.
+    """
+    path = spool_path(job.id)
+    batch = UploadBatch.objects.create(
+        filename=job.filename,
+        uploaded_by=job.created_by,
+        is_complete=False,
+        content_sha256=job.content_sha256,
+    )
+    _update(job.id, batch=batch)
+    writer = None
+    rejections = Rejections()
+    try:
+        writer = ColumnWriter(batch.id)
+        summary = SummaryAccumulator()
+        with open(path, "rb") as f:
+            def progress(rows):
+                _update(job.id, rows_processed=rows, bytes_processed=f.tell())
+
+            def on_chunk(columns):
+                writer.append(columns)
+                summary.add(columns)
+
+            rows = ingest_csv(batch.id, f, progress=progress, on_chunk=on_chunk, rejections=rejections)
+        writer.close()
+        summary.add_rejected(rejections.rows, rejections.counts)
+
+        with transaction.atomic():
+            summary.save(batch.id)
+            rejections.save(batch.id)
+            UploadBatch.objects.filter(id=batch.id).update(is_complete=True)
+            evict_old_batches(job.created_by)
+            _update(
+                job.id,
+                status=Job.STATUS_DONE,
+                rows_processed=rows,
+                rows_rejected=rejections.rows,
+                bytes_processed=job.bytes_total,
+                finished_at=timezone.now(),
+            )
+    except Exception as e:
+        if writer is not None:
+            writer.abort()
+        batch.delete()
+        message = str(e) if isinstance(e, IngestError) else f"Ingest failed: {str(e)}"
+        _update(
+            job.id,
+            status=Job.STATUS_FAILED,
+            error=message,
+            rows_rejected=rejections.rows,
+            finished_at=timezone.now(),
+        )
+    finally:
+        path.unlink(missing_ok=True)
+
+
+def run_report(job):
+    """Render and store the PDF report of the job's batch."""
+    if job.batch_id is None:
+        raise ValueError("Batch not found")
+    stored_report(job.batch, job.chart_config, job.detail)
+    _update(job.id, status=Job.STATUS_DONE, finished_at=timezone.now())
+
+
+RUNNERS = {
+    Job.KIND_INGEST: run_ingest,
+    Job.KIND_REPORT: run_report,
+}
+
+
+def _execute(job_id):
+    try:
+        job = Job.objects.select_related("created_by", "batch").get(id=job_id)
+        _update(job.id, status=Job.STATUS_RUNNING)
+        RUNNERS[job.kind](job)
+    except Exception as e:
+        _update(job_id, status=Job.STATUS_FAILED, error=str(e), finished_at=timezone.now())
+
+
+def _run(job_id):
+    close_old_connections()
+    try:
+        _execute(job_id)
+    finally:
+        connection.close()
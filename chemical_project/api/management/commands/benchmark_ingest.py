@@ -0,0 +1,65 @@
+import time
+from pathlib import Path
+
+import pandas as pd
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.ingest import ingest_csv
+from api.models import UploadBatch, EquipmentData
+
+
+class Command(BaseCommand):
+    help = "Compare rows/second of the legacy iterrows() ingest against the column-oriented engine."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "csv",
+            nargs="?",
+            default=str(Path(settings.BASE_DIR).parent / "large_equipment_data.csv"),
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--chunk-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        path = options["csv"]
+        legacy = min(self._run(self._legacy, path, options) for _ in range(options["repeat"]))
+        columnar = min(self._run(self._columnar, path, options) for _ in range(options["repeat"]))
+
+        rows = self.rows
+        self.stdout.write(f"{rows} rows from {path}")
+        self.stdout.write(f"  legacy (iterrows + bulk_create): {legacy:.3f}s  {rows / legacy:,.0f} rows/s")
+        self.stdout.write(f"  columnar engine:                 {columnar:.3f}s  {rows / columnar:,.0f} rows/s")
+        self.stdout.write(self.style.SUCCESS(f"  speedup: {legacy / columnar:.1f}x"))
+
+    def _run(self, ingest, path, options):
+        # Each run happens in a transaction that is rolled back so the
+        # benchmark leaves the database untouched.
+        with transaction.atomic():
+            batch = UploadBatch.objects.create(filename="benchmark.csv")
+            start = time.perf_counter()
+            self.rows = ingest(batch, path, options)
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        return elapsed
+
+    def _legacy(self, batch, path, options):
+        df = pd.read_csv(path)
+        equipment_list = [
+            EquipmentData(
+                batch=batch,
+                equipment_name=row["Equipment Name"],
+                equipment_type=row["Type"],
+                flowrate=row["Flowrate"],
+                pressure=row["Pressure"],
+                temperature=row["Temperature"],
+            )
+            for _, row in df.iterrows()
+        ]
+        EquipmentData.objects.bulk_create(equipment_list)
+        return len(equipment_list)
+
+    def _columnar(self, batch, path, options):
+        with open(path, "rb") as f:
+            return ingest_csv(batch.id, f, options["chunk_size"])
@@ -0,0 +1,54 @@
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.ingest import FIELDS, parse_parallel, parse_serial
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure parse-and-coerce throughput of the ingest with 1..N worker processes. "
+        "Database inserts are not included; they run in the job thread either way."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "csv",
+            nargs="?",
+            default=str(Path(settings.BASE_DIR).parent / "large_equipment_data.csv"),
+        )
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Highest worker count to try")
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--block-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        path = options["csv"]
+        self.stdout.write(f"{path} ({os.path.getsize(path) / 1e6:.1f} MB), {os.cpu_count()} CPUs")
+
+        baseline = None
+        for workers in range(1, options["workers"] + 1):
+            if workers > 1:
+                # Start the pool outside the timed runs.
+                self._parse(path, workers, options)
+            elapsed = min(self._time(path, workers, options) for _ in range(options["repeat"]))
+            baseline = baseline or elapsed
+            self.stdout.write(
+                f"  {workers} worker{'s' if workers > 1 else ' '}: {elapsed:.3f}s  "
+                f"{self.rows / elapsed:,.0f} rows/s  {baseline / elapsed:.2f}x"
+            )
+
+    def _time(self, path, workers, options):
+        start = time.perf_counter()
+        self.rows = self._parse(path, workers, options)
+        return time.perf_counter() - start
+
+    def _parse(self, path, workers, options):
+        with open(path, "rb") as f:
+            if workers > 1:
+                chunks = parse_parallel(f, workers, options["block_size"])
+            else:
+                chunks = parse_serial(f)
+            return sum(len(columns[FIELDS[0]]) for columns in chunks)
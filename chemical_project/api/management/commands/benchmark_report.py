@@ -0,0 +1,77 @@
+import os
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.models import UploadBatch
+from api.reports import CHART_WORKERS, draw_charts, render_pdf
+
+CHARTS = [
+    {"type": "bar", "metric": "type_distribution"},
+    {"type": "line", "metric": "flowrate"},
+    {"type": "pie", "metric": "type_distribution"},
+    {"type": "histogram", "metric": "pressure"},
+    {"type": "scatter", "metric": "flowrate_vs_pressure"},
+    {"type": "area", "metric": "temperature"},
+    {"type": "doughnut", "metric": "type_distribution"},
+    {"type": "density", "metric": "pressure_vs_temperature"},
+    {"type": "radar", "metric": "type_distribution"},
+    {"type": "histogram", "metric": "flowrate"},
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time report rendering and PDF size against the number of charts: matplotlib charts "
+        "drawn one by one in this process or in the chart worker pool, and vector charts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("batch_id", nargs="?", type=int, help="Batch to report on (default: the newest)")
+        parser.add_argument("--charts", default="1,2,4,8,10", help="Comma-separated chart counts")
+        parser.add_argument("--repeat", type=int, default=2)
+
+    def handle(self, *args, **options):
+        batches = UploadBatch.objects.filter(is_complete=True)
+        if options["batch_id"]:
+            batch = batches.filter(id=options["batch_id"]).first()
+        else:
+            batch = batches.order_by("-uploaded_at").first()
+        if batch is None:
+            raise CommandError("No complete batch to report on; upload a CSV first.")
+        counts = [int(n) for n in options["charts"].split(",")]
+
+        self.stdout.write(
+            f"Batch {batch.id} ({batch.filename}), {os.cpu_count()} CPUs, {CHART_WORKERS} chart workers"
+        )
+        # Start the workers and fill the data caches, so only drawing is timed.
+        start = time.perf_counter()
+        draw_charts([("error", "", None, {"message": "warm-up"})])
+        self.stdout.write(f"  pool start: {time.perf_counter() - start:.2f}s")
+        render_pdf(batch, CHARTS, "warm-up", parallel=False, backend="matplotlib")
+
+        report_date = timezone.now().strftime("%Y-%m-%d")
+        modes = [
+            ("matplotlib", False, "matplotlib serial"),
+            ("matplotlib", True, "matplotlib pool"),
+            ("vector", True, "vector"),
+        ]
+        self.stdout.write(f"  {'charts':>6}  " + "  ".join(f"{label:>20}" for _, _, label in modes))
+        for count in counts:
+            cells = []
+            for backend, parallel, _ in modes:
+                best = None
+                for _ in range(options["repeat"]):
+                    # Fresh titles, so no chart image comes from the cache.
+                    run = uuid.uuid4().hex[:8]
+                    config = [
+                        {**CHARTS[i % len(CHARTS)], "title": f"Chart {i + 1} ({run})"} for i in range(count)
+                    ]
+                    start = time.perf_counter()
+                    pdf = render_pdf(batch, config, report_date, parallel=parallel, backend=backend)
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                cells.append(f"{best:>7.2f}s {len(pdf) / 1024:>8.0f} KB")
+            self.stdout.write(f"  {count:>6}  " + "  ".join(f"{cell:>20}" for cell in cells))
@@ -0,0 +1,47 @@
+import resource
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import UploadBatch
+from api.reports import render_pdf
+from api.selection import DEFAULT_DETAIL, DETAIL_LEVELS
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the report of a batch without charts (the full row table by default) and check "
+        "how far it raises the peak resident memory of the process against a budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("batch_id", nargs="?", type=int, help="Batch to report on (default: the largest)")
+        parser.add_argument("--detail", choices=DETAIL_LEVELS, default=DEFAULT_DETAIL, help="Report detail level")
+        parser.add_argument(
+            "--max-memory", type=float, default=64, help="Budget for the growth of the peak, in MB (sized for a 50,000-row batch)"
+        )
+
+    def handle(self, *args, **options):
+        batches = UploadBatch.objects.filter(is_complete=True).select_related("summary")
+        if options["batch_id"]:
+            batch = batches.filter(id=options["batch_id"]).first()
+        else:
+            batch = max(batches, key=lambda b: b.summary.row_count, default=None)
+        if batch is None:
+            raise CommandError("No complete batch to report on; upload large_equipment_data.csv first.")
+
+        self.stdout.write(f"Batch {batch.id} ({batch.filename}), {batch.summary.row_count:,} rows, {options['detail']} detail")
+        # ru_maxrss is in KB on Linux; run in a fresh process for a meaningful figure.
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        pdf = render_pdf(batch, [], "benchmark", detail=options["detail"])
+        elapsed = time.perf_counter() - start
+        growth = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) / 1024
+
+        pages = pdf.count(b"/Type /Page\n")
+        self.stdout.write(
+            f"  {elapsed:.1f}s  {pages:,} pages  {len(pdf) / 1e6:.1f} MB PDF  "
+            f"peak memory +{growth:.0f} MB (budget {options['max_memory']:.0f} MB)"
+        )
+        if growth > options["max_memory"]:
+            raise CommandError("Report rendering exceeded its memory budget")
@@ -0,0 +1,56 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from api.models import UploadBatch
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import EquipmentDataSerializer, equipment_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare EquipmentDataSerializer + JSONRenderer with the values_list fast path + "
+        "FastJSONRenderer on all rows of a batch, and check both give the same document."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("batch_id", nargs="?", type=int, help="Batch to serialize (default: the largest)")
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        batches = UploadBatch.objects.filter(is_complete=True)
+        if options["batch_id"]:
+            batch = batches.filter(id=options["batch_id"]).first()
+        else:
+            batch = max(batches.select_related("summary"), key=lambda b: b.summary.row_count, default=None)
+        if batch is None:
+            raise CommandError("No complete batch to serialize; upload large_equipment_data.csv first.")
+
+        rows = batch.equipment.order_by("id")
+        self.stdout.write(f"Batch {batch.id} ({batch.filename}), {rows.count():,} rows, orjson={'yes' if orjson else 'no'}")
+
+        def serializer_path():
+            return JSONRenderer().render(EquipmentDataSerializer(rows, many=True).data)
+
+        def fast_path():
+            return FastJSONRenderer().render(equipment_rows(rows))
+
+        results = {}
+        for label, func in [("serializer", serializer_path), ("fast path", fast_path)]:
+            timings = []
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                body = func()
+                timings.append(time.perf_counter() - start)
+            results[label] = (min(timings), body)
+
+        baseline = results["serializer"][0]
+        for label, (elapsed, body) in results.items():
+            self.stdout.write(f"  {label:<10}: {elapsed:.3f}s  {len(body) / 1e6:.1f} MB  {baseline / elapsed:.1f}x")
+
+        same = json.loads(results["serializer"][1]) == json.loads(results["fast path"][1])
+        self.stdout.write(f"  identical documents: {same}")
+        if not same:
+            raise CommandError("The fast path produced a different document")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api.uploads import SESSION_MAX_AGE, discard_stale_sessions
+
+
+class Command(BaseCommand):
+    help = "Delete resumable upload sessions older than UPLOAD_SESSION_MAX_AGE, with their received chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-age",
+            type=int,
+            default=SESSION_MAX_AGE,
+            help=f"Age in seconds after which a session is removed (default: {SESSION_MAX_AGE})",
+        )
+
+    def handle(self, *args, **options):
+        count = discard_stale_sessions(options["max_age"])
+        self.stdout.write(self.style.SUCCESS(f"Removed {count} upload sessions"))
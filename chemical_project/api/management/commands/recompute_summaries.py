@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from api.columnar import rebuild_columns, remove_columns
+from api.models import UploadBatch
+from api.summary import compute_summary
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored BatchSummary of complete batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("batch_ids", nargs="*", type=int, help="Batches to recompute (default: all)")
+        parser.add_argument("--missing", action="store_true", help="Only batches that have no summary yet")
+        parser.add_argument(
+            "--rebuild-columns",
+            action="store_true",
+            help="Rebuild the columnar copy from the database before summarising",
+        )
+
+    def handle(self, *args, **options):
+        batches = UploadBatch.objects.filter(is_complete=True).order_by("id")
+        if options["batch_ids"]:
+            batches = batches.filter(id__in=options["batch_ids"])
+        if options["missing"]:
+            batches = batches.filter(summary__isnull=True)
+
+        count = 0
+        for batch in batches.iterator():
+            if options["rebuild_columns"]:
+                remove_columns(batch.id)
+                rebuild_columns(batch)
+            summary = compute_summary(batch)
+            self.stdout.write(f"  batch {batch.id}: {summary.row_count} rows")
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Recomputed {count} summaries"))
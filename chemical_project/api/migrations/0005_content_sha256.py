@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='content_sha256',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='uploadbatch',
+            name='content_sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
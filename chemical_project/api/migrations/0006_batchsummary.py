@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_content_sha256'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_count', models.BigIntegerField(default=0)),
+                ('metrics', models.JSONField(default=dict)),
+                ('type_distribution', models.JSONField(default=dict)),
+                ('null_count', models.BigIntegerField(default=0)),
+                ('invalid_count', models.BigIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('batch', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='api.uploadbatch')),
+            ],
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_batchsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='batchsummary',
+            name='rejected_rows',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='batchsummary',
+            name='rejection_counts',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='rows_rejected',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='RowRejection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row', models.BigIntegerField()),
+                ('column', models.CharField(max_length=100)),
+                ('reason', models.CharField(max_length=50)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rejections', to='api.uploadbatch')),
+            ],
+        ),
+    ]
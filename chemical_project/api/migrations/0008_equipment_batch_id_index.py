@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_rowrejection'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipmentdata',
+            index=models.Index(fields=['batch', 'id'], name='api_equipme_batch_i_80da78_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_equipment_batch_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='chart_config',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('ingest', 'Ingest'), ('report', 'Report')], default='ingest', max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_job_chart_config'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='detail',
+            field=models.CharField(blank=True, default='full', max_length=20),
+        ),
+    ]
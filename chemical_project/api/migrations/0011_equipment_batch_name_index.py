@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_job_detail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipmentdata',
+            index=models.Index(fields=['batch', 'equipment_name'], name='api_equipme_batch_i_a6e638_idx'),
+        ),
+    ]
@@ -1,3 +1,6 @@
+import math
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -5,6 +8,10 @@ class UploadBatch(models.Model):
     filename = models.CharField(max_length=255)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    # False while a background ingest job is still writing rows
+    is_complete = models.BooleanField(default=True)
+    # Hex SHA-256 of the uploaded file, used to spot re-uploads
+    content_sha256 = models.CharField(max_length=64, blank=True, db_index=True)
 
     def __str__(self):
         return f"{self.filename} ({self.uploaded_at})"
@@ -17,5 +24,100 @@ class EquipmentData(models.Model):
     pressure = models.FloatField()
     temperature = models.FloatField()
 
+    class Meta:
+        # Keyset pagination walks a batch in id order; ingest looks up names
+        # already inserted for a batch to reject repeats
+        indexes = [
+            models.Index(fields=['batch', 'id']),
+            models.Index(fields=['batch', 'equipment_name']),
+        ]
+
+    def __str__(self):
+        return f"{self.equipment_name} - {self.equipment_type}"
+
+class BatchSummary(models.Model):
+    batch = models.OneToOneField(UploadBatch, on_delete=models.CASCADE, related_name='summary')
+    row_count = models.BigIntegerField(default=0)
+    # {metric: {"count", "mean", "min", "max", "std"}} for flowrate, pressure, temperature
+    metrics = models.JSONField(default=dict)
+    # {equipment type: rows}, in order of first appearance
+    type_distribution = models.JSONField(default=dict)
+    null_count = models.BigIntegerField(default=0)
+    invalid_count = models.BigIntegerField(default=0)
+    # Rows dropped by validation, and {reason: cells} over the whole upload
+    rejected_rows = models.BigIntegerField(default=0)
+    rejection_counts = models.JSONField(default=dict)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Summary of batch {self.batch_id}"
+
+class RowRejection(models.Model):
+    batch = models.ForeignKey(UploadBatch, on_delete=models.CASCADE, related_name='rejections')
+    # 1-based data row, not counting the header line
+    row = models.BigIntegerField()
+    column = models.CharField(max_length=100)
+    reason = models.CharField(max_length=50)
+
+    def __str__(self):
+        return f"Row {self.row}: {self.reason} in '{self.column}'"
+
+class Job(models.Model):
+    KIND_INGEST = 'ingest'
+    KIND_REPORT = 'report'
+    KIND_CHOICES = [
+        (KIND_INGEST, 'Ingest'),
+        (KIND_REPORT, 'Report'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default=KIND_INGEST)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='jobs')
+    batch = models.ForeignKey(UploadBatch, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    filename = models.CharField(max_length=255, blank=True)
+    rows_processed = models.BigIntegerField(default=0)
+    rows_rejected = models.BigIntegerField(default=0)
+    bytes_processed = models.BigIntegerField(default=0)
+    bytes_total = models.BigIntegerField(default=0)
+    content_sha256 = models.CharField(max_length=64, blank=True)
+    # Normalized chart config of a report job
+    chart_config = models.JSONField(default=list, blank=True)
+    # Detail level of a report job (see api.selection)
+    detail = models.CharField(max_length=20, default='full', blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.kind} job {self.id} ({self.status})"
+
+
+class UploadSession(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    total_size = models.BigIntegerField()
+    chunk_size = models.IntegerField()
+    # Optional hex SHA-256 of the whole file, checked on finalize
+    checksum = models.CharField(max_length=64, blank=True)
+    job = models.ForeignKey(Job, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def chunk_count(self):
+        return max(1, math.ceil(self.total_size / self.chunk_size))
+
     def __str__(self):
-        return f"{self.equipment_name} - {self.equipment_type}"
\ No newline at end of file
+        return f"{self.filename} ({self.id})"
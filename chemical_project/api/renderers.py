@@ -0,0 +1,117 @@
+"""Response renderers: orjson-backed JSON and columnar msgpack rows.
+
+``FastJSONRenderer`` is the default JSON renderer (see ``REST_FRAMEWORK`` in
+settings). For compact, unindented output it encodes with orjson when that
+is installed, giving the same document as DRF's ``JSONRenderer``: values
+orjson does not handle natively, and datetimes (which DRF writes with a
+``Z`` suffix), go through DRF's ``JSONEncoder``. Only float spelling may
+differ (``1e-05`` vs ``1e-5``). Indented output for the browsable API is
+left to ``JSONRenderer``.
+
+NaN and infinity are not valid JSON. orjson writes them as ``null``, and
+``FastJSONRenderer`` does the same on the ``JSONRenderer`` path, which
+would otherwise raise under ``STRICT_JSON``.
+
+A page of rows as JSON repeats every field name per row and prints every
+float as text. With ``Accept: application/x-msgpack`` the rows endpoint
+returns the same page as one array per field instead:
+
+* numeric fields and ``id`` as ``{"dtype": "<f8", "data": <bytes>}``, the
+  raw little-endian buffer, which clients read with ``numpy.frombuffer``;
+* ``equipment_type`` dictionary-encoded as ``{"labels": [...], "codes":
+  <typed array>}``;
+* ``equipment_name`` as a list of strings.
+"""
+import numpy as np
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:  # only needed for the binary row format
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:  # FastJSONRenderer falls back to the json module
+    orjson = None
+
+NUMERIC_DTYPES = {
+    "id": "<i8",
+    "flowrate": "<f8",
+    "pressure": "<f8",
+    "temperature": "<f8",
+}
+
+
+def _encode(obj):
+    if isinstance(obj, np.ndarray):
+        return {"dtype": obj.dtype.str, "data": obj.tobytes()}
+    raise TypeError(f"Cannot encode {type(obj).__name__}")
+
+
+def _finite(obj):
+    """``obj`` with NaN and infinite floats in nested dicts and lists replaced by None."""
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    if isinstance(obj, (float, np.floating)) and not np.isfinite(obj):
+        return None
+    return obj
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            try:
+                return super().render(data, accepted_media_type, renderer_context)
+            except ValueError:
+                # Out-of-range floats; retry with them as null, like orjson.
+                return super().render(_finite(data), accepted_media_type, renderer_context)
+        ret = orjson.dumps(
+            data,
+            default=JSONEncoder().default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+        # Escape U+2028/U+2029 like JSONRenderer, keeping the output valid JavaScript.
+        return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
+
+
+class ColumnarMsgpackRenderer(BaseRenderer):
+    media_type = "application/x-msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return msgpack.packb(data, default=_encode, use_bin_type=True)
+
+
+def row_renderers():
+    """Default renderers, plus msgpack when the package is installed."""
+    renderers = list(api_settings.DEFAULT_RENDERER_CLASSES)
+    if msgpack is not None:
+        renderers.append(ColumnarMsgpackRenderer)
+    return renderers
+
+
+def columnar_rows(rows, fields):
+    """Turn ``values_list`` tuples of ``fields`` into ``{field: column}``."""
+    columns = {}
+    for field, values in zip(fields, zip(*rows) if rows else [()] * len(fields)):
+        if field in NUMERIC_DTYPES:
+            columns[field] = np.array(values, dtype=NUMERIC_DTYPES[field])
+        elif field == "equipment_type":
+            labels, codes = np.unique(np.array(values, dtype=object), return_inverse=True)
+            columns[field] = {"labels": labels.tolist(), "codes": codes.astype("<i4")}
+        else:
+            columns[field] = list(values)
+    return columns
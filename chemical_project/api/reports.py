@@ -0,0 +1,513 @@
+"""PDF reports of a batch, rendered once and stored on disk.
+
+A report is identified by its batch and the SHA-256 of its normalized chart
+config and detail level, and lives at ``REPORT_DIR/<batch_id>/<key>.pdf``. Files are written
+to a temporary name and renamed into place, so a stored report is always
+complete. Report jobs (see ``jobs.run_report``) and the synchronous report
+view both go through ``stored_report``; the files of a batch are removed
+when it is deleted or its summary is recomputed. A stored report keeps the
+date it was first rendered.
+
+Chart entries are resolved to plain data here (``chart_data``). With the
+default "vector" backend, ``vector_charts`` turns most of them into native
+ReportLab drawings; the rest, or all of them with the "matplotlib"
+backend, become PNGs drawn by ``charts.draw_chart`` in a pool of spawned
+worker processes, so they render in parallel, and are cached as the
+batch's "chart" artifact. Identical chart entries are drawn once.
+
+The detail level (see ``selection``) decides which rows the report lists:
+none, the outliers of each type, a stratified sample, or all of them.
+Charts are drawn from batch aggregates or downsampled series whatever the
+level, each of bounded size (``PDF_*`` below), and a report has at most
+``REPORT_MAX_CHARTS`` of them, so every level but "full" renders in about
+the same time for any batch size.
+"""
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import Flowable, SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+
+from . import charts, vector_charts
+from .binning import batch_density, batch_histogram
+from .cache import get_or_compute_many
+from .columnar import NUMERIC_COLUMNS, load_columns
+from .aggregate import batch_aggregate
+from .downsample import batch_series
+from .selection import DEFAULT_DETAIL, select_rows
+from .summary import load_summary
+
+REPORT_DIR = Path(getattr(settings, "REPORT_DIR", Path(settings.BASE_DIR) / "var" / "reports"))
+# Part of every report key; bump it when the content of rendered reports changes
+REPORT_VERSION = 2
+# A 240pt-wide chart image cannot show more distinct points than this
+PDF_SERIES_POINTS = 400
+# Bar charts of a per-row metric show at most this many rows, picked by LTTB
+PDF_MAX_BARS = 200
+# Scatter charts of larger batches are drawn as a density grid instead
+PDF_SCATTER_MAX_POINTS = 2000
+PDF_DENSITY_BINS = 40
+CHART_BACKEND = getattr(settings, "REPORT_CHART_BACKEND", "vector")
+CHART_WORKERS = getattr(settings, "REPORT_CHART_WORKERS", min(4, os.cpu_count() or 1))
+TOP_PER_TYPE = getattr(settings, "REPORT_TOP_PER_TYPE", 10)
+SAMPLE_ROWS = getattr(settings, "REPORT_SAMPLE_ROWS", 500)
+MAX_CHARTS = getattr(settings, "REPORT_MAX_CHARTS", 12)
+
+CATEGORICAL_METRICS = {"type_distribution"}
+CONTINUOUS_METRICS = set(NUMERIC_COLUMNS)
+SCATTER_METRICS = {"flowrate_vs_pressure", "flowrate_vs_temperature", "pressure_vs_temperature"}
+
+# pyplot keeps global state, so charts drawn in this process go one at a time.
+_pyplot_lock = threading.Lock()
+_chart_pool = None
+_chart_pool_lock = threading.Lock()
+
+
+def normalize_chart_config(chart_config):
+    """Chart entries as rendered: ``type``/``metric`` lower-cased, defaults filled in."""
+    return [
+        {
+            "type": str(cfg.get("type", "bar")).lower(),
+            "metric": str(cfg.get("metric", "type_distribution")).lower(),
+            "title": str(cfg.get("title", "Chart")),
+            "color": cfg.get("color"),
+        }
+        for cfg in chart_config
+    ]
+
+
+def report_key(chart_config, detail=DEFAULT_DETAIL):
+    """Hex SHA-256 of the normalized ``chart_config``, the detail level and the chart backend."""
+    config = json.dumps(
+        {
+            "version": REPORT_VERSION,
+            "backend": CHART_BACKEND,
+            "charts": normalize_chart_config(chart_config),
+            "detail": [detail, TOP_PER_TYPE, SAMPLE_ROWS],
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(config.encode()).hexdigest()
+
+
+def report_path(batch_id, chart_config, detail=DEFAULT_DETAIL):
+    return REPORT_DIR / str(batch_id) / f"{report_key(chart_config, detail)}.pdf"
+
+
+def stored_report(batch, chart_config, detail=DEFAULT_DETAIL):
+    """Path of the report of ``batch`` for ``chart_config`` and ``detail``, rendering it if missing."""
+    path = report_path(batch.id, chart_config, detail)
+    if path.exists():
+        return path
+    pdf = render_pdf(batch, chart_config, timezone.now().strftime("%Y-%m-%d"), detail=detail)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return path
+
+
+def remove_reports(batch_id):
+    shutil.rmtree(REPORT_DIR / str(batch_id), ignore_errors=True)
+
+
+def chart_data(batch, columns, type_counts, chart_type, metric):
+    """Resolve a chart entry to ``(chart_type, data)`` for ``charts.draw_chart``.
+
+    Combinations that cannot be drawn become ``("error", {"message": ...})``.
+    """
+    def error(message):
+        return "error", {"message": message}
+
+    if chart_type in ["pie", "doughnut", "radar", "polar"] and metric not in CATEGORICAL_METRICS:
+        return error("Invalid data for categorical chart")
+    if chart_type in ["line", "area"] and metric not in CONTINUOUS_METRICS:
+        return error("Invalid data for Line/Area")
+    if chart_type == "scatter" and metric not in SCATTER_METRICS:
+        return error("Invalid data for Scatter")
+    if chart_type == "density" and metric not in SCATTER_METRICS:
+        return error("Invalid data for Density")
+    if chart_type == "histogram" and metric not in CONTINUOUS_METRICS:
+        return error("Invalid data for Histogram")
+
+    if chart_type == "scatter" and columns.rows > PDF_SCATTER_MAX_POINTS:
+        chart_type = "density"
+
+    if chart_type in ["line", "area"]:
+        series = batch_series(batch, metric, PDF_SERIES_POINTS)
+        return chart_type, {"x": series["x"], "y": series["y"]}
+    if chart_type == "scatter":
+        x_metric, y_metric = metric.split("_vs_")
+        return chart_type, {"x": np.asarray(columns.metric(x_metric)), "y": np.asarray(columns.metric(y_metric))}
+    if chart_type == "density":
+        x_metric, y_metric = metric.split("_vs_")
+        density = batch_density(batch, x_metric, y_metric, PDF_DENSITY_BINS)
+        return chart_type, {**density, "x_label": x_metric, "y_label": y_metric}
+    if chart_type == "histogram":
+        return chart_type, {**batch_histogram(batch, metric), "x_label": metric}
+
+    if metric == "type_distribution":
+        labels = list(type_counts.keys())
+        values = list(type_counts.values())
+    elif metric in CONTINUOUS_METRICS:
+        series = batch_series(batch, metric, PDF_MAX_BARS)
+        values = series["y"]
+        labels = [f"U{i + 1}" for i in series["x"]]
+    else:
+        labels = []
+        values = []
+    if chart_type in ["radar", "polar"] and not labels:
+        return error(f"No data for {chart_type.title()}")
+    if chart_type not in ["radar", "polar", "pie", "doughnut"]:
+        chart_type = "bar"
+    return chart_type, {"labels": labels, "values": values}
+
+
+def _get_chart_pool():
+    global _chart_pool
+    with _chart_pool_lock:
+        if _chart_pool is None:
+            # Spawned, not forked: forking a threaded server process is unsafe.
+            _chart_pool = ProcessPoolExecutor(
+                max_workers=CHART_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=charts.warm_up,
+            )
+        return _chart_pool
+
+
+def _drop_chart_pool(pool):
+    global _chart_pool
+    with _chart_pool_lock:
+        if _chart_pool is pool:
+            _chart_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def draw_charts(specs, parallel=True):
+    """PNG bytes of each ``(chart_type, title, color, data)`` in ``specs``, in order.
+
+    With ``parallel`` (and ``REPORT_CHART_WORKERS`` > 0) the charts are drawn
+    concurrently by a pool of worker processes that have pyplot loaded
+    already; otherwise, or if the pool breaks, one at a time in this process.
+    """
+    if parallel and CHART_WORKERS and specs:
+        pool = _get_chart_pool()
+        try:
+            return list(pool.map(charts.draw_chart, *zip(*specs)))
+        except BrokenProcessPool:
+            _drop_chart_pool(pool)
+    with _pyplot_lock:
+        return [charts.draw_chart(*spec) for spec in specs]
+
+
+TABLE_HEADER = ["Name", "Type", "Flowrate", "Pressure", "Temperature"]
+TABLE_COL_WIDTHS = [160, 110, 90, 90, 90]
+TABLE_ROW_HEIGHT = 18
+TABLE_STYLE_COMMANDS = [
+    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1e3a8a")),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("ALIGN", (2, 1), (-1, -1), "CENTER"),
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#cbd5e1")),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+]
+# Built once and shared by every page; rows alternate white / grey by row
+# number, so a page starting on an odd row uses the second style.
+TABLE_STYLES = [
+    TableStyle(TABLE_STYLE_COMMANDS + [("ROWBACKGROUNDS", (0, 1), (-1, -1), shades)])
+    for shades in ([colors.white, colors.HexColor("#f8fafc")], [colors.HexColor("#f8fafc"), colors.white])
+]
+
+
+class ChunkedTable(Flowable):
+    """The row table of a batch, laid out one page at a time.
+
+    Platypus asks a flowable that does not fit in the frame to split
+    itself. This one never fits: it splits into a ``Table`` of the header
+    and as many rows as fit (rows have a fixed height), followed by itself
+    for the remaining rows. Only one page of cell text exists at a time,
+    and no ``Table`` ever has to measure and split the whole batch.
+
+    ``index`` lists the row positions to show, in order; None shows every row.
+    """
+
+    def __init__(self, columns, index=None, start=0):
+        super().__init__()
+        self.columns = columns
+        self.index = index
+        self.start = start
+        self.rows = columns.rows if index is None else len(index)
+
+    def wrap(self, availWidth, availHeight):
+        return availWidth, availHeight + 1
+
+    def split(self, availWidth, availHeight):
+        columns = self.columns
+        # Rows that fit below the header; an empty table only needs the header.
+        fit = int(availHeight // TABLE_ROW_HEIGHT) - 1
+        if fit < (1 if self.rows else 0):
+            return []
+        stop = min(self.start + fit, self.rows)
+        if self.index is None:
+            rows = slice(self.start, stop)
+            names = columns.names(self.start, stop)
+        else:
+            rows = self.index[self.start:stop]
+            names = columns.names_at(rows)
+        data = [TABLE_HEADER]
+        data.extend(
+            zip(
+                names,
+                columns.equipment_types(rows),
+                np.char.mod("%.2f", columns.flowrate[rows]).tolist(),
+                np.char.mod("%.2f", columns.pressure[rows]).tolist(),
+                np.char.mod("%.2f", columns.temperature[rows]).tolist(),
+            )
+        )
+        table = Table(
+            data,
+            colWidths=TABLE_COL_WIDTHS,
+            rowHeights=TABLE_ROW_HEIGHT,
+            style=TABLE_STYLES[self.start % 2],
+        )
+        if stop < self.rows:
+            return [table, ChunkedTable(columns, self.index, stop)]
+        return [table]
+
+    def draw(self):
+        pass
+
+
+class NumberedCanvas(canvas.Canvas):
+    """Canvas that writes "Page n of total" in the footer of every page.
+
+    The total is unknown until the last page, so each page only references
+    a form XObject by name; the forms are defined in ``save``. Nothing of
+    the finished pages is kept, unlike snapshotting each page's state.
+    """
+
+    def showPage(self):
+        self.doForm(f"page_number_{self._pageNumber}")
+        super().showPage()
+
+    def save(self):
+        total_pages = self._pageNumber - 1
+        for number in range(1, total_pages + 1):
+            self.beginForm(f"page_number_{number}")
+            self.setFont("Helvetica", 9)
+            self.setFillColor(colors.HexColor("#64748b"))
+            self.drawRightString(letter[0] - 40, 30, f"Page {number} of {total_pages}")
+            self.endForm()
+        super().save()
+
+
+def render_pdf(batch, chart_config, report_date, parallel=True, backend=CHART_BACKEND, detail=DEFAULT_DETAIL):
+    """Render the report of ``batch`` and return the PDF bytes.
+
+    ``backend`` "vector" draws the charts ``vector_charts`` supports as
+    ReportLab drawings and the rest with matplotlib; "matplotlib" draws all
+    of them as PNGs. With ``parallel`` the PNGs are drawn by the worker
+    pool, else in this process. ``detail`` is one of
+    ``selection.DETAIL_LEVELS``.
+    """
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        leftMargin=40,
+        rightMargin=40,
+        topMargin=80,
+        bottomMargin=50,
+    )
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        "TitleStyle",
+        parent=styles["Heading2"],
+        fontSize=16,
+        textColor=colors.HexColor("#0f172a"),
+        spaceAfter=8,
+    )
+    body_style = ParagraphStyle(
+        "BodyStyle",
+        parent=styles["Normal"],
+        fontSize=10,
+        textColor=colors.HexColor("#0f172a"),
+    )
+
+    columns = load_columns(batch)
+    summary = load_summary(batch)
+    type_counts = summary.type_distribution
+
+    stats = {
+        "avg_flow": summary.metrics["flowrate"]["mean"],
+        "avg_press": summary.metrics["pressure"]["mean"],
+        "avg_temp": summary.metrics["temperature"]["mean"],
+        "count": summary.row_count,
+    }
+
+    elements = []
+    elements.append(Paragraph("ChemViz Analytics Report", title_style))
+    elements.append(Paragraph(f"<b>File Name:</b> {batch.filename}", body_style))
+    elements.append(Paragraph(f"<b>Batch ID:</b> {batch.id}", body_style))
+    elements.append(Spacer(1, 10))
+
+    summary_data = [
+        ["Total Equipment Count", "Average Flowrate", "Average Pressure"],
+        [
+            str(stats["count"]),
+            f"{stats['avg_flow']:.2f} m³/hr" if stats["avg_flow"] else "-",
+            f"{stats['avg_press']:.2f} bar" if stats["avg_press"] else "-",
+        ],
+    ]
+    summary_table = Table(summary_data, colWidths=[160, 160, 160])
+    summary_table.setStyle(
+        TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#e2e8f0")),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#0f172a")),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#cbd5f5")),
+            ]
+        )
+    )
+    elements.append(summary_table)
+    elements.append(Spacer(1, 12))
+
+    query = {"metrics": list(NUMERIC_COLUMNS), "functions": ["mean"], "group_by": "equipment_type"}
+    type_data = [["Type", "Count", "Avg Flowrate", "Avg Pressure", "Avg Temperature"]]
+    for group in batch_aggregate(batch, query)["groups"]:
+        means = [group["values"][metric]["mean"] for metric in NUMERIC_COLUMNS]
+        type_data.append(
+            [group["key"], str(group["rows"])] + ["-" if mean is None else f"{mean:.2f}" for mean in means]
+        )
+    type_table = Table(type_data, colWidths=[140, 60, 100, 100, 100])
+    type_table.setStyle(
+        TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#e2e8f0")),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#0f172a")),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("ALIGN", (1, 0), (-1, -1), "CENTER"),
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#cbd5f5")),
+            ]
+        )
+    )
+    elements.append(type_table)
+    elements.append(Spacer(1, 16))
+
+    if chart_config and columns.rows:
+        elements.append(Paragraph("Charts Overview", title_style))
+
+        configs = normalize_chart_config(chart_config)
+        # Identical entries are drawn once.
+        unique = {json.dumps(cfg, sort_keys=True): cfg for cfg in configs}
+        specs = {}
+        for key, cfg in unique.items():
+            kind, data = chart_data(batch, columns, type_counts, cfg["type"], cfg["metric"])
+            specs[key] = (kind, cfg["title"], cfg["color"], data)
+
+        drawings = {}
+        if backend == "vector":
+            drawings = {
+                key: vector_charts.draw_chart(*spec)
+                for key, spec in specs.items()
+                if vector_charts.supports(spec[0], spec[3])
+            }
+        raster = [cfg for key, cfg in unique.items() if key not in drawings]
+        pngs = get_or_compute_many(
+            batch,
+            "chart",
+            raster,
+            lambda missing: draw_charts([specs[json.dumps(cfg, sort_keys=True)] for cfg in missing], parallel),
+        )
+        images = dict(drawings)
+        images.update(zip((json.dumps(cfg, sort_keys=True) for cfg in raster), pngs))
+        chart_images = []
+        for cfg in configs:
+            image = images[json.dumps(cfg, sort_keys=True)]
+            chart_images.append(Image(io.BytesIO(image), width=240, height=160) if isinstance(image, bytes) else image)
+
+        cols = 2
+        rows = []
+        for i in range(0, len(chart_images), cols):
+            row = chart_images[i:i + cols]
+            if len(row) < cols:
+                row.append(Spacer(1, 1))
+            rows.append(row)
+
+        chart_table = Table(rows, colWidths=[250, 250])
+        chart_table.setStyle(
+            TableStyle(
+                [
+                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                    ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+                    ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#e2e8f0")),
+                    ("BACKGROUND", (0, 0), (-1, -1), colors.HexColor("#f8fafc")),
+                ]
+            )
+        )
+        elements.append(chart_table)
+        elements.append(Spacer(1, 16))
+    else:
+        elements.append(Paragraph("Summary Only Report", title_style))
+        elements.append(Spacer(1, 8))
+
+    index = select_rows(columns, detail, TOP_PER_TYPE, SAMPLE_ROWS, seed=batch.id)
+    caption = None
+    if detail == "top":
+        caption = (
+            f"Outliers: up to {TOP_PER_TYPE} rows of each type, furthest from the type's mean "
+            f"(in standard deviations); {len(index):,} of {columns.rows:,} rows."
+        )
+    elif detail == "sample":
+        caption = f"Stratified sample: {len(index):,} of {columns.rows:,} rows, each type in proportion."
+    if caption:
+        elements.append(Paragraph(caption, body_style))
+        elements.append(Spacer(1, 6))
+    if detail != "summary":
+        elements.append(ChunkedTable(columns, index))
+
+    def draw_header(canvas_obj, doc_obj):
+        canvas_obj.saveState()
+        canvas_obj.setFont("Helvetica-Bold", 13)
+        canvas_obj.setFillColor(colors.HexColor("#0f172a"))
+        canvas_obj.drawString(40, letter[1] - 40, "ChemViz Analytics Report")
+        canvas_obj.setFont("Helvetica", 9)
+        canvas_obj.setFillColor(colors.HexColor("#475569"))
+        canvas_obj.drawRightString(letter[0] - 40, letter[1] - 40, report_date)
+        canvas_obj.setStrokeColor(colors.HexColor("#cbd5e1"))
+        canvas_obj.setLineWidth(1)
+        canvas_obj.line(40, letter[1] - 48, letter[0] - 40, letter[1] - 48)
+        canvas_obj.restoreState()
+
+    doc.build(
+        elements,
+        onFirstPage=draw_header,
+        onLaterPages=draw_header,
+        canvasmaker=NumberedCanvas,
+    )
+
+    return buffer.getvalue()
@@ -0,0 +1,96 @@
+"""Row selection for the detail levels of a PDF report.
+
+``DETAIL_LEVELS`` go from cheapest to most complete:
+
+    summary   no rows, only the batch and per-type figures
+    top       per type, the rows furthest from their type's mean
+    sample    a stratified random sample, each type in proportion
+    full      every row
+
+``select_rows`` returns the row positions a level lists, or None for all of
+them. Both selections group rows with one ``lexsort`` by type code and rank
+each row within its group, so they cost a few passes over the memory-mapped
+columns and the report they feed has a bounded number of pages.
+"""
+import numpy as np
+
+from .columnar import NUMERIC_COLUMNS
+
+DETAIL_LEVELS = ("summary", "top", "sample", "full")
+DEFAULT_DETAIL = "full"
+
+
+def _ranked(codes, order):
+    """Rank of each row of ``order`` within its type, for ``order`` grouped by ``codes``."""
+    sorted_codes = codes[order]
+    starts = np.searchsorted(sorted_codes, np.arange(sorted_codes.max() + 1))
+    return sorted_codes, np.arange(len(order)) - starts[sorted_codes]
+
+
+def outlier_scores(columns):
+    """Largest distance of each row from its type's mean, in that type's standard deviations.
+
+    Missing values and types without spread score 0.
+    """
+    codes = np.asarray(columns.type_codes, dtype=np.int64)
+    size = len(columns.types)
+    scores = np.zeros(columns.rows)
+    for metric in NUMERIC_COLUMNS:
+        values = np.asarray(columns.metric(metric))
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+        counts = np.bincount(codes, weights=valid, minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.bincount(codes, weights=filled, minlength=size) / counts
+            var = np.bincount(codes, weights=filled * filled, minlength=size) / counts - mean * mean
+            std = np.sqrt(np.maximum(var, 0))
+            z = np.abs(filled - mean[codes]) / std[codes]
+        scores = np.fmax(scores, np.where(valid & np.isfinite(z), z, 0.0))
+    return scores
+
+
+def top_rows(columns, per_type):
+    """Positions of the ``per_type`` highest-scoring rows of each type.
+
+    Rows are grouped by type in order of first appearance, highest score
+    first; ties keep file order.
+    """
+    if not columns.rows:
+        return np.zeros(0, dtype=np.int64)
+    codes = np.asarray(columns.type_codes, dtype=np.int64)
+    order = np.lexsort((-outlier_scores(columns), codes))
+    _, rank = _ranked(codes, order)
+    return order[rank < per_type]
+
+
+def sample_rows(columns, size, seed):
+    """Positions of a stratified random sample of about ``size`` rows, in file order.
+
+    Each type gets its share of ``size`` (largest remainder), and at least
+    one row, so rare types are never left out. The same ``seed`` gives the
+    same sample.
+    """
+    if columns.rows <= size:
+        return np.arange(columns.rows)
+    codes = np.asarray(columns.type_codes, dtype=np.int64)
+    counts = np.bincount(codes, minlength=len(columns.types))
+    exact = counts * size / columns.rows
+    quota = np.floor(exact).astype(np.int64)
+    quota[np.argsort(quota - exact, kind="stable")[:size - quota.sum()]] += 1
+    quota = np.where(counts > 0, np.maximum(quota, 1), 0)
+
+    keys = np.random.default_rng(seed).random(columns.rows)
+    order = np.lexsort((keys, codes))
+    sorted_codes, rank = _ranked(codes, order)
+    return np.sort(order[rank < quota[sorted_codes]])
+
+
+def select_rows(columns, detail, top_per_type, sample_size, seed):
+    """Row positions listed by a report at ``detail``; None means every row."""
+    if detail == "summary":
+        return np.zeros(0, dtype=np.int64)
+    if detail == "top":
+        return top_rows(columns, top_per_type)
+    if detail == "sample":
+        return sample_rows(columns, sample_size, seed)
+    return None
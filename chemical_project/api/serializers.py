@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import UploadBatch, EquipmentData
+from .models import UploadBatch, EquipmentData, Job, BatchSummary, RowRejection
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -44,9 +44,42 @@ class EquipmentDataSerializer(serializers.ModelSerializer):
         model = EquipmentData
         fields = ['id', 'equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature']
 
+def equipment_rows(queryset, fields=None):
+    """Same dicts as ``EquipmentDataSerializer(queryset, many=True).data``, built
+    straight from ``values_list`` tuples without per-row serializer calls."""
+    fields = fields or EquipmentDataSerializer.Meta.fields
+    return [dict(zip(fields, row)) for row in queryset.values_list(*fields)]
+
 class UploadBatchSerializer(serializers.ModelSerializer):
     uploaded_by = UserSerializer(read_only=True)
     
     class Meta:
         model = UploadBatch
-        fields = ['id', 'filename', 'uploaded_at', 'uploaded_by']
\ No newline at end of file
+        fields = ['id', 'filename', 'uploaded_at', 'uploaded_by']
+
+class BatchSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BatchSummary
+        fields = ['row_count', 'metrics', 'type_distribution', 'null_count', 'invalid_count',
+                  'rejected_rows', 'rejection_counts', 'computed_at']
+
+class RowRejectionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RowRejection
+        fields = ['row', 'column', 'reason']
+
+class JobSerializer(serializers.ModelSerializer):
+    batch_id = serializers.IntegerField(read_only=True)
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'status', 'filename', 'batch_id', 'rows_processed', 'rows_rejected', 'bytes_processed',
+                  'bytes_total', 'progress', 'error', 'created_at', 'updated_at', 'finished_at']
+
+    def get_progress(self, obj):
+        if obj.status == Job.STATUS_DONE:
+            return 100.0
+        if not obj.bytes_total:
+            return 0.0
+        return round(min(obj.bytes_processed / obj.bytes_total, 1.0) * 100, 1)
@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_batch
+from .columnar import remove_columns
+from .models import BatchSummary, UploadBatch
+from .reports import remove_reports
+
+
+@receiver(post_delete, sender=UploadBatch)
+def remove_batch_columns(sender, instance, **kwargs):
+    # Wait for the commit so a rolled-back delete keeps its files.
+    batch_id = instance.id
+    transaction.on_commit(lambda: remove_columns(batch_id))
+
+
+@receiver(post_delete, sender=UploadBatch)
+def drop_batch_artifacts(sender, instance, **kwargs):
+    batch_id = instance.id
+    transaction.on_commit(lambda: invalidate_batch(batch_id))
+    transaction.on_commit(lambda: remove_reports(batch_id))
+
+
+@receiver(post_save, sender=BatchSummary)
+def refresh_batch_artifacts(sender, instance, **kwargs):
+    # A new or recomputed summary may follow rebuilt columns.
+    batch_id = instance.batch_id
+    transaction.on_commit(lambda: invalidate_batch(batch_id))
+    transaction.on_commit(lambda: remove_reports(batch_id))
@@ -0,0 +1,35 @@
+"""Incremental JSON encoding of whole-batch row data.
+
+``stream_rows`` walks a queryset with ``.iterator()`` (a server-side cursor
+on PostgreSQL, ``fetchmany`` on SQLite) and yields the JSON document in
+pieces of ``STREAM_CHUNK_ROWS`` rows, so neither the row objects nor the
+response text of the whole batch are ever held in memory at once.
+"""
+import json
+
+from django.conf import settings
+
+STREAM_CHUNK_ROWS = getattr(settings, "ROWS_STREAM_CHUNK_ROWS", 2000)
+
+
+def stream_rows(queryset, fields, head, chunk_rows=STREAM_CHUNK_ROWS):
+    """Yield ``{**head, "results": [{field: value}, ...]}`` as UTF-8 chunks.
+
+    ``queryset`` must already be ordered; ``head`` holds the other
+    top-level keys and is written first.
+    """
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    prefix = encoder.encode(head)[:-1]
+    yield (prefix + ("," if head else "") + '"results":[').encode()
+
+    buffer = []
+    first = True
+    for row in queryset.values_list(*fields).iterator(chunk_size=chunk_rows):
+        buffer.append(encoder.encode(dict(zip(fields, row))))
+        if len(buffer) >= chunk_rows:
+            yield (("" if first else ",") + ",".join(buffer)).encode()
+            first = False
+            buffer = []
+    if buffer:
+        yield (("" if first else ",") + ",".join(buffer)).encode()
+    yield b"]}"
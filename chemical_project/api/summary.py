@@ -0,0 +1,133 @@
+"""Per-batch summary statistics, accumulated once while a batch is written.
+
+``SummaryAccumulator`` takes the same ``{field: array}`` chunks as the
+columnar writer and keeps running count/mean/M2 per metric, merged chunk by
+chunk with Chan's parallel variance formula, so a batch of any size is
+summarised in a single pass with constant memory. The result is stored as a
+``BatchSummary`` row that the dashboard and report views read directly.
+"""
+import math
+
+import numpy as np
+
+from .columnar import NUMERIC_COLUMNS, load_columns
+from .models import BatchSummary
+from .validation import MISSING
+
+SUMMARY_CHUNK_SIZE = 100000
+
+
+class SummaryAccumulator:
+    def __init__(self):
+        self.rows = 0
+        self.null_count = 0
+        self.invalid_count = 0
+        self.rejected_rows = 0
+        self.rejection_counts = {}
+        self.types = {}
+        self._stats = {metric: [0, 0.0, 0.0, math.inf, -math.inf] for metric in NUMERIC_COLUMNS}
+
+    def add(self, columns):
+        """Fold one chunk of ``{field: array}`` into the running totals."""
+        for metric in NUMERIC_COLUMNS:
+            values = np.asarray(columns[metric], dtype=np.float64)
+            nan = np.isnan(values)
+            if nan.any():
+                self.null_count += int(nan.sum())
+                values = values[~nan]
+            if not len(values):
+                continue
+
+            stats = self._stats[metric]
+            count, mean, m2 = stats[0], stats[1], stats[2]
+            n = len(values)
+            chunk_mean = float(values.mean())
+            chunk_m2 = float(((values - chunk_mean) ** 2).sum())
+            total = count + n
+            delta = chunk_mean - mean
+            stats[0] = total
+            stats[1] = mean + delta * n / total
+            stats[2] = m2 + chunk_m2 + delta * delta * count * n / total
+            stats[3] = min(stats[3], float(values.min()))
+            stats[4] = max(stats[4], float(values.max()))
+
+        labels, first, counts = np.unique(
+            np.asarray(columns["equipment_type"]).astype(str), return_index=True, return_counts=True
+        )
+        for i in np.argsort(first, kind="stable"):
+            label = str(labels[i])
+            self.types[label] = self.types.get(label, 0) + int(counts[i])
+
+        self.rows += len(columns["equipment_type"])
+
+    def add_rejected(self, rows, counts):
+        """Count rows dropped by validation before reaching ``add``.
+
+        ``counts`` maps rejection reason to the number of cells; blank cells
+        count as nulls and everything else as invalid.
+        """
+        self.rejected_rows += rows
+        for reason, cells in counts.items():
+            self.rejection_counts[reason] = self.rejection_counts.get(reason, 0) + cells
+            if reason == MISSING:
+                self.null_count += cells
+            else:
+                self.invalid_count += cells
+
+    def metrics(self):
+        result = {}
+        for metric, (count, mean, m2, low, high) in self._stats.items():
+            if count:
+                result[metric] = {
+                    "count": count,
+                    "mean": mean,
+                    "min": low,
+                    "max": high,
+                    "std": math.sqrt(m2 / count),
+                }
+            else:
+                result[metric] = {"count": 0, "mean": None, "min": None, "max": None, "std": None}
+        return result
+
+    def save(self, batch_id):
+        """Create or replace the ``BatchSummary`` row for ``batch_id``."""
+        summary, _ = BatchSummary.objects.update_or_create(
+            batch_id=batch_id,
+            defaults={
+                "row_count": self.rows,
+                "metrics": self.metrics(),
+                "type_distribution": self.types,
+                "null_count": self.null_count,
+                "invalid_count": self.invalid_count,
+                "rejected_rows": self.rejected_rows,
+                "rejection_counts": self.rejection_counts,
+            },
+        )
+        return summary
+
+
+def compute_summary(batch):
+    """Recompute and store the summary of ``batch`` from its columnar copy.
+
+    Rejected rows never reach the columns, so their counts are carried over
+    from the previous summary.
+    """
+    columns = load_columns(batch)
+    accumulator = SummaryAccumulator()
+    previous = BatchSummary.objects.filter(batch_id=batch.id).first()
+    if previous:
+        accumulator.add_rejected(previous.rejected_rows, previous.rejection_counts)
+    for start in range(0, columns.rows, SUMMARY_CHUNK_SIZE):
+        index = slice(start, start + SUMMARY_CHUNK_SIZE)
+        chunk = {metric: columns.metric(metric)[index] for metric in NUMERIC_COLUMNS}
+        chunk["equipment_type"] = columns.equipment_types(index)
+        accumulator.add(chunk)
+    return accumulator.save(batch.id)
+
+
+def load_summary(batch):
+    """Return the stored summary of ``batch``, computing it on first use."""
+    try:
+        return batch.summary
+    except BatchSummary.DoesNotExist:
+        return compute_summary(batch)
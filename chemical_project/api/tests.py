@@ -1,3 +1,786 @@
+import base64
+import gzip
+import hashlib
+import io
+import json
+import re
+import shutil
+import tempfile
+import zipfile
+import zlib
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock, skipIf
+
+import numpy as np
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import cache, columnar, ingest, jobs, renderers, reports, uploads, vector_charts, views
+from .columnar import load_columns
+from .models import BatchSummary, Job, UploadBatch, UploadSession
+from .renderers import FastJSONRenderer
+from .selection import sample_rows, top_rows
+from .validation import Rejections
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CSV_HEADER = "Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+
+
+def csv_bytes(rows):
+    return (CSV_HEADER + "".join(",".join(str(value) for value in row) + "\n" for row in rows)).encode()
+
+
+def equipment_rows(count, types=("Pump", "Valve", "Reactor")):
+    return [
+        (f"E{i}", types[i % len(types)], 10 + i % 7, 2 + i % 5, 50 + i % 11)
+        for i in range(count)
+    ]
+
+
+def compressed(content, name="data.csv"):
+    """``content`` as each upload format the server sniffs, keyed by format."""
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(name, content)
+    formats = {"plain": content, "gzip": gzip.compress(content), "zip": archive.getvalue()}
+    if zstandard is not None:
+        formats["zstd"] = zstandard.ZstdCompressor().compress(content)
+    return formats
+
+
+def pdf_content(pdf):
+    """Page content of a ReportLab PDF without images: its streams, decoded."""
+    streams = re.findall(rb"stream\n(.*?~>)endstream", pdf, re.S)
+    return b"".join(zlib.decompress(base64.a85decode(stream, adobe=True)) for stream in streams)
+
+
+class ApiTestCase(TestCase):
+    """Jobs run inline, and columns, spool files, reports and cache entries
+    live in a temporary directory per test."""
+
+    def setUp(self):
+        self.tmp = tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, tmp, True)
+        for target, name, value in [
+            (jobs, "WORKERS", 0),
+            (jobs, "SPOOL_DIR", tmp / "spool"),
+            (columnar, "ROOT", tmp / "columns"),
+            (reports, "REPORT_DIR", tmp / "reports"),
+            (uploads, "SESSION_DIR", tmp / "uploads"),
+            (cache, "SHARED_PATH", None),
+            (cache, "_cache", None),
+        ]:
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user("alice", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, content, name="data.csv"):
+        """POST ``content`` to the upload endpoint and return the finished job."""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/upload/", {"file": SimpleUploadedFile(name, content)}, format="multipart"
+            )
+        self.assertIn(response.status_code, (200, 202), response.content)
+        return Job.objects.get(id=response.json()["job_id"])
+
+    def upload_batch(self, rows, name="data.csv"):
+        job = self.upload(csv_bytes(rows), name)
+        self.assertEqual(job.status, Job.STATUS_DONE, job.error)
+        return job.batch
+
+
+class ConditionalGetTests(ApiTestCase):
+    def assertRevalidates(self, url, params=None):
+        """The first GET is a 200 with an ETag; sending it back gets a 304. Returns the ETag."""
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        return etag
+
+    def test_summary(self):
+        batch = self.upload_batch(equipment_rows(20))
+        etag = self.assertRevalidates(f"/api/summary/{batch.id}/")
+        other = self.upload_batch(equipment_rows(30), "other.csv")
+        self.assertNotEqual(etag, self.assertRevalidates(f"/api/summary/{other.id}/"))
+
+    def test_history_changes_with_new_upload(self):
+        self.upload_batch(equipment_rows(5))
+        etag = self.assertRevalidates("/api/history/")
+        self.upload_batch(equipment_rows(6), "second.csv")
+        response = self.client.get("/api/history/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_history_changes_when_duplicate_reorders(self):
+        first = self.upload_batch(equipment_rows(5), "first.csv")
+        self.upload_batch(equipment_rows(6), "second.csv")
+        etag = self.assertRevalidates("/api/history/")
+
+        job = self.upload(csv_bytes(equipment_rows(5)), "again.csv")
+        self.assertEqual(job.batch_id, first.id)
+        response = self.client.get("/api/history/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["id"], first.id)
+
+    def test_report(self):
+        batch = self.upload_batch(equipment_rows(20))
+        url = f"/api/report/{batch.id}/"
+        etag = self.assertRevalidates(url, {"detail": "summary"})
+        self.assertNotEqual(etag, self.assertRevalidates(url, {"detail": "sample"}))
+        chart_config = '[{"type": "bar", "metric": "type_distribution"}]'
+        self.assertNotEqual(etag, self.assertRevalidates(url, {"detail": "summary", "chart_config": chart_config}))
+
+
+class CacheTests(ApiTestCase):
+    def test_lru_is_bounded_by_bytes(self):
+        tier = cache.LRUTier(max_bytes=100)
+        for key in "abc":
+            tier.set(key, key.upper(), b"x" * 40, batch_id=1)
+        self.assertEqual(tier.get("a"), (False, None))
+        self.assertEqual(tier.get("b"), (True, "B"))
+        # "b" is now the most recently used, so "c" goes next.
+        tier.set("d", "D", b"x" * 40, batch_id=2)
+        self.assertEqual(tier.get("c"), (False, None))
+        tier.set("huge", "H", b"x" * 101, batch_id=2)
+        self.assertEqual(tier.get("huge"), (False, None))
+        self.assertEqual(tier.stats(), {"hits": 1, "misses": 3, "entries": 2, "bytes": 80})
+
+    def test_shared_tier_is_promoted(self):
+        batch = self.upload_batch(equipment_rows(5))
+        path = self.tmp / "shared.sqlite3"
+        first = cache.ArtifactCache([cache.LRUTier(1024), cache.SQLiteTier(path, 1024 * 1024)])
+        self.assertEqual(first.get_or_compute(batch, "test", {"n": 1}, lambda: [1, 2]), [1, 2])
+
+        # Another process: its own LRU, the same SQLite file.
+        second = cache.ArtifactCache([cache.LRUTier(1024), cache.SQLiteTier(path, 1024 * 1024)])
+        self.assertEqual(second.get_or_compute(batch, "test", {"n": 1}, self.fail), [1, 2])
+        self.assertEqual(second.get_or_compute(batch, "test", {"n": 1}, self.fail), [1, 2])
+        stats = second.stats()
+        self.assertEqual((stats["memory"]["hits"], stats["memory"]["misses"], stats["memory"]["entries"]), (1, 1, 1))
+        self.assertEqual((stats["shared"]["hits"], stats["shared"]["misses"]), (1, 0))
+
+    def test_summary_follows_recompute_in_another_process(self):
+        batch = self.upload_batch(equipment_rows(5))
+        url = f"/api/summary/{batch.id}/"
+        self.assertEqual(self.client.get(url).json()["summary"]["total_count"], 5)
+        # A queryset update sends no signal, like a write from another process.
+        BatchSummary.objects.filter(batch=batch).update(
+            row_count=6, computed_at=timezone.now() + timedelta(seconds=1)
+        )
+        self.assertEqual(self.client.get(url).json()["summary"]["total_count"], 6)
+
+    def test_entries_dropped_on_delete_and_eviction(self):
+        memory = cache.artifact_cache().tiers[0]
+        first = self.upload_batch(equipment_rows(5))
+        self.client.get(f"/api/summary/{first.id}/")
+        self.assertEqual(memory.stats()["entries"], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/api/summary/{first.id}/")
+        self.assertEqual(memory.stats()["entries"], 0)
+
+        second = self.upload_batch(equipment_rows(6))
+        self.client.get(f"/api/summary/{second.id}/")
+        self.assertEqual(memory.stats()["entries"], 1)
+        with mock.patch.object(jobs, "MAX_BATCHES_PER_USER", 1):
+            self.upload_batch(equipment_rows(7))
+        self.assertFalse(UploadBatch.objects.filter(id=second.id).exists())
+        self.assertEqual(memory.stats()["entries"], 0)
+
+
+class IngestTests(ApiTestCase):
+    def test_good_csv(self):
+        job = self.upload(csv_bytes(equipment_rows(25)))
+        self.assertEqual(job.status, Job.STATUS_DONE)
+        self.assertEqual((job.rows_processed, job.rows_rejected), (25, 0))
+        self.assertEqual(job.batch.equipment.count(), 25)
+        self.assertTrue(job.batch.is_complete)
+
+        summary = self.client.get(f"/api/summary/{job.batch_id}/").json()
+        self.assertEqual(summary["summary"]["total_count"], 25)
+        self.assertEqual(sum(summary["type_distribution"].values()), 25)
+
+    def test_partial_csv_keeps_valid_rows(self):
+        rows = equipment_rows(10) + [
+            ("Bad1", "Pump", "", 2, 50),
+            ("Bad2", "Pump", -5, 2, 50),
+            ("Bad3", "Valve", 10, "high", 50),
+            ("E0", "Pump", 10, 2, 50),
+        ]
+        job = self.upload(csv_bytes(rows))
+        self.assertEqual(job.status, Job.STATUS_DONE, job.error)
+        self.assertEqual((job.rows_processed, job.rows_rejected), (10, 4))
+        self.assertEqual(job.batch.equipment.count(), 10)
+
+        report = self.client.get(f"/api/rejections/{job.batch_id}/").json()
+        self.assertEqual((report["rows_accepted"], report["rows_rejected"]), (10, 4))
+        self.assertEqual(
+            [(item["row"], item["reason"]) for item in report["rejections"]],
+            [(11, "missing value"), (12, "out of range"), (13, "invalid value"), (14, "duplicate name")],
+        )
+
+    def test_repeated_names_across_chunks(self):
+        rows = equipment_rows(10) + [("E1", "Pump", 1, 1, 1), ("New", "Pump", 1, 1, 1), ("E9", "Pump", 1, 1, 1)]
+        with mock.patch.object(ingest, "CHUNK_SIZE", 4):
+            job = self.upload(csv_bytes(rows))
+        self.assertEqual((job.rows_processed, job.rows_rejected), (11, 2))
+        report = self.client.get(f"/api/rejections/{job.batch_id}/").json()
+        self.assertEqual([item["row"] for item in report["rejections"]], [11, 13])
+
+    def test_all_bad_csv_fails(self):
+        rows = [(f"Bad{i}", "Pump", -1, 2, 50) for i in range(6)]
+        job = self.upload(csv_bytes(rows))
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertIn("No valid rows", job.error)
+        self.assertEqual(job.rows_rejected, 6)
+        self.assertFalse(UploadBatch.objects.exists())
+
+    def test_compressed_uploads(self):
+        content = csv_bytes(equipment_rows(25))
+        names = {"plain": "data.csv", "gzip": "data.csv.gz", "zstd": "data.csv.zst", "zip": "data.zip"}
+        for i, (fmt, name) in enumerate(names.items()):
+            # Vary the content so no upload is a duplicate of another.
+            formats = compressed(content + f"Extra{i},Pump,1,1,1\n".encode())
+            if fmt not in formats:
+                continue  # zstandard is not installed
+            with self.subTest(fmt):
+                job = self.upload(formats[fmt], name)
+                self.assertEqual(job.status, Job.STATUS_DONE, job.error)
+                self.assertEqual(job.batch.equipment.count(), 26)
+
+    def test_bad_zip_uploads(self):
+        content = csv_bytes(equipment_rows(25))
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("a.csv", content)
+            zf.writestr("b.csv", content)
+        job = self.upload(archive.getvalue(), "two.zip")
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertEqual(job.error, "Zip uploads must contain exactly one CSV file")
+
+        # A stored member with one byte changed fails its CRC check on read.
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_STORED) as zf:
+            zf.writestr("data.csv", content)
+        corrupt = bytearray(archive.getvalue())
+        offset = corrupt.index(b"E24,")
+        corrupt[offset + 1] = ord("9")
+        job = self.upload(bytes(corrupt), "corrupt.zip")
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertIn("CSV Parse Error", job.error)
+        self.assertFalse(UploadBatch.objects.exists())
+
+    def test_parallel_parse_matches_serial(self):
+        rows = equipment_rows(300) + [("Bad", "Pump", -1, 2, 50), ("E7", "Pump", 1, 1, 1)]
+        fields = ["equipment_name", "equipment_type", "flowrate", "pressure", "temperature"]
+
+        def ingested(content, workers):
+            batch = UploadBatch.objects.create(filename="data.csv", uploaded_by=self.user)
+            rejections = Rejections()
+            ingest.ingest_csv(batch.id, io.BytesIO(content), workers=workers, rejections=rejections)
+            return list(batch.equipment.order_by("id").values_list(*fields)), rejections.rows
+
+        with mock.patch.object(ingest, "PARALLEL_MIN_BYTES", 0), mock.patch.object(ingest, "PARALLEL_BLOCK_SIZE", 512):
+            for fmt, content in compressed(csv_bytes(rows)).items():
+                with self.subTest(fmt):
+                    serial = ingested(content, workers=1)
+                    self.assertEqual(ingested(content, workers=2), serial)
+                    self.assertEqual((len(serial[0]), serial[1]), (300, 2))
+
+
+class RowsTests(ApiTestCase):
+    def test_pages_cover_every_row_once(self):
+        batch = self.upload_batch(equipment_rows(23))
+        url = f"/api/rows/{batch.id}/"
+        names = []
+        params = {"page_size": 5}
+        pages = 0
+        while True:
+            page = self.client.get(url, params).json()
+            self.assertEqual(page["count"], 23)
+            names.extend(row["equipment_name"] for row in page["results"])
+            pages += 1
+            if page["next"] is None:
+                break
+            self.assertEqual(page["next"], page["results"][-1]["id"])
+            params["after"] = page["next"]
+        self.assertEqual(pages, 5)
+        self.assertEqual(names, [f"E{i}" for i in range(23)])
+
+    def test_page_size_is_capped(self):
+        batch = self.upload_batch(equipment_rows(10))
+        with mock.patch.object(views, "ROWS_MAX_PAGE_SIZE", 4):
+            page = self.client.get(f"/api/rows/{batch.id}/", {"page_size": 1000}).json()
+        self.assertEqual(len(page["results"]), 4)
+        self.assertIsNotNone(page["next"])
+
+    def test_fields(self):
+        batch = self.upload_batch(equipment_rows(3))
+        url = f"/api/rows/{batch.id}/"
+        page = self.client.get(url, {"fields": "flowrate,equipment_name"}).json()
+        self.assertEqual(list(page["results"][0]), ["id", "flowrate", "equipment_name"])
+
+        response = self.client.get(url, {"fields": "flowrate,colour"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Unknown fields: ['colour']", response.json()["error"])
+        self.assertEqual(self.client.get(url, {"page_size": "many"}).status_code, 400)
+
+
+    @skipIf(msgpack is None, "msgpack is not installed")
+    def test_msgpack_page_matches_json(self):
+        batch = self.upload_batch(equipment_rows(12) + [("Odd \u00e9", "Pump", 1.5, 2.25, 1e-05)])
+        url = f"/api/rows/{batch.id}/"
+        expected = self.client.get(url, {"page_size": 10, "after": 0}).json()
+        response = self.client.get(url, {"page_size": 10}, HTTP_ACCEPT="application/x-msgpack")
+        self.assertEqual(response["Content-Type"], "application/x-msgpack")
+        page = msgpack.unpackb(response.content, raw=False)
+        self.assertEqual((page["count"], page["next"]), (expected["count"], expected["next"]))
+
+        columns = {}
+        for field, column in page["results"].items():
+            if isinstance(column, list):
+                columns[field] = column
+            elif "labels" in column:
+                codes = np.frombuffer(column["codes"]["data"], dtype=column["codes"]["dtype"])
+                columns[field] = [column["labels"][code] for code in codes]
+            else:
+                columns[field] = np.frombuffer(column["data"], dtype=column["dtype"]).tolist()
+        self.assertEqual([dict(zip(columns, values)) for values in zip(*columns.values())], expected["results"])
+
+        last = self.client.get(url, {"after": page["next"]}, HTTP_ACCEPT="application/x-msgpack")
+        self.assertEqual(msgpack.unpackb(last.content, raw=False)["results"]["equipment_name"], ["E10", "E11", "Odd \u00e9"])
+
+
+class SeriesTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        rows = equipment_rows(300)
+        rows[77] = ("Low", "Pump", 0.5, 2, 50)
+        rows[123] = ("Spike", "Pump", 999, 2, 50)
+        self.batch = self.upload_batch(rows)
+        self.flowrate = [row[2] for row in rows]
+
+    def series(self, **params):
+        response = self.client.get(f"/api/series/{self.batch.id}/", {"metric": "flowrate", **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_lttb(self):
+        series = self.series(points=20)
+        self.assertEqual((series["points"], len(series["x"]), series["total"]), (20, 20, 300))
+        self.assertEqual((series["x"][0], series["x"][-1]), (0, 299))
+        self.assertEqual(series["x"], sorted(set(series["x"])))
+        self.assertEqual(series["y"], [self.flowrate[i] for i in series["x"]])
+        self.assertIn(123, series["x"])
+
+    def test_minmax_keeps_extremes(self):
+        series = self.series(points=20, method="minmax")
+        self.assertLessEqual(len(series["x"]), 20)
+        self.assertEqual(series["x"], sorted(set(series["x"])))
+        self.assertEqual(series["y"], [self.flowrate[i] for i in series["x"]])
+        self.assertIn(77, series["x"])
+        self.assertIn(123, series["x"])
+        self.assertEqual((min(series["y"]), max(series["y"])), (0.5, 999))
+
+    def test_short_series_and_bad_params(self):
+        self.assertEqual(self.series(points=1000)["x"], list(range(300)))
+        url = f"/api/series/{self.batch.id}/"
+        self.assertEqual(self.client.get(url, {"metric": "colour"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"method": "mean"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"points": "lots"}).status_code, 400)
+
+
+class BinningTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.rows = equipment_rows(70)
+        self.batch = self.upload_batch(self.rows)
+
+    def test_histogram(self):
+        data = self.client.get(f"/api/histogram/{self.batch.id}/", {"metric": "flowrate", "bins": 6}).json()
+        self.assertEqual((data["metric"], data["bins"], data["total"]), ("flowrate", 6, 70))
+        self.assertEqual(data["edges"], [10, 11, 12, 13, 14, 15, 16])
+        # The last bin includes its right edge.
+        self.assertEqual(data["counts"], [10, 10, 10, 10, 10, 20])
+
+        capped = self.client.get(f"/api/histogram/{self.batch.id}/", {"bins": 100000}).json()
+        self.assertEqual((capped["bins"], len(capped["counts"]), len(capped["edges"])), (200, 200, 201))
+        self.assertEqual(self.client.get(f"/api/histogram/{self.batch.id}/", {"metric": "colour"}).status_code, 400)
+
+    def test_density(self):
+        url = f"/api/density/{self.batch.id}/"
+        data = self.client.get(url, {"x": "flowrate", "y": "pressure", "bins": 2}).json()
+        self.assertEqual((data["x"], data["y"], data["bins"], data["total"]), ("flowrate", "pressure", 2, 70))
+        self.assertEqual((data["x_edges"], data["y_edges"]), ([10, 13, 16], [2, 4, 6]))
+
+        # counts[j][i]: x-bin i, y-bin j.
+        expected = [[0, 0], [0, 0]]
+        for _, _, flowrate, pressure, _ in self.rows:
+            expected[int(pressure >= 4)][int(flowrate >= 13)] += 1
+        self.assertEqual(data["counts"], expected)
+        self.assertEqual(data["max"], max(max(row) for row in expected))
+        self.assertEqual(self.client.get(url, {"y": "colour"}).status_code, 400)
+
+
+class AggregateTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        rows = [("P1", "Pump", 1, 2, 50), ("V1", "Valve", 10, 2, 50), ("P2", "Pump", 2, 2, 50),
+                ("P3", "Pump", 3, 2, 50), ("V2", "Valve", 20, 2, 50), ("P4", "Pump", 4, 2, 50)]
+        self.url = f"/api/aggregate/{self.upload_batch(rows).id}/"
+
+    def test_percentiles_by_type(self):
+        params = {"metrics": "flowrate", "functions": "count,mean,p50,p25,max", "group_by": "equipment_type"}
+        data = self.client.get(self.url, params).json()
+        self.assertEqual((data["group_by"], data["total"]), ("equipment_type", 6))
+        self.assertEqual(
+            [(group["key"], group["rows"], group["values"]["flowrate"]) for group in data["groups"]],
+            [
+                ("Pump", 4, {"count": 4, "mean": 2.5, "p50": 2.5, "p25": 1.75, "max": 4.0}),
+                ("Valve", 2, {"count": 2, "mean": 15.0, "p50": 15.0, "p25": 12.5, "max": 20.0}),
+            ],
+        )
+
+        data = self.client.get(self.url, {"metrics": "flowrate", "functions": "p50,p100"}).json()
+        self.assertEqual(data["groups"], [{"key": None, "rows": 6, "values": {"flowrate": {"p50": 3.5, "p100": 20.0}}}])
+
+    def test_rejects_bad_queries(self):
+        for params in [
+            {"metrics": "flowrate,colour"},
+            {"functions": "median"},
+            {"functions": "p101"},
+            {"functions": "p"},
+            {"functions": "pnan"},
+            {"group_by": "equipment_name"},
+        ]:
+            with self.subTest(params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.json())
+
+
+class CompareTests(ApiTestCase):
+    def test_added_removed_and_changed(self):
+        base = self.upload_batch([
+            ("A", "Pump", 10, 2, 50), ("B", "Valve", 20, 3, 60), ("C", "Pump", 30, 4, 70), ("D", "Valve", 5, 5, 5),
+        ], "base.csv")
+        other = self.upload_batch([
+            ("A", "Pump", 12, 2, 50), ("B", "Pump", 20, 3, 55), ("C", "Pump", 30, 4, 70), ("E", "Reactor", 1, 1, 1),
+        ], "other.csv")
+        url = f"/api/compare/{base.id}/{other.id}/"
+        data = self.client.get(url).json()
+
+        self.assertEqual(
+            (data["matched"], data["added"], data["removed"], data["type_changed"]), (3, 1, 1, 1)
+        )
+        self.assertEqual((data["added_names"], data["removed_names"]), (["E"], ["D"]))
+        self.assertEqual(data["metrics"]["flowrate"]["max_abs_delta"], 2.0)
+        self.assertEqual(data["metrics"]["flowrate"]["changed"], 1)
+        self.assertAlmostEqual(data["metrics"]["flowrate"]["mean_delta"], 2 / 3)
+        self.assertEqual((data["metrics"]["temperature"]["mean_delta"], data["metrics"]["pressure"]["changed"]), (-5 / 3, 0))
+        self.assertEqual(data["changes"], [
+            {"equipment_name": "A", "equipment_type": "Pump", "deltas": {"flowrate": 2.0, "pressure": 0.0, "temperature": 0.0}},
+        ])
+
+        by_type = {item["equipment_type"]: item for item in data["by_type"]}
+        self.assertEqual(list(by_type), ["Pump", "Reactor", "Valve"])
+        self.assertEqual((by_type["Pump"]["matched"], by_type["Pump"]["mean_delta"]["flowrate"]), (2, 1.0))
+        self.assertEqual((by_type["Reactor"]["added"], by_type["Reactor"]["mean_delta"]["flowrate"]), (1, None))
+        self.assertEqual((by_type["Valve"]["removed"], by_type["Valve"]["mean_delta"]["temperature"]), (1, -5.0))
+
+        changes = self.client.get(url, {"sort": "temperature"}).json()["changes"]
+        self.assertEqual([(item["equipment_name"], item["deltas"]["temperature"]) for item in changes], [("B", -5.0)])
+        self.assertEqual(self.client.get(url, {"sort": "colour"}).status_code, 400)
+
+
+class ResumableUploadTests(ApiTestCase):
+    CHUNK_SIZE = 64
+
+    def start(self, content, sha256=None):
+        data = {"filename": "big.csv", "size": len(content), "chunk_size": self.CHUNK_SIZE}
+        if sha256:
+            data["sha256"] = sha256
+        response = self.client.post("/api/uploads/", data, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()["upload_id"]
+
+    def put_chunk(self, upload_id, index, chunk, checksum=None):
+        return self.client.put(
+            f"/api/uploads/{upload_id}/chunks/{index}/",
+            data=chunk,
+            content_type="application/octet-stream",
+            HTTP_X_CHUNK_SHA256=checksum or hashlib.sha256(chunk).hexdigest(),
+        )
+
+    def complete(self, upload_id):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f"/api/uploads/{upload_id}/complete/")
+
+    def chunks(self, content):
+        return [content[i:i + self.CHUNK_SIZE] for i in range(0, len(content), self.CHUNK_SIZE)]
+
+    def test_chunks_in_any_order_complete_to_a_batch(self):
+        content = csv_bytes(equipment_rows(12))
+        upload_id = self.start(content, hashlib.sha256(content).hexdigest())
+        chunks = self.chunks(content)
+        for index in reversed(range(len(chunks))):
+            self.assertEqual(self.put_chunk(upload_id, index, chunks[index]).status_code, 200)
+        # A repeated chunk is harmless.
+        self.assertEqual(self.put_chunk(upload_id, 0, chunks[0]).status_code, 200)
+
+        response = self.complete(upload_id)
+        self.assertEqual(response.status_code, 202, response.content)
+        job = Job.objects.get(id=response.json()["job_id"])
+        self.assertEqual(job.status, Job.STATUS_DONE, job.error)
+        self.assertEqual(job.batch.equipment.count(), 12)
+        self.assertEqual(job.batch.content_sha256, hashlib.sha256(content).hexdigest())
+
+        # Finalize is idempotent.
+        self.assertEqual(self.complete(upload_id).json()["job_id"], job.id)
+
+    def test_missing_chunk(self):
+        content = csv_bytes(equipment_rows(12))
+        upload_id = self.start(content)
+        chunks = self.chunks(content)
+        self.put_chunk(upload_id, 0, chunks[0])
+        self.put_chunk(upload_id, 2, chunks[2])
+        response = self.complete(upload_id)
+        self.assertEqual(response.status_code, 400)
+        missing = [1, *range(3, len(chunks))]
+        self.assertEqual(response.json()["error"], f"Missing chunks: {missing}")
+
+    def test_size_limits(self):
+        data = {"filename": "big.csv", "size": 1000, "chunk_size": 10}
+        with mock.patch.object(views, "MAX_UPLOAD_SIZE", 999):
+            self.assertEqual(self.client.post("/api/uploads/", data, format="json").status_code, 413)
+        with mock.patch.object(views, "MAX_CHUNKS", 99):
+            response = self.client.post("/api/uploads/", data, format="json")
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("chunk_size is too small", response.json()["error"])
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_stale_sessions_are_removed(self):
+        content = csv_bytes(equipment_rows(12))
+        old = self.start(content)
+        self.put_chunk(old, 0, self.chunks(content)[0])
+        UploadSession.objects.filter(id=old).update(created_at=timezone.now() - timedelta(seconds=uploads.SESSION_MAX_AGE + 1))
+
+        # Starting an upload clears out abandoned ones.
+        new = self.start(content)
+        self.assertEqual(self.client.get(f"/api/uploads/{old}/").status_code, 404)
+        self.assertFalse((uploads.SESSION_DIR / old).exists())
+
+        self.put_chunk(new, 0, self.chunks(content)[0])
+        call_command("cleanup_uploads", max_age=0, stdout=io.StringIO())
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse((uploads.SESSION_DIR / new).exists())
+
+    def test_chunk_checksum_mismatch(self):
+        content = csv_bytes(equipment_rows(12))
+        upload_id = self.start(content)
+        response = self.put_chunk(upload_id, 0, self.chunks(content)[0], checksum="0" * 64)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Checksum mismatch", response.json()["error"])
+        status = self.client.get(f"/api/uploads/{upload_id}/").json()
+        self.assertEqual(status["received"], [])
+
+    def test_file_checksum_mismatch(self):
+        content = csv_bytes(equipment_rows(12))
+        upload_id = self.start(content, "0" * 64)
+        for index, chunk in enumerate(self.chunks(content)):
+            self.put_chunk(upload_id, index, chunk)
+        response = self.complete(upload_id)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Checksum mismatch", response.json()["error"])
+        self.assertFalse(UploadBatch.objects.exists())
+        self.assertFalse(Job.objects.exists())
+
+
+class DeduplicationTests(ApiTestCase):
+    def test_reupload_reuses_batch(self):
+        content = csv_bytes(equipment_rows(8))
+        first = self.upload(content, "first.csv")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/upload/", {"file": SimpleUploadedFile("copy.csv", content)}, format="multipart"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["duplicate"])
+        self.assertEqual(response.json()["batch_id"], first.batch_id)
+
+        job = Job.objects.get(id=response.json()["job_id"])
+        self.assertEqual((job.status, job.rows_processed), (Job.STATUS_DONE, 8))
+        self.assertEqual(UploadBatch.objects.count(), 1)
+        self.assertEqual(first.batch.equipment.count(), 8)
+
+    def test_resumable_upload_of_known_hash_skips_chunks(self):
+        content = csv_bytes(equipment_rows(8))
+        batch = self.upload_batch(equipment_rows(8))
+        response = self.client.post(
+            "/api/uploads/",
+            {"filename": "copy.csv", "size": len(content), "sha256": hashlib.sha256(content).hexdigest()},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["batch_id"], batch.id)
+
+    def test_other_users_do_not_share_batches(self):
+        content = csv_bytes(equipment_rows(8))
+        self.upload(content)
+        self.client.force_authenticate(User.objects.create_user("bob", password="secret"))
+        job = self.upload(content)
+        self.assertEqual(job.status, Job.STATUS_DONE)
+        self.assertEqual(UploadBatch.objects.count(), 2)
+
+
+class ReportDetailTests(ApiTestCase):
+    def listed_names(self, response):
+        self.assertEqual(response.status_code, 200)
+        content = pdf_content(b"".join(response.streaming_content))
+        return re.findall(rb"\((E\d+)\) Tj", content)
+
+    def test_rows_listed_per_detail_level(self):
+        batch = self.upload_batch(equipment_rows(90))
+        url = f"/api/report/{batch.id}/"
+        with mock.patch.object(reports, "TOP_PER_TYPE", 4), mock.patch.object(reports, "SAMPLE_ROWS", 30):
+            for detail, expected in [("summary", 0), ("top", 12), ("sample", 30), ("full", 90)]:
+                self.assertEqual(len(self.listed_names(self.client.get(url, {"detail": detail}))), expected, detail)
+
+    def test_report_job_honours_detail(self):
+        batch = self.upload_batch(equipment_rows(40))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/api/reports/{batch.id}/", {"detail": "summary"}, format="json")
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["job_id"]
+        self.assertEqual(Job.objects.get(id=job_id).detail, "summary")
+        self.assertEqual(self.listed_names(self.client.get(f"/api/jobs/{job_id}/report/")), [])
+
+    def test_report_job_reuses_only_live_jobs(self):
+        batch = self.upload_batch(equipment_rows(10))
+        url = f"/api/reports/{batch.id}/"
+        # Without captureOnCommitCallbacks the queued jobs never run.
+        first = self.client.post(url, {"detail": "summary"}, format="json").json()["job_id"]
+        self.assertEqual(self.client.post(url, {"detail": "summary"}, format="json").json()["job_id"], first)
+
+        stale = timezone.now() - timedelta(seconds=jobs.STALE_SECONDS + 1)
+        Job.objects.filter(id=first).update(status=Job.STATUS_RUNNING, updated_at=stale)
+        second = self.client.post(url, {"detail": "summary"}, format="json").json()["job_id"]
+        self.assertNotEqual(second, first)
+        self.assertEqual(Job.objects.get(id=first).status, Job.STATUS_FAILED)
+        self.assertEqual(Job.objects.get(id=second).status, Job.STATUS_PENDING)
+
+    def test_invalid_requests(self):
+        batch = self.upload_batch(equipment_rows(10))
+        url = f"/api/report/{batch.id}/"
+        self.assertEqual(self.client.get(url, {"detail": "everything"}).status_code, 400)
+        too_many = [{"type": "bar", "metric": "type_distribution"}] * (reports.MAX_CHARTS + 1)
+        self.assertEqual(self.client.post(url, {"chart_config": too_many}, format="json").status_code, 400)
+
+    def test_outliers_and_sample_by_type(self):
+        rows = equipment_rows(60, types=("Pump", "Valve")) + [("Spike", "Valve", 10000, 3, 55), ("Rare", "Reactor", 1, 1, 1)]
+        columns = load_columns(self.upload_batch(rows))
+
+        top = top_rows(columns, 2)
+        self.assertEqual(len(top), 5)
+        self.assertIn("Spike", columns.names_at(top))
+
+        sample = sample_rows(columns, 20, seed=1)
+        types = list(columns.equipment_types(sample))
+        self.assertEqual((types.count("Pump"), types.count("Valve"), types.count("Reactor")), (10, 10, 1))
+        self.assertEqual(list(sample), sorted(sample))
+        self.assertEqual(list(sample), list(sample_rows(columns, 20, seed=1)))
+
+
+class ChartRenderingTests(ApiTestCase):
+    def test_pool_returns_charts_in_order(self):
+        specs = [("bar", f"Chart {i}", None, {"labels": ["a", "b"], "values": [i + 1, 1]}) for i in range(4)]
+        if reports._chart_pool is not None:
+            reports._drop_chart_pool(reports._chart_pool)
+        with mock.patch.object(reports, "CHART_WORKERS", 2):
+            pooled = reports.draw_charts(specs)
+        self.assertIsNotNone(reports._chart_pool)
+        self.addCleanup(reports._drop_chart_pool, reports._chart_pool)
+        self.assertEqual(pooled, reports.draw_charts(specs, parallel=False))
+        self.assertEqual(len(set(pooled)), 4)
+
+    def test_identical_charts_are_drawn_once(self):
+        batch = self.upload_batch(equipment_rows(30))
+        chart = {"type": "bar", "metric": "type_distribution", "title": "Types"}
+        config = [chart, {"type": "line", "metric": "flowrate"}, dict(chart)]
+        with mock.patch.object(reports, "draw_charts", wraps=reports.draw_charts) as draw:
+            reports.render_pdf(batch, config, "2026-10-17", parallel=False, backend="matplotlib", detail="summary")
+        draw.assert_called_once()
+        self.assertEqual([spec[0] for spec in draw.call_args.args[0]], ["bar", "line"])
+
+    def test_vector_backend_draws_every_supported_type(self):
+        batch = self.upload_batch(equipment_rows(30))
+        config = [
+            {"type": "bar", "metric": "type_distribution"},
+            {"type": "bar", "metric": "flowrate"},
+            {"type": "line", "metric": "flowrate"},
+            {"type": "area", "metric": "pressure"},
+            {"type": "pie", "metric": "type_distribution"},
+            {"type": "doughnut", "metric": "type_distribution"},
+            {"type": "scatter", "metric": "flowrate_vs_pressure"},
+            {"type": "radar", "metric": "type_distribution"},
+            {"type": "polar", "metric": "type_distribution"},
+            {"type": "histogram", "metric": "temperature"},
+            {"type": "pie", "metric": "flowrate"},
+            {"type": "density", "metric": "flowrate_vs_pressure"},
+        ]
+        with (
+            mock.patch.object(vector_charts, "draw_chart", wraps=vector_charts.draw_chart) as vector,
+            mock.patch.object(reports, "draw_charts", wraps=reports.draw_charts) as raster,
+        ):
+            pdf = reports.render_pdf(batch, config, "2026-10-17", parallel=False, backend="vector", detail="summary")
+        self.assertTrue(pdf.startswith(b"%PDF"))
+        self.assertEqual({c.args[0] for c in vector.call_args_list}, vector_charts.CHART_TYPES)
+        self.assertEqual(vector.call_count, 11)
+        # Density grids are not supported as drawings and fall back to matplotlib.
+        raster.assert_called_once()
+        self.assertEqual([spec[0] for spec in raster.call_args.args[0]], ["density"])
+
+
+class RendererTests(TestCase):
+    def test_fast_json_matches_drf(self):
+        data = {
+            "rows": [
+                {"id": 1, "name": "Line\u2028break", "when": datetime(2026, 10, 17, 9, 30, tzinfo=dt_timezone.utc)},
+                {"id": 2, "name": "caf\u00e9", "value": Decimal("12.50"), "ratio": 0.1, "codes": (1, 2)},
+            ],
+            "count": 2,
+        }
+        fast = FastJSONRenderer().render(data)
+        drf = JSONRenderer().render(data)
+        self.assertEqual(json.loads(fast), json.loads(drf))
+        self.assertIn(b"\\u2028", fast)
+        self.assertIn(b'"2026-10-17T09:30:00Z"', fast)
 
-# Create your tests here.
+    def test_non_finite_floats_become_null(self):
+        data = {"mean": float("nan"), "values": [1.0, float("inf"), np.float64("-inf")]}
+        expected = {"mean": None, "values": [1.0, None, None]}
+        self.assertEqual(json.loads(FastJSONRenderer().render(data)), expected)
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(json.loads(FastJSONRenderer().render(data)), expected)
@@ -0,0 +1,164 @@
+"""On-disk storage for resumable chunked uploads.
+
+Each ``UploadSession`` owns a directory holding one ``<index>.part`` file
+per received chunk. The directory listing is the source of truth for what
+has arrived, so concurrent or repeated PUTs of a chunk never race on a
+database row. Finalizing concatenates the parts into the ingest spool.
+Sessions older than ``UPLOAD_SESSION_MAX_AGE`` are removed with their parts
+by ``discard_stale_sessions``.
+"""
+import hashlib
+import os
+import shutil
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import UploadSession
+
+SESSION_DIR = Path(getattr(settings, "UPLOAD_SESSION_DIR", Path(settings.BASE_DIR) / "var" / "uploads"))
+DEFAULT_CHUNK_SIZE = getattr(settings, "UPLOAD_CHUNK_SIZE", 4 * 1024 * 1024)
+MAX_CHUNK_SIZE = getattr(settings, "UPLOAD_MAX_CHUNK_SIZE", 32 * 1024 * 1024)
+MAX_UPLOAD_SIZE = getattr(settings, "UPLOAD_MAX_SIZE", 2 * 1024 * 1024 * 1024)
+MAX_CHUNKS = getattr(settings, "UPLOAD_MAX_CHUNKS", 10000)
+SESSION_MAX_AGE = getattr(settings, "UPLOAD_SESSION_MAX_AGE", 24 * 60 * 60)
+
+READ_SIZE = 64 * 1024
+
+
+class ChunkError(Exception):
+    """Raised when a chunk or a finalize request does not match the session."""
+
+
+def session_dir(session):
+    return SESSION_DIR / str(session.id)
+
+
+def _part_path(session, index):
+    return session_dir(session) / f"{index}.part"
+
+
+def expected_size(session, index):
+    if index == session.chunk_count - 1:
+        return session.total_size - index * session.chunk_size
+    return session.chunk_size
+
+
+def received_chunks(session):
+    """Return the sorted indexes of chunks stored for ``session``."""
+    try:
+        names = os.listdir(session_dir(session))
+    except FileNotFoundError:
+        return []
+    return sorted(int(name[:-5]) for name in names if name.endswith(".part"))
+
+
+def contiguous_offset(session, received):
+    """Byte offset up to which every chunk has been received."""
+    index = 0
+    for index, chunk in enumerate(received):
+        if chunk != index:
+            break
+    else:
+        index = len(received)
+    return min(index * session.chunk_size, session.total_size)
+
+
+def missing_chunks(session, received, limit=20):
+    """The first ``limit`` chunk indexes absent from the sorted ``received`` list."""
+    missing = []
+    expected = 0
+    for index in [*received, session.chunk_count]:
+        while expected < index and len(missing) < limit:
+            missing.append(expected)
+            expected += 1
+        if len(missing) == limit:
+            break
+        expected = index + 1
+    return missing
+
+
+def write_chunk(session, index, stream, checksum):
+    """Store chunk ``index`` read from ``stream`` if it matches ``checksum``.
+
+    ``checksum`` is the hex SHA-256 of the chunk. The part is written to a
+    temporary name and renamed, so a dropped connection never leaves a
+    truncated chunk that looks complete.
+    """
+    if not 0 <= index < session.chunk_count:
+        raise ChunkError(f"Chunk index must be between 0 and {session.chunk_count - 1}")
+    expected = expected_size(session, index)
+
+    directory = session_dir(session)
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp_path = directory / f"{index}.{uuid.uuid4().hex}.tmp"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, "wb") as out:
+            while True:
+                block = stream.read(READ_SIZE)
+                if not block:
+                    break
+                size += len(block)
+                if size > expected:
+                    raise ChunkError(f"Chunk {index} is larger than {expected} bytes")
+                digest.update(block)
+                out.write(block)
+        if size != expected:
+            raise ChunkError(f"Chunk {index} has {size} bytes, expected {expected}")
+        if checksum and digest.hexdigest() != checksum.lower():
+            raise ChunkError(f"Checksum mismatch for chunk {index}")
+        os.replace(tmp_path, _part_path(session, index))
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return size
+
+
+def assemble(session, dest):
+    """Concatenate every chunk of ``session`` into ``dest``.
+
+    Verifies the whole-file SHA-256 when the client supplied one at
+    initiate time, and returns the hex digest of the assembled file.
+    """
+    missing = missing_chunks(session, received_chunks(session))
+    if missing:
+        raise ChunkError(f"Missing chunks: {missing}")
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    with open(dest, "wb") as out:
+        for index in range(session.chunk_count):
+            with open(_part_path(session, index), "rb") as part:
+                while True:
+                    block = part.read(READ_SIZE)
+                    if not block:
+                        break
+                    digest.update(block)
+                    out.write(block)
+
+    if session.checksum and digest.hexdigest() != session.checksum.lower():
+        dest.unlink()
+        raise ChunkError("Checksum mismatch for assembled file")
+    return digest.hexdigest()
+
+
+def discard(session):
+    shutil.rmtree(session_dir(session), ignore_errors=True)
+
+
+def discard_stale_sessions(max_age=None):
+    """Delete upload sessions older than ``max_age`` seconds and their parts.
+
+    Returns the number of sessions removed.
+    """
+    cutoff = timezone.now() - timedelta(seconds=SESSION_MAX_AGE if max_age is None else max_age)
+    stale = list(UploadSession.objects.filter(created_at__lt=cutoff))
+    for session in stale:
+        discard(session)
+    UploadSession.objects.filter(id__in=[session.id for session in stale]).delete()
+    return len(stale)
@@ -1,5 +1,26 @@
 from django.urls import path
-from .views import FileUploadView, DashboardStatsView, HistoryView, GeneratePDFView
+from .views import (
+    FileUploadView,
+    DashboardStatsView,
+    EquipmentRowsView,
+    EquipmentRowsStreamView,
+    HistoryView,
+    GeneratePDFView,
+    JobStatusView,
+    JobReportView,
+    ReportJobView,
+    RejectionReportView,
+    SeriesView,
+    HistogramView,
+    DensityView,
+    AggregateView,
+    CompareView,
+    CacheStatsView,
+    ResumableUploadView,
+    ResumableUploadDetailView,
+    ResumableUploadCompleteView,
+    UploadChunkView,
+)
 from .auth_views import RegisterView, LoginView, LogoutView, UserProfileView
 
 urlpatterns = [
@@ -11,7 +32,23 @@ urlpatterns = [
     
     # Data endpoints
     path('upload/', FileUploadView.as_view(), name='upload'),
+    path('uploads/', ResumableUploadView.as_view(), name='upload-session'),
+    path('uploads/<uuid:upload_id>/', ResumableUploadDetailView.as_view(), name='upload-session-detail'),
+    path('uploads/<uuid:upload_id>/chunks/<int:index>/', UploadChunkView.as_view(), name='upload-chunk'),
+    path('uploads/<uuid:upload_id>/complete/', ResumableUploadCompleteView.as_view(), name='upload-complete'),
     path('history/', HistoryView.as_view(), name='history'),
     path('summary/<int:batch_id>/', DashboardStatsView.as_view(), name='summary'),
+    path('rows/<int:batch_id>/', EquipmentRowsView.as_view(), name='rows'),
+    path('rows/<int:batch_id>/all/', EquipmentRowsStreamView.as_view(), name='rows-all'),
+    path('series/<int:batch_id>/', SeriesView.as_view(), name='series'),
+    path('histogram/<int:batch_id>/', HistogramView.as_view(), name='histogram'),
+    path('density/<int:batch_id>/', DensityView.as_view(), name='density'),
+    path('aggregate/<int:batch_id>/', AggregateView.as_view(), name='aggregate'),
+    path('compare/<int:batch_id>/<int:other_id>/', CompareView.as_view(), name='compare'),
     path('report/<int:batch_id>/', GeneratePDFView.as_view(), name='report'),
+    path('reports/<int:batch_id>/', ReportJobView.as_view(), name='report-jobs'),
+    path('rejections/<int:batch_id>/', RejectionReportView.as_view(), name='rejections'),
+    path('jobs/<int:job_id>/', JobStatusView.as_view(), name='job-status'),
+    path('jobs/<int:job_id>/report/', JobReportView.as_view(), name='job-report'),
+    path('cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
 ]
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""Row-level validation for ingest chunks.
+
+Checks run over whole columns at once and produce ``(rows, header, reason)``
+problems instead of raising, so one upload reports every bad row. Rows with
+any problem are dropped and the rest of the file is accepted. The first
+``INGEST_MAX_REJECTIONS`` problems are kept per batch as ``RowRejection``
+rows; beyond that only the counts per reason are stored.
+
+Row numbers are 1-based data rows, not counting the header line.
+"""
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from .models import EquipmentData, RowRejection
+
+MISSING = "missing value"
+INVALID = "invalid value"
+OUT_OF_RANGE = "out of range"
+UNKNOWN_TYPE = "unknown type"
+DUPLICATE_NAME = "duplicate name"
+
+# field -> (low, high), inclusive; None leaves that side open
+VALUE_RANGES = getattr(settings, "INGEST_VALUE_RANGES", {
+    "flowrate": (0, None),
+    "pressure": (0, None),
+    "temperature": (-273.15, None),
+})
+# None accepts any equipment type
+KNOWN_TYPES = getattr(settings, "INGEST_KNOWN_TYPES", None)
+MAX_REJECTIONS = getattr(settings, "INGEST_MAX_REJECTIONS", 1000)
+# Names per query when looking up names already inserted for a batch
+NAME_LOOKUP_BATCH_SIZE = 500
+
+
+def check_values(columns):
+    """Return ``(mask, field, reason)`` for range and type violations in ``columns``.
+
+    Blank and NaN cells are left to the missing/invalid checks in ``coerce_columns``.
+    """
+    problems = []
+    for field, (low, high) in VALUE_RANGES.items():
+        values = columns[field]
+        bad = np.zeros(len(values), dtype=bool)
+        if low is not None:
+            bad |= values < low
+        if high is not None:
+            bad |= values > high
+        if bad.any():
+            problems.append((bad, field, OUT_OF_RANGE))
+
+    if KNOWN_TYPES is not None:
+        types = pd.Series(columns["equipment_type"])
+        bad = (~types.isin(KNOWN_TYPES) & (types != "")).to_numpy()
+        if bad.any():
+            problems.append((bad, "equipment_type", UNKNOWN_TYPE))
+    return problems
+
+
+class DuplicateNames:
+    """Flag equipment names already accepted earlier in the same upload.
+
+    Repeats within a chunk are found in memory. Names from earlier chunks
+    are looked up among the rows already inserted for the batch, through
+    the ``(batch, equipment_name)`` index, so memory depends on the chunk
+    size and not on the size of the upload. ``check`` must see each chunk
+    before it is inserted.
+    """
+
+    def __init__(self, batch_id):
+        self.batch_id = batch_id
+
+    def _inserted(self, names):
+        found = set()
+        for start in range(0, len(names), NAME_LOOKUP_BATCH_SIZE):
+            found.update(
+                EquipmentData.objects.filter(
+                    batch_id=self.batch_id, equipment_name__in=names[start:start + NAME_LOOKUP_BATCH_SIZE]
+                ).values_list("equipment_name", flat=True)
+            )
+        return found
+
+    def check(self, names, candidates):
+        """Return a mask of duplicates among rows where ``candidates`` is True.
+
+        The first occurrence of a name is kept; later ones are flagged.
+        """
+        series = pd.Series(names)[candidates]
+        duplicate = np.zeros(len(candidates), dtype=bool)
+        duplicate[candidates] = (
+            series.duplicated().to_numpy() | series.isin(self._inserted(series.unique().tolist())).to_numpy()
+        )
+        return duplicate
+
+
+class Rejections:
+    """Collect the problems of one upload and store them for its batch."""
+
+    def __init__(self, limit=None):
+        self.limit = MAX_REJECTIONS if limit is None else limit
+        self.rows = 0
+        self.counts = {}
+        self.items = []
+
+    def add(self, problems, row_offset, rejected_rows):
+        """Record ``(rows, header, reason)`` problems of a chunk.
+
+        ``rows`` are 0-based within the chunk, ``row_offset`` is the number
+        of data rows before it and ``rejected_rows`` the number of distinct
+        rows dropped from it.
+        """
+        self.rows += rejected_rows
+        items = []
+        for rows, header, reason in problems:
+            self.counts[reason] = self.counts.get(reason, 0) + len(rows)
+            if len(self.items) < self.limit:
+                items.extend((int(row) + row_offset + 1, header, reason) for row in rows[:self.limit])
+        items.sort()
+        self.items.extend(items[:self.limit - len(self.items)])
+
+    @property
+    def truncated(self):
+        return sum(self.counts.values()) > len(self.items)
+
+    def describe(self, limit=3):
+        text = "; ".join(f"Row {row}: {reason} in '{header}'" for row, header, reason in self.items[:limit])
+        if sum(self.counts.values()) > limit:
+            text += " ..."
+        return text
+
+    def save(self, batch_id):
+        RowRejection.objects.filter(batch_id=batch_id).delete()
+        RowRejection.objects.bulk_create(
+            RowRejection(batch_id=batch_id, row=row, column=header, reason=reason)
+            for row, header, reason in self.items
+        )
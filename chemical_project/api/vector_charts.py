@@ -0,0 +1,183 @@
+"""Report charts as native ReportLab drawings.
+
+``draw_chart`` takes the same ``(chart_type, title, color, data)`` as
+``charts.draw_chart`` but returns a ``Drawing``, which platypus places in
+the PDF as vector paths: no rasterizing, crisp at any zoom, and a few KB
+per chart instead of a PNG. ``supports`` says which charts can be drawn
+this way; the others (density grids) stay with the matplotlib backend.
+"""
+import math
+
+import numpy as np
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.doughnut import Doughnut
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.charts.spider import SpiderChart
+from reportlab.graphics.shapes import Circle, Drawing, String, Wedge
+from reportlab.graphics.widgets.markers import makeMarker
+from reportlab.lib import colors
+
+WIDTH = 240
+HEIGHT = 160
+CHART_TYPES = {"bar", "line", "area", "pie", "doughnut", "scatter", "radar", "polar", "histogram", "error"}
+# matplotlib's default colour cycle, so both backends colour slices alike.
+PALETTE = [
+    "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+    "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf",
+]
+TEXT = colors.HexColor("#0f172a")
+FONT = "Helvetica"
+
+
+def supports(chart_type, data):
+    return chart_type in CHART_TYPES
+
+
+def _color(value, default, alpha=None):
+    try:
+        color = colors.toColor(value) if value not in (None, "multi") else colors.HexColor(default)
+    except ValueError:
+        color = colors.HexColor(default)
+    if alpha is not None:
+        color = colors.Color(color.red, color.green, color.blue, alpha=alpha)
+    return color
+
+
+def _slice_colors(color, count):
+    if color in (None, "multi"):
+        return [colors.HexColor(PALETTE[i % len(PALETTE)]) for i in range(count)]
+    return [_color(color, PALETTE[0])] * count
+
+
+def _drawing(title):
+    drawing = Drawing(WIDTH, HEIGHT)
+    drawing.add(String(WIDTH / 2, HEIGHT - 12, title, fontName=FONT, fontSize=8, fillColor=TEXT, textAnchor="middle"))
+    return drawing
+
+
+def _style_axes(plot):
+    for axis in (plot.xValueAxis, plot.yValueAxis):
+        axis.labels.fontName = FONT
+        axis.labels.fontSize = 6
+        axis.strokeWidth = 0.5
+        axis.visibleGrid = False
+    plot.xValueAxis.labelTextFormat = "%g"
+    plot.yValueAxis.labelTextFormat = "%g"
+
+
+def _line_plot(points, stroke, fill=None, markers=False):
+    plot = LinePlot()
+    plot.x, plot.y, plot.width, plot.height = 32, 20, WIDTH - 44, HEIGHT - 42
+    plot.data = [points]
+    line = plot.lines[0]
+    line.strokeColor = None if markers else stroke
+    line.strokeWidth = 1.2
+    if fill is not None:
+        line.inFill = True
+        line.fillColor = fill
+    if markers:
+        plot.joinedLines = False
+        line.symbol = makeMarker("Circle", size=2.5, fillColor=stroke, strokeColor=None)
+    _style_axes(plot)
+    return plot
+
+
+def _finite(values):
+    return np.nan_to_num(np.asarray(values, dtype=float)).tolist()
+
+
+def draw_chart(chart_type, title, color, data):
+    """A ``Drawing`` of one chart; ``supports(chart_type, data)`` must hold."""
+    if chart_type == "error":
+        drawing = Drawing(WIDTH, HEIGHT)
+        drawing.add(String(WIDTH / 2, HEIGHT / 2, data["message"], fontName=FONT, fontSize=9,
+                           fillColor=TEXT, textAnchor="middle"))
+        return drawing
+
+    drawing = _drawing(title)
+    labels = [str(label) for label in data.get("labels") or []]
+    values = _finite(data["values"]) if "values" in data else []
+
+    if chart_type == "bar":
+        chart = VerticalBarChart()
+        chart.x, chart.y, chart.width, chart.height = 32, 30, WIDTH - 44, HEIGHT - 52
+        chart.data = [values or [0]]
+        chart.categoryAxis.categoryNames = labels or [""]
+        chart.categoryAxis.labels.fontName = FONT
+        chart.categoryAxis.labels.fontSize = 6
+        chart.categoryAxis.labels.angle = 30
+        chart.categoryAxis.labels.boxAnchor = "ne"
+        chart.categoryAxis.labels.dy = -2
+        chart.valueAxis.labels.fontName = FONT
+        chart.valueAxis.labels.fontSize = 6
+        chart.valueAxis.labelTextFormat = "%g"
+        chart.valueAxis.valueMin = min(0, *values) if values else 0
+        chart.bars[0].fillColor = _color(color, "#3b82f6", alpha=0.85)
+        chart.bars[0].strokeColor = None
+        drawing.add(chart)
+    elif chart_type in ["line", "area"]:
+        fill = _color(color, "#93c5fd", alpha=0.4) if chart_type == "area" else None
+        drawing.add(_line_plot(list(zip(_finite(data["x"]), _finite(data["y"]))), _color(color, "#3b82f6"), fill))
+    elif chart_type == "scatter":
+        points = list(zip(_finite(data["x"]), _finite(data["y"])))
+        drawing.add(_line_plot(points, _color(color, "#10b981", alpha=0.7), markers=True))
+    elif chart_type == "histogram":
+        edges, counts = _finite(data["edges"]), _finite(data["counts"])
+        steps = [(edges[0], 0)]
+        for left, right, count in zip(edges, edges[1:], counts):
+            steps += [(left, count), (right, count)]
+        steps.append((edges[-1], 0))
+        plot = _line_plot(steps, _color(color, "#3b82f6"), _color(color, "#3b82f6", alpha=0.85))
+        plot.yValueAxis.valueMin = 0
+        drawing.add(plot)
+    elif chart_type in ["pie", "doughnut"]:
+        chart = Doughnut() if chart_type == "doughnut" else Pie()
+        size = HEIGHT - 50
+        chart.x, chart.y, chart.width, chart.height = (WIDTH - size) / 2, 16, size, size
+        total = sum(values) or 1
+        chart.data = values
+        chart.labels = [f"{label} {value / total:.0%}" for label, value in zip(labels, values)]
+        chart.slices.fontName = FONT
+        chart.slices.fontSize = 6
+        # Counter-clockwise from 3 o'clock, as matplotlib draws them.
+        chart.startAngle = 0
+        chart.direction = "anticlockwise"
+        chart.slices.strokeColor = colors.white
+        chart.slices.strokeWidth = 0.5
+        if chart_type == "doughnut":
+            chart.innerRadiusFraction = 0.55
+        for i, fill in enumerate(_slice_colors(color, len(values))):
+            chart.slices[i].fillColor = fill
+        drawing.add(chart)
+    elif chart_type == "radar":
+        chart = SpiderChart()
+        size = HEIGHT - 50
+        chart.x, chart.y, chart.width, chart.height = (WIDTH - size) / 2, 16, size, size
+        chart.data = [values]
+        chart.labels = labels
+        chart.spokeLabels.fontName = FONT
+        chart.spokeLabels.fontSize = 6
+        chart.strands[0].strokeColor = _color(color, "#3b82f6")
+        chart.strands[0].fillColor = _color(color, "#93c5fd", alpha=0.3)
+        chart.strands[0].strokeWidth = 1.5
+        drawing.add(chart)
+    elif chart_type == "polar":
+        # Equal-angle wedges with radius proportional to the value, like
+        # matplotlib's polar bars (0.6 rad wide, starting at 3 o'clock).
+        cx, cy, radius = WIDTH / 2, (HEIGHT - 16) / 2, (HEIGHT - 50) / 2
+        peak = max(values) if values and max(values) > 0 else 1
+        fill = _color(color, "#3b82f6", alpha=0.8)
+        half = math.degrees(0.6) / 2
+        for fraction in (0.5, 1.0):
+            drawing.add(Circle(cx, cy, radius * fraction, fillColor=None, strokeColor=colors.HexColor("#cbd5e1"),
+                               strokeWidth=0.4))
+        for i, (label, value) in enumerate(zip(labels, values)):
+            angle = 360 * i / len(values)
+            if value > 0:
+                drawing.add(Wedge(cx, cy, radius * value / peak, angle - half, angle + half, fillColor=fill,
+                                  strokeColor=None))
+            rad = math.radians(angle)
+            drawing.add(String(cx + (radius + 8) * math.cos(rad), cy + (radius + 8) * math.sin(rad) - 2, label,
+                               fontName=FONT, fontSize=6, fillColor=TEXT, textAnchor="middle"))
+    return drawing
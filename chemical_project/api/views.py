@@ -1,25 +1,67 @@
 import io
-import pandas as pd
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import numpy as np
+import math
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
-from django.db.models import Avg, Count
-from django.http import FileResponse
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from django.http import FileResponse, StreamingHttpResponse
 from django.utils import timezone
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-
-from .models import UploadBatch, EquipmentData
-from .serializers import UploadBatchSerializer, EquipmentDataSerializer
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from .aggregate import AggregateError, batch_aggregate, parse_query
+from .binning import (
+    DEFAULT_BINS,
+    DEFAULT_GRID_BINS,
+    MAX_BINS,
+    MAX_GRID_BINS,
+    batch_density,
+    batch_histogram,
+)
+from .columnar import NUMERIC_COLUMNS
+from .cache import cache_stats, get_or_compute
+from .compare import DEFAULT_LIMIT as COMPARE_DEFAULT_LIMIT, MAX_LIMIT as COMPARE_MAX_LIMIT, batch_compare
+from .conditional import history_etag, report_chart_config, report_detail, report_etag, summary_etag
+from .downsample import (
+    DEFAULT_POINTS as DEFAULT_SERIES_POINTS,
+    MAX_POINTS as MAX_SERIES_POINTS,
+    METHODS as DOWNSAMPLE_METHODS,
+    batch_series,
+)
+from .jobs import complete_as_duplicate, enqueue, find_duplicate, find_running_report, spool_path, spool_upload
+from .models import UploadBatch, Job, UploadSession
+from .reports import MAX_CHARTS as REPORT_MAX_CHARTS, normalize_chart_config, report_path, stored_report
+from .selection import DETAIL_LEVELS
+from .streaming import stream_rows
+from .summary import load_summary
+from .uploads import (
+    DEFAULT_CHUNK_SIZE,
+    MAX_CHUNK_SIZE,
+    MAX_CHUNKS,
+    MAX_UPLOAD_SIZE,
+    ChunkError,
+    assemble,
+    contiguous_offset,
+    discard,
+    discard_stale_sessions,
+    received_chunks,
+    write_chunk,
+)
+from .renderers import columnar_rows, row_renderers
+from .serializers import (
+    UploadBatchSerializer,
+    JobSerializer,
+    BatchSummarySerializer,
+    RowRejectionSerializer,
+    equipment_rows,
+)
+
+
+ROWS_PAGE_SIZE = 100
+ROWS_MAX_PAGE_SIZE = 1000
+ROWS_MAX_COLUMNAR_PAGE_SIZE = 100000
+ROW_FIELDS = ["id", "equipment_name", "equipment_type", "flowrate", "pressure", "temperature"]
 
 
 class FileUploadView(APIView):
@@ -30,41 +72,179 @@ class FileUploadView(APIView):
         if not file_obj:
             return Response({"error": "No file provided"}, status=400)
 
+        job = Job.objects.create(
+            kind=Job.KIND_INGEST,
+            created_by=request.user,
+            filename=file_obj.name,
+            bytes_total=file_obj.size,
+        )
+        digest = spool_upload(job, file_obj)
+        return start_ingest(job, digest)
+
+
+def start_ingest(job, digest):
+    """Enqueue ``job`` unless its content duplicates one of the user's batches."""
+    duplicate = find_duplicate(job.created_by, digest)
+    if duplicate:
+        complete_as_duplicate(job, duplicate)
+        return duplicate_response(job, duplicate)
+
+    job.content_sha256 = digest
+    job.save(update_fields=["content_sha256"])
+    enqueue(job)
+    return Response(
+        {"message": "Upload accepted", "job_id": job.id, "status": job.status},
+        status=202,
+    )
+
+
+def duplicate_response(job, batch):
+    return Response(
+        {
+            "message": "Duplicate upload",
+            "job_id": job.id,
+            "status": Job.STATUS_DONE,
+            "batch_id": batch.id,
+            "duplicate": True,
+        },
+        status=200,
+    )
+
+
+def upload_session_payload(session):
+    received = received_chunks(session)
+    return {
+        "upload_id": str(session.id),
+        "filename": session.filename,
+        "size": session.total_size,
+        "chunk_size": session.chunk_size,
+        "chunk_count": session.chunk_count,
+        "received": received,
+        "offset": contiguous_offset(session, received),
+        "job_id": session.job_id,
+    }
+
+
+class ResumableUploadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        filename = request.data.get("filename")
         try:
-            df = pd.read_csv(file_obj)
-            required_columns = ["Equipment Name", "Type", "Flowrate", "Pressure", "Temperature"]
-            if not all(col in df.columns for col in required_columns):
-                return Response({"error": f"Missing columns. Required: {required_columns}"}, status=400)
-        except Exception as e:
-            return Response({"error": f"CSV Parse Error: {str(e)}"}, status=400)
+            total_size = int(request.data.get("size"))
+            chunk_size = int(request.data.get("chunk_size") or DEFAULT_CHUNK_SIZE)
+        except (TypeError, ValueError):
+            return Response({"error": "size and chunk_size must be integers"}, status=400)
+        if not filename or total_size <= 0:
+            return Response({"error": "filename and a positive size are required"}, status=400)
+        if total_size > MAX_UPLOAD_SIZE:
+            return Response({"error": f"Uploads are limited to {MAX_UPLOAD_SIZE} bytes"}, status=413)
+        if not 0 < chunk_size <= MAX_CHUNK_SIZE:
+            return Response({"error": f"chunk_size must be between 1 and {MAX_CHUNK_SIZE}"}, status=400)
+        if math.ceil(total_size / chunk_size) > MAX_CHUNKS:
+            return Response({"error": f"chunk_size is too small: at most {MAX_CHUNKS} chunks are allowed"}, status=400)
+        checksum = str(request.data.get("sha256") or "").lower()
+
+        # A known hash lets the client skip sending any chunks at all.
+        duplicate = find_duplicate(request.user, checksum)
+        if duplicate:
+            job = Job.objects.create(
+                kind=Job.KIND_INGEST,
+                created_by=request.user,
+                filename=filename,
+                bytes_total=total_size,
+            )
+            complete_as_duplicate(job, duplicate)
+            return duplicate_response(job, duplicate)
 
-        batches = UploadBatch.objects.filter(uploaded_by=request.user).order_by("uploaded_at")
-        if batches.count() >= 5:
-            batches.first().delete()
+        discard_stale_sessions()
+        session = UploadSession.objects.create(
+            created_by=request.user,
+            filename=filename,
+            total_size=total_size,
+            chunk_size=chunk_size,
+            checksum=checksum,
+        )
+        return Response(upload_session_payload(session), status=201)
 
-        batch = UploadBatch.objects.create(filename=file_obj.name, uploaded_by=request.user)
 
-        equipment_list = [
-            EquipmentData(
-                batch=batch,
-                equipment_name=row["Equipment Name"],
-                equipment_type=row["Type"],
-                flowrate=row["Flowrate"],
-                pressure=row["Pressure"],
-                temperature=row["Temperature"],
-            )
-            for _, row in df.iterrows()
-        ]
-        EquipmentData.objects.bulk_create(equipment_list)
+class ResumableUploadDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, upload_id):
+        try:
+            session = UploadSession.objects.get(id=upload_id, created_by=request.user)
+            return Response(upload_session_payload(session))
+        except UploadSession.DoesNotExist:
+            return Response({"error": "Upload not found"}, status=404)
+
+    def delete(self, request, upload_id):
+        try:
+            session = UploadSession.objects.get(id=upload_id, created_by=request.user)
+            discard(session)
+            session.delete()
+            return Response({"message": "Upload discarded"}, status=204)
+        except UploadSession.DoesNotExist:
+            return Response({"error": "Upload not found"}, status=404)
+
+
+class UploadChunkView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, upload_id, index):
+        try:
+            session = UploadSession.objects.get(id=upload_id, created_by=request.user)
+        except UploadSession.DoesNotExist:
+            return Response({"error": "Upload not found"}, status=404)
+        if session.job_id:
+            return Response({"error": "Upload already finalized"}, status=409)
+
+        # Read the raw body as a stream; request.body would buffer the whole
+        # chunk and is capped by DATA_UPLOAD_MAX_MEMORY_SIZE.
+        stream = request.stream or io.BytesIO()
+        try:
+            size = write_chunk(session, index, stream, request.headers.get("X-Chunk-SHA256"))
+        except ChunkError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response({"index": index, "size": size})
 
-        return Response({"message": "Success", "batch_id": batch.id}, status=201)
+
+class ResumableUploadCompleteView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, upload_id):
+        try:
+            session = UploadSession.objects.select_related("job").get(id=upload_id, created_by=request.user)
+        except UploadSession.DoesNotExist:
+            return Response({"error": "Upload not found"}, status=404)
+        if session.job:
+            # Finalize is idempotent so a client can retry after a dropped response.
+            return Response({"message": "Upload accepted", "job_id": session.job.id, "status": session.job.status}, status=202)
+
+        job = Job.objects.create(
+            kind=Job.KIND_INGEST,
+            created_by=request.user,
+            filename=session.filename,
+            bytes_total=session.total_size,
+        )
+        try:
+            digest = assemble(session, spool_path(job.id))
+        except ChunkError as e:
+            job.delete()
+            return Response({"error": str(e)}, status=400)
+
+        session.job = job
+        session.save(update_fields=["job"])
+        discard(session)
+        return start_ingest(job, digest)
 
 
 class HistoryView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @method_decorator(condition(etag_func=history_etag))
     def get(self, request):
-        batches = UploadBatch.objects.filter(uploaded_by=request.user).order_by("-uploaded_at")
+        batches = UploadBatch.objects.filter(uploaded_by=request.user, is_complete=True).order_by("-uploaded_at")
         serializer = UploadBatchSerializer(batches, many=True)
         return Response(serializer.data)
 
@@ -72,357 +252,413 @@ class HistoryView(APIView):
 class DashboardStatsView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @method_decorator(condition(etag_func=summary_etag))
     def get(self, request, batch_id):
+        try:
+            batch = UploadBatch.objects.select_related("summary").get(
+                id=batch_id, uploaded_by=request.user, is_complete=True
+            )
+        except UploadBatch.DoesNotExist:
+            return Response({"error": "Batch not found"}, status=404)
+        summary = load_summary(batch)
+        # recompute_summaries runs in another process, so its invalidation
+        # never reaches this process's LRU; key the entry by the summary's
+        # version instead.
+        params = {"computed_at": summary.computed_at.isoformat()}
+        return Response(get_or_compute(batch, "summary", params, lambda: self.summary_payload(batch, summary)))
+
+    def summary_payload(self, batch, summary):
+        stats = {
+            "avg_flow": summary.metrics["flowrate"]["mean"],
+            "avg_press": summary.metrics["pressure"]["mean"],
+            "total_count": summary.row_count,
+        }
+        return {
+            "id": batch.id,
+            "filename": batch.filename,
+            "summary": stats,
+            "statistics": BatchSummarySerializer(summary).data,
+            "type_distribution": summary.type_distribution,
+        }
+
+    def delete(self, request, batch_id):
         try:
             batch = UploadBatch.objects.get(id=batch_id, uploaded_by=request.user)
-            data = batch.equipment.all()
+            batch.delete()
+            return Response({"message": "Batch deleted"}, status=204)
+        except UploadBatch.DoesNotExist:
+            return Response({"error": "Batch not found"}, status=404)
 
-            stats = data.aggregate(
-                avg_flow=Avg("flowrate"),
-                avg_press=Avg("pressure"),
-                total_count=Count("id"),
-            )
 
-            type_counts = {}
-            for item in data:
-                t = item.equipment_type
-                type_counts[t] = type_counts.get(t, 0) + 1
+def row_fields(request):
+    """Parse the ``fields`` query parameter into ``(fields, None)`` or ``(None, error response)``.
+
+    ``id`` always comes first.
+    """
+    fields = ROW_FIELDS
+    if request.query_params.get("fields"):
+        fields = [f.strip() for f in request.query_params["fields"].split(",") if f.strip()]
+        unknown = sorted(set(fields) - set(ROW_FIELDS))
+        if unknown:
+            return None, Response({"error": f"Unknown fields: {unknown}. Allowed: {ROW_FIELDS}"}, status=400)
+    return ["id", *[f for f in fields if f != "id"]], None
+
+
+class EquipmentRowsView(APIView):
+    """Equipment rows of a batch, one keyset page at a time.
+
+    ``after`` is the ``id`` of the last row already seen (the ``next`` value
+    of the previous page), ``page_size`` is capped at ROWS_MAX_PAGE_SIZE and
+    ``fields`` is a comma-separated subset of the row fields.
+
+    With ``Accept: application/x-msgpack`` the page is returned column by
+    column (see ``api.renderers``) and may hold up to
+    ROWS_MAX_COLUMNAR_PAGE_SIZE rows.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = row_renderers()
+
+    def get(self, request, batch_id):
+        try:
+            batch = UploadBatch.objects.get(id=batch_id, uploaded_by=request.user, is_complete=True)
+        except UploadBatch.DoesNotExist:
+            return Response({"error": "Batch not found"}, status=404)
+
+        try:
+            after = int(request.query_params.get("after", 0))
+            page_size = int(request.query_params.get("page_size", ROWS_PAGE_SIZE))
+        except ValueError:
+            return Response({"error": "after and page_size must be integers"}, status=400)
+        columnar = request.accepted_renderer.format == "msgpack"
+        page_size = max(1, min(page_size, ROWS_MAX_COLUMNAR_PAGE_SIZE if columnar else ROWS_MAX_PAGE_SIZE))
+
+        fields, error = row_fields(request)
+        if error:
+            return error
+
+        page = batch.equipment.filter(id__gt=after).order_by("id")
+        if columnar:
+            rows = list(page.values_list(*fields)[:page_size + 1])
+            next_cursor = rows[page_size - 1][0] if len(rows) > page_size else None
+            results = columnar_rows(rows[:page_size], fields)
+        else:
+            rows = equipment_rows(page[:page_size + 1], fields)
+            next_cursor = rows[page_size - 1]["id"] if len(rows) > page_size else None
+            results = rows[:page_size]
+        return Response(
+            {
+                "count": load_summary(batch).row_count,
+                "next": next_cursor,
+                "results": results,
+            }
+        )
+
+
+class EquipmentRowsStreamView(APIView):
+    """All rows of a batch as one JSON document, streamed.
+
+    Same row objects as ``EquipmentRowsView`` (including ``fields``), but
+    without paging: the response is written while the rows are read, so
+    memory use does not grow with the batch and the first bytes go out
+    before the last row is fetched.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, batch_id):
+        try:
+            batch = UploadBatch.objects.get(id=batch_id, uploaded_by=request.user, is_complete=True)
+        except UploadBatch.DoesNotExist:
+            return Response({"error": "Batch not found"}, status=404)
+
+        fields, error = row_fields(request)
+        if error:
+            return error
+
+        head = {"count": load_summary(batch).row_count}
+        rows = batch.equipment.order_by("id")
+        return StreamingHttpResponse(stream_rows(rows, fields, head), content_type="application/json")
+
+
+class SeriesView(APIView):
+    """Downsampled per-row series of one metric, for line and area charts.
+
+    ``metric`` is flowrate, pressure or temperature, ``points`` the target
+    number of points and ``method`` ``lttb`` (default) or ``minmax``. ``x``
+    holds 0-based row positions in the batch.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, batch_id):
+        try:
+            batch = UploadBatch.objects.get(id=batch_id, uploaded_by=request.user, is_complete=True)
+        except UploadBatch.DoesNotExist:
+            return Response({"error": "Batch not found"}, status=404)
+
+        metric = request.query_params.get("metric", "flowrate")
+        method = request.query_params.get("method", "lttb")
+        if metric not in NUMERIC_COLUMNS:
+            return Response({"error": f"metric must be one of {NUMERIC_COLUMNS}"}, status=400)
+        if method not in DOWNSAMPLE_METHODS:
+            return Response({"error": f"method must be one of {list(DOWNSAMPLE_METHODS)}"}, status=400)
+        try:
+            points = int(request.query_params.get("points", DEFAULT_SERIES_POINTS))
+        except ValueError:
+            return Response({"error": "points must be an integer"}, status=400)
+        points = max(3, min(points, MAX_SERIES_POINTS))
+
+        series = batch_series(batch, metric, points, method)
+        return Response({"metric": metric, "method": method, "points": len(series["x"]), **series})
+
+
+class HistogramView(APIView):
+    """Histogram of one metric over the whole batch.
+
+    ``bins`` equal-width bins; ``edges`` has one more entry than ``counts``.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, batch_id):
+        try:
+            batch = UploadBatch.objects.get(id=batch_id, uploaded_by=request.user, is_complete=True)
+        except UploadBatch.DoesNotExist:
+            return Response({"error": "Batch not found"}, status=404)
+
+        metric = request.query_params.get("metric", "flowrate")
+        if metric not in NUMERIC_COLUMNS:
+            return Response({"error": f"metric must be one of {NUMERIC_COLUMNS}"}, status=400)
+        try:
+            bins = int(request.query_params.get("bins", DEFAULT_BINS))
+        except ValueError:
+            return Response({"error": "bins must be an integer"}, status=400)
+        bins = max(1, min(bins, MAX_BINS))
+
+        return Response({"metric": metric, "bins": bins, **batch_histogram(batch, metric, bins)})
+
+
+class DensityView(APIView):
+    """2D density grid of two metrics, for scatter plots of large batches.
+
+    ``counts[j][i]`` is the number of rows in x-bin ``i`` and y-bin ``j``.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, batch_id):
+        try:
+            batch = UploadBatch.objects.get(id=batch_id, uploaded_by=request.user, is_complete=True)
+        except UploadBatch.DoesNotExist:
+            return Response({"error": "Batch not found"}, status=404)
+
+        x_metric = request.query_params.get("x", "flowrate")
+        y_metric = request.query_params.get("y", "pressure")
+        if x_metric not in NUMERIC_COLUMNS or y_metric not in NUMERIC_COLUMNS:
+            return Response({"error": f"x and y must be one of {NUMERIC_COLUMNS}"}, status=400)
+        try:
+            bins = int(request.query_params.get("bins", DEFAULT_GRID_BINS))
+        except ValueError:
+            return Response({"error": "bins must be an integer"}, status=400)
+        bins = max(1, min(bins, MAX_GRID_BINS))
+
+        density = batch_density(batch, x_metric, y_metric, bins)
+        return Response({"x": x_metric, "y": y_metric, "bins": bins, **density})
+
 
+class AggregateView(APIView):
+    """Aggregates of a batch, optionally grouped by equipment type.
+
+    Query parameters ``metrics`` and ``functions`` are comma-separated; see
+    ``api.aggregate`` for the supported functions.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, batch_id):
+        try:
+            batch = UploadBatch.objects.get(id=batch_id, uploaded_by=request.user, is_complete=True)
+        except UploadBatch.DoesNotExist:
+            return Response({"error": "Batch not found"}, status=404)
+
+        try:
+            query = parse_query(request.query_params)
+        except AggregateError as e:
+            return Response({"error": str(e)}, status=400)
+
+        return Response({**query, **batch_aggregate(batch, query)})
+
+
+class CompareView(APIView):
+    """Differences from batch ``batch_id`` to batch ``other_id``, matched by equipment name.
+
+    Deltas are ``other - base``. ``changes`` lists up to ``limit`` matched
+    equipment with the largest change in ``sort`` (default flowrate);
+    ``added_names``/``removed_names`` the first ``limit`` unmatched names.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, batch_id, other_id):
+        batches = UploadBatch.objects.filter(uploaded_by=request.user, is_complete=True)
+        try:
+            base = batches.get(id=batch_id)
+            other = batches.get(id=other_id)
+        except UploadBatch.DoesNotExist:
+            return Response({"error": "Batch not found"}, status=404)
+
+        sort = request.query_params.get("sort", "flowrate")
+        if sort not in NUMERIC_COLUMNS:
+            return Response({"error": f"sort must be one of {NUMERIC_COLUMNS}"}, status=400)
+        try:
+            limit = int(request.query_params.get("limit", COMPARE_DEFAULT_LIMIT))
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=400)
+        limit = max(0, min(limit, COMPARE_MAX_LIMIT))
+
+        result = batch_compare(base, other, limit, sort)
+        return Response({"base": base.id, "other": other.id, **result})
+
+
+class RejectionReportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, batch_id):
+        try:
+            batch = UploadBatch.objects.get(id=batch_id, uploaded_by=request.user, is_complete=True)
+            summary = load_summary(batch)
+            rejections = batch.rejections.order_by("row", "id")
             return Response(
                 {
-                    "id": batch.id,
-                    "filename": batch.filename,
-                    "summary": stats,
-                    "type_distribution": type_counts,
-                    "data": EquipmentDataSerializer(data, many=True).data,
+                    "batch_id": batch.id,
+                    "rows_accepted": summary.row_count,
+                    "rows_rejected": summary.rejected_rows,
+                    "counts": summary.rejection_counts,
+                    "truncated": sum(summary.rejection_counts.values()) > rejections.count(),
+                    "rejections": RowRejectionSerializer(rejections, many=True).data,
                 }
             )
         except UploadBatch.DoesNotExist:
             return Response({"error": "Batch not found"}, status=404)
 
-    def delete(self, request, batch_id):
+
+class CacheStatsView(APIView):
+    """Hit/miss counters and sizes of the artifact cache tiers of this worker process."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats())
+
+
+class JobStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
         try:
-            batch = UploadBatch.objects.get(id=batch_id, uploaded_by=request.user)
-            batch.delete()
-            return Response({"message": "Batch deleted"}, status=204)
-        except UploadBatch.DoesNotExist:
-            return Response({"error": "Batch not found"}, status=404)
+            job = Job.objects.get(id=job_id, created_by=request.user)
+            return Response(JobSerializer(job).data)
+        except Job.DoesNotExist:
+            return Response({"error": "Job not found"}, status=404)
+
+
+def report_response(batch, path):
+    filename = f"report_{batch.filename.replace('.csv', '')}.pdf"
+    response = FileResponse(open(path, "rb"), as_attachment=True, filename=filename, content_type="application/pdf")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
 
 
 class GeneratePDFView(APIView):
+    """Render a report within the request; ``ReportJobView`` does it in the background."""
     permission_classes = [IsAuthenticated]
 
+    @method_decorator(condition(etag_func=report_etag))
     def get(self, request, batch_id):
+        """Same report as POST, with ``chart_config`` (JSON) and ``detail`` as query parameters.
+
+        Unlike POST it can be answered with 304 for a matching ``If-None-Match``.
+        """
         return self.post(request, batch_id)
 
     def post(self, request, batch_id):
         try:
-            batch = UploadBatch.objects.get(id=batch_id, uploaded_by=request.user)
-            chart_config = request.data.get("chart_config", []) if request.data else []
-            if not isinstance(chart_config, list):
-                return Response({"error": "chart_config must be a list"}, status=400)
-
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(
-                buffer,
-                pagesize=letter,
-                leftMargin=40,
-                rightMargin=40,
-                topMargin=80,
-                bottomMargin=50,
-            )
+            batch = UploadBatch.objects.get(id=batch_id, uploaded_by=request.user, is_complete=True)
+        except UploadBatch.DoesNotExist:
+            return Response({"error": "Batch not found"}, status=404)
+        chart_config, detail, error = parse_report_request(request)
+        if error:
+            return error
+        return report_response(batch, stored_report(batch, chart_config, detail))
+
+
+def parse_report_request(request):
+    """``(chart_config, detail, None)``, or ``(None, None, error response)`` if either is invalid."""
+    try:
+        chart_config = report_chart_config(request)
+    except ValueError:
+        return None, None, Response({"error": "chart_config must be valid JSON"}, status=400)
+    if not isinstance(chart_config, list) or not all(isinstance(cfg, dict) for cfg in chart_config):
+        return None, None, Response({"error": "chart_config must be a list of chart objects"}, status=400)
+    if len(chart_config) > REPORT_MAX_CHARTS:
+        return None, None, Response({"error": f"A report can have at most {REPORT_MAX_CHARTS} charts"}, status=400)
+    detail = report_detail(request)
+    if detail not in DETAIL_LEVELS:
+        return None, None, Response({"error": f"detail must be one of {list(DETAIL_LEVELS)}"}, status=400)
+    return chart_config, detail, None
+
+
+class ReportJobView(APIView):
+    """Queue a PDF report of a batch as a background job.
+
+    Answers 200 with a finished job when the report is already stored, and
+    returns the pending job of an identical request instead of queueing a
+    second one. Download the result from ``/api/jobs/<job_id>/report/``.
+    """
+    permission_classes = [IsAuthenticated]
 
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                "TitleStyle",
-                parent=styles["Heading2"],
-                fontSize=16,
-                textColor=colors.HexColor("#0f172a"),
-                spaceAfter=8,
-            )
-            body_style = ParagraphStyle(
-                "BodyStyle",
-                parent=styles["Normal"],
-                fontSize=10,
-                textColor=colors.HexColor("#0f172a"),
+    def post(self, request, batch_id):
+        try:
+            batch = UploadBatch.objects.get(id=batch_id, uploaded_by=request.user, is_complete=True)
+        except UploadBatch.DoesNotExist:
+            return Response({"error": "Batch not found"}, status=404)
+        chart_config, detail, error = parse_report_request(request)
+        if error:
+            return error
+        chart_config = normalize_chart_config(chart_config)
+
+        if report_path(batch.id, chart_config, detail).exists():
+            job = Job.objects.create(
+                kind=Job.KIND_REPORT,
+                created_by=request.user,
+                batch=batch,
+                filename=batch.filename,
+                chart_config=chart_config,
+                detail=detail,
+                status=Job.STATUS_DONE,
+                finished_at=timezone.now(),
             )
+            return Response({"message": "Report ready", "job_id": job.id, "status": job.status}, status=200)
 
-            stats = batch.equipment.aggregate(
-                avg_flow=Avg("flowrate"),
-                avg_press=Avg("pressure"),
-                avg_temp=Avg("temperature"),
-                count=Count("id"),
+        job = find_running_report(request.user, batch, chart_config, detail)
+        if job is None:
+            job = Job.objects.create(
+                kind=Job.KIND_REPORT,
+                created_by=request.user,
+                batch=batch,
+                filename=batch.filename,
+                chart_config=chart_config,
+                detail=detail,
             )
+            enqueue(job)
+        return Response({"message": "Report accepted", "job_id": job.id, "status": job.status}, status=202)
 
-            elements = []
-            elements.append(Paragraph("ChemViz Analytics Report", title_style))
-            elements.append(Paragraph(f"<b>File Name:</b> {batch.filename}", body_style))
-            elements.append(Paragraph(f"<b>Batch ID:</b> {batch.id}", body_style))
-            elements.append(Spacer(1, 10))
-
-            summary_data = [
-                ["Total Equipment Count", "Average Flowrate", "Average Pressure"],
-                [
-                    str(stats["count"]),
-                    f"{stats['avg_flow']:.2f} m³/hr" if stats["avg_flow"] else "-",
-                    f"{stats['avg_press']:.2f} bar" if stats["avg_press"] else "-",
-                ],
-            ]
-            summary_table = Table(summary_data, colWidths=[160, 160, 160])
-            summary_table.setStyle(
-                TableStyle(
-                    [
-                        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#e2e8f0")),
-                        ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#0f172a")),
-                        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                        ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#cbd5f5")),
-                    ]
-                )
-            )
-            elements.append(summary_table)
-            elements.append(Spacer(1, 16))
-
-            data_items = list(batch.equipment.all())
-            type_counts = {}
-            flowrates = []
-            pressures = []
-            temperatures = []
-            for item in data_items:
-                t = item.equipment_type
-                type_counts[t] = type_counts.get(t, 0) + 1
-                flowrates.append(item.flowrate)
-                pressures.append(item.pressure)
-                temperatures.append(item.temperature)
-
-            if chart_config and data_items:
-                elements.append(Paragraph("Charts Overview", title_style))
-
-                def create_chart_image(chart_type, metric, title, color):
-                    categorical_metrics = {"type_distribution"}
-                    continuous_metrics = {"flowrate", "pressure", "temperature"}
-                    scatter_metrics = {
-                        "flowrate_vs_pressure",
-                        "flowrate_vs_temperature",
-                        "pressure_vs_temperature",
-                    }
-
-                    def error_image(message):
-                        fig, ax = plt.subplots(figsize=(3.2, 2.3), dpi=140)
-                        ax.text(0.5, 0.5, message, ha="center", va="center", fontsize=9)
-                        ax.axis("off")
-                        fig.tight_layout()
-                        buf = io.BytesIO()
-                        fig.savefig(buf, format="png", dpi=140)
-                        plt.close(fig)
-                        buf.seek(0)
-                        return Image(buf, width=240, height=160)
-
-                    fig, ax = plt.subplots(figsize=(3.2, 2.3), dpi=140)
-
-                    if metric == "type_distribution":
-                        labels = list(type_counts.keys())
-                        values = list(type_counts.values())
-                    elif metric == "flowrate":
-                        labels = [f"U{i+1}" for i in range(len(flowrates))]
-                        values = flowrates
-                    elif metric == "pressure":
-                        labels = [f"U{i+1}" for i in range(len(pressures))]
-                        values = pressures
-                    elif metric == "temperature":
-                        labels = [f"U{i+1}" for i in range(len(temperatures))]
-                        values = temperatures
-                    elif metric in [
-                        "flowrate_vs_pressure",
-                        "flowrate_vs_temperature",
-                        "pressure_vs_temperature",
-                    ]:
-                        labels = []
-                        values = []
-                    else:
-                        labels = []
-                        values = []
-
-                    if chart_type in ["pie", "doughnut", "radar", "polar"] and metric not in categorical_metrics:
-                        plt.close(fig)
-                        return error_image("Invalid data for categorical chart")
-
-                    if chart_type in ["line", "area"] and metric not in continuous_metrics:
-                        plt.close(fig)
-                        return error_image("Invalid data for Line/Area")
-
-                    if chart_type == "scatter" and metric not in scatter_metrics:
-                        plt.close(fig)
-                        return error_image("Invalid data for Scatter")
-
-                    if chart_type == "radar":
-                        if not labels:
-                            plt.close(fig)
-                            return error_image("No data for Radar")
-                        angles = np.linspace(0, 2 * np.pi, len(values), endpoint=False).tolist()
-                        values = values + [values[0]]
-                        angles = angles + [angles[0]]
-                        ax = fig.add_subplot(111, polar=True)
-                        ax.plot(angles, values, color=color or "#3b82f6", linewidth=2)
-                        ax.fill(angles, values, color=color or "#93c5fd", alpha=0.3)
-                        ax.set_xticks(angles[:-1])
-                        ax.set_xticklabels(labels, fontsize=6)
-                    elif chart_type == "polar":
-                        if not labels:
-                            plt.close(fig)
-                            return error_image("No data for Polar")
-                        ax = fig.add_subplot(111, polar=True)
-                        angles = np.linspace(0, 2 * np.pi, len(values), endpoint=False)
-                        ax.bar(angles, values, color=color or "#3b82f6", alpha=0.8, width=0.6)
-                        ax.set_xticks(angles)
-                        ax.set_xticklabels(labels, fontsize=6)
-                    elif chart_type == "bar":
-                        ax.bar(labels, values, color=color or "#3b82f6", alpha=0.85)
-                        ax.tick_params(axis="x", rotation=30, labelsize=6)
-                    elif chart_type == "line":
-                        ax.plot(values, color=color or "#3b82f6", linewidth=2)
-                    elif chart_type == "area":
-                        ax.plot(values, color=color or "#3b82f6", linewidth=2)
-                        ax.fill_between(range(len(values)), values, color=color or "#93c5fd", alpha=0.4)
-                    elif chart_type == "pie":
-                        pie_colors = [color] if color not in ["multi", None] else None
-                        ax.pie(values, labels=labels, autopct="%1.0f%%", textprops={"fontsize": 6}, colors=pie_colors)
-                    elif chart_type == "doughnut":
-                        pie_colors = [color] if color not in ["multi", None] else None
-                        ax.pie(values, labels=labels, autopct="%1.0f%%", textprops={"fontsize": 6}, colors=pie_colors)
-                        centre_circle = plt.Circle((0, 0), 0.55, fc="white")
-                        ax.add_artist(centre_circle)
-                    elif chart_type == "scatter":
-                        if metric == "flowrate_vs_temperature":
-                            x_vals, y_vals = flowrates, temperatures
-                        elif metric == "pressure_vs_temperature":
-                            x_vals, y_vals = pressures, temperatures
-                        else:
-                            x_vals, y_vals = flowrates, pressures
-                        ax.scatter(x_vals, y_vals, color=color or "#10b981", alpha=0.7, s=12)
-                    else:
-                        ax.bar(labels, values, color=color or "#3b82f6", alpha=0.85)
-
-                    ax.set_title(title, fontsize=8)
-                    fig.tight_layout()
-                    buf = io.BytesIO()
-                    fig.savefig(buf, format="png", dpi=140)
-                    plt.close(fig)
-                    buf.seek(0)
-                    return Image(buf, width=240, height=160)
-
-                chart_images = []
-                for cfg in chart_config:
-                    chart_type = str(cfg.get("type", "bar")).lower()
-                    metric = str(cfg.get("metric", "type_distribution")).lower()
-                    title = str(cfg.get("title", "Chart"))
-                    color = cfg.get("color")
-                    chart_images.append(create_chart_image(chart_type, metric, title, color))
-
-                cols = 2
-                rows = []
-                for i in range(0, len(chart_images), cols):
-                    row = chart_images[i:i + cols]
-                    if len(row) < cols:
-                        row.append(Spacer(1, 1))
-                    rows.append(row)
-
-                chart_table = Table(rows, colWidths=[250, 250])
-                chart_table.setStyle(
-                    TableStyle(
-                        [
-                            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                            ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#e2e8f0")),
-                            ("BACKGROUND", (0, 0), (-1, -1), colors.HexColor("#f8fafc")),
-                        ]
-                    )
-                )
-                elements.append(chart_table)
-                elements.append(Spacer(1, 16))
-            else:
-                elements.append(Paragraph("Summary Only Report", title_style))
-                elements.append(Spacer(1, 8))
-
-            table_data = [["Name", "Type", "Flowrate", "Pressure", "Temperature"]]
-            for item in data_items:
-                table_data.append(
-                    [
-                        str(item.equipment_name),
-                        str(item.equipment_type),
-                        f"{item.flowrate:.2f}",
-                        f"{item.pressure:.2f}",
-                        f"{item.temperature:.2f}",
-                    ]
-                )
-
-            main_table = Table(table_data, repeatRows=1, colWidths=[160, 110, 90, 90, 90])
-            table_style = TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1e3a8a")),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("ALIGN", (2, 1), (-1, -1), "CENTER"),
-                    ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#cbd5e1")),
-                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ]
-            )
-            for row in range(1, len(table_data)):
-                bg = colors.HexColor("#f8fafc") if row % 2 == 0 else colors.white
-                table_style.add("BACKGROUND", (0, row), (-1, row), bg)
-            main_table.setStyle(table_style)
-            elements.append(main_table)
-
-            report_date = timezone.now().strftime("%Y-%m-%d")
-
-            def draw_header(canvas_obj, doc_obj):
-                canvas_obj.saveState()
-                canvas_obj.setFont("Helvetica-Bold", 13)
-                canvas_obj.setFillColor(colors.HexColor("#0f172a"))
-                canvas_obj.drawString(40, letter[1] - 40, "ChemViz Analytics Report")
-                canvas_obj.setFont("Helvetica", 9)
-                canvas_obj.setFillColor(colors.HexColor("#475569"))
-                canvas_obj.drawRightString(letter[0] - 40, letter[1] - 40, report_date)
-                canvas_obj.setStrokeColor(colors.HexColor("#cbd5e1"))
-                canvas_obj.setLineWidth(1)
-                canvas_obj.line(40, letter[1] - 48, letter[0] - 40, letter[1] - 48)
-                canvas_obj.restoreState()
-
-            class NumberedCanvas(canvas.Canvas):
-                def __init__(self, *args, **kwargs):
-                    super().__init__(*args, **kwargs)
-                    self._saved_page_states = []
-
-                def showPage(self):
-                    self._saved_page_states.append(dict(self.__dict__))
-                    self._startPage()
-
-                def save(self):
-                    total_pages = len(self._saved_page_states)
-                    for state in self._saved_page_states:
-                        self.__dict__.update(state)
-                        self.setFont("Helvetica", 9)
-                        self.setFillColor(colors.HexColor("#64748b"))
-                        self.drawRightString(
-                            letter[0] - 40,
-                            30,
-                            f"Page {self._pageNumber} of {total_pages}",
-                        )
-                        super().showPage()
-                    super().save()
-
-            doc.build(
-                elements,
-                onFirstPage=draw_header,
-                onLaterPages=draw_header,
-                canvasmaker=NumberedCanvas,
-            )
 
-            buffer.seek(0)
-            filename = f"report_{batch.filename.replace('.csv', '')}.pdf"
-            response = FileResponse(buffer, as_attachment=True, filename=filename, content_type="application/pdf")
-            response["Content-Disposition"] = f'attachment; filename="{filename}"'
-            return response
+class JobReportView(APIView):
+    permission_classes = [IsAuthenticated]
 
-        except UploadBatch.DoesNotExist:
-            return Response({"error": "Batch not found"}, status=404)
+    def get(self, request, job_id):
+        try:
+            job = Job.objects.select_related("batch").get(id=job_id, created_by=request.user, kind=Job.KIND_REPORT)
+        except Job.DoesNotExist:
+            return Response({"error": "Job not found"}, status=404)
+        if job.status != Job.STATUS_DONE:
+            return Response({"error": job.error or "Report is not ready", "status": job.status}, status=409)
+        path = report_path(job.batch_id, job.chart_config, job.detail) if job.batch_id else None
+        if path is None or not path.exists():
+            # The batch was deleted, or its summary recomputed, since the job finished.
+            return Response({"error": "Report no longer available"}, status=410)
+        return report_response(job.batch, path)
@@ -78,6 +78,10 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 ROOT_URLCONF = 'chemical_project.urls'
@@ -161,3 +165,80 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+
+
+# CSV ingest
+# Rows per multi-row INSERT statement on SQLite (capped by the backend's
+# parameter limit). PostgreSQL uses COPY and ignores this.
+INGEST_INSERT_BATCH_SIZE = 2000
+# Rows parsed, validated and inserted per step of the streaming ingest.
+# Bounds the memory one upload can use regardless of file size.
+INGEST_CHUNK_SIZE = 50000
+# Parse large uploads in this many processes (1 keeps parsing in the job
+# thread). Only files of at least INGEST_PARALLEL_MIN_BYTES are split;
+# below that the process hand-off costs more than it saves.
+INGEST_PARSE_WORKERS = 1
+INGEST_PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+INGEST_PARALLEL_BLOCK_SIZE = 4 * 1024 * 1024
+# Row validation: rows outside these inclusive (low, high) bounds, with an
+# equipment type not listed here (None accepts any), blank or non-numeric
+# cells, or a repeated equipment name are rejected. The rest of the file is
+# still ingested; the first INGEST_MAX_REJECTIONS problems are kept per batch.
+INGEST_VALUE_RANGES = {
+    'flowrate': (0, None),
+    'pressure': (0, None),
+    'temperature': (-273.15, None),
+}
+INGEST_KNOWN_TYPES = [
+    'Compressor', 'Condenser', 'Distillation Column', 'Heat Exchanger', 'HeatExchanger',
+    'Pump', 'Reactor', 'Storage Tank', 'Valve',
+]
+INGEST_MAX_REJECTIONS = 1000
+
+# Background jobs
+# Uploads are spooled to disk and ingested by an in-process worker pool
+# (0 runs each job in the request that queued it). Each user keeps their
+# MAX_BATCHES_PER_USER newest batches; older ones are deleted after an upload.
+# A pending or running report job idle for JOB_STALE_SECONDS is treated as
+# lost with a restarted process and is not reused.
+JOB_WORKERS = 2
+JOB_STALE_SECONDS = 900
+INGEST_SPOOL_DIR = BASE_DIR / 'var' / 'spool'
+MAX_BATCHES_PER_USER = 5
+
+# Resumable chunked uploads: received parts are kept here until finalize.
+# Sessions older than UPLOAD_SESSION_MAX_AGE seconds are deleted when a new
+# upload starts, or by `manage.py cleanup_uploads`.
+UPLOAD_SESSION_DIR = BASE_DIR / 'var' / 'uploads'
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+UPLOAD_MAX_CHUNK_SIZE = 32 * 1024 * 1024
+UPLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024
+UPLOAD_MAX_CHUNKS = 10000
+UPLOAD_SESSION_MAX_AGE = 24 * 60 * 60
+
+# Per-batch columnar copies of the equipment rows, memory-mapped by the
+# summary and report views. Rebuilt from the database when missing.
+COLUMNAR_ROOT = BASE_DIR / 'var' / 'columns'
+
+# Finished PDF reports, one file per batch, chart config and detail level.
+# Charts are vector drawings where possible ('vector') or all PNGs
+# ('matplotlib'); PNGs are drawn by this many worker processes (0 draws
+# them in the server).
+REPORT_DIR = BASE_DIR / 'var' / 'reports'
+REPORT_CHART_BACKEND = 'vector'
+REPORT_CHART_WORKERS = min(4, os.cpu_count() or 1)
+# Rows listed by the 'top' (outliers per type) and 'sample' report levels.
+REPORT_TOP_PER_TYPE = 10
+REPORT_SAMPLE_ROWS = 500
+# Charts per report; each is drawn from bounded aggregates of the batch.
+REPORT_MAX_CHARTS = 12
+
+# Rows per chunk when /api/rows/<id>/all/ streams a whole batch as JSON.
+ROWS_STREAM_CHUNK_ROWS = 2000
+
+# Cache of derived per-batch artifacts (chart series, aggregates, chart
+# images, reports): an in-process LRU of this many bytes, plus an optional
+# SQLite file shared by all workers on the host.
+ANALYTICS_CACHE_MAX_BYTES = 64 * 1024 * 1024
+ANALYTICS_CACHE_SHARED_PATH = os.environ.get('ANALYTICS_CACHE_SHARED_PATH') or None
+ANALYTICS_CACHE_SHARED_MAX_BYTES = 512 * 1024 * 1024
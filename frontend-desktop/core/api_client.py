@@ -1,11 +1,32 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
 import requests
 
+try:
+    import msgpack
+except ImportError:  # columnar rows fall back to JSON
+    msgpack = None
+
+STATE_DIR = os.path.join(os.path.expanduser("~"), ".chemlabwizard")
+UPLOAD_STATE_PATH = os.path.join(STATE_DIR, "uploads.json")
+OUTBOX_DIR = os.path.join(STATE_DIR, "outbox")
+
+
 class APIClient:
-    def __init__(self, base_url="http://127.0.0.1:8000/api", timeout=10):
+    def __init__(self, base_url="http://127.0.0.1:8000/api", timeout=10, upload_state_path=UPLOAD_STATE_PATH):
         self.base_url = base_url
         self.token = None
         self.timeout = timeout
         self.session = requests.Session()
+        self.upload_state_path = upload_state_path
+        # url -> (etag, payload) of conditional GETs
+        self._etag_cache = {}
     
     def set_token(self, token):
         """Set authentication token"""
@@ -15,6 +36,7 @@ class APIClient:
     def clear_token(self):
         """Clear authentication token"""
         self.token = None
+        self._etag_cache.clear()
         if 'Authorization' in self.session.headers:
             del self.session.headers['Authorization']
     
@@ -60,26 +82,332 @@ class APIClient:
     # Data endpoints
     def get_history(self):
         """Get upload history"""
-        response = self.session.get(f"{self.base_url}/history/", timeout=self.timeout)
+        return self._get_cached(f"{self.base_url}/history/")
+
+    def _get_cached(self, url):
+        """GET a JSON payload, revalidating a cached copy with If-None-Match"""
+        cached = self._etag_cache.get(url)
+        headers = {'If-None-Match': cached[0]} if cached else {}
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and cached:
+            return cached[1]
+        response.raise_for_status()
+        payload = response.json()
+        etag = response.headers.get('ETag')
+        if etag:
+            self._etag_cache[url] = (etag, payload)
+        else:
+            self._etag_cache.pop(url, None)
+        return payload
+    
+    def upload_file(self, file_path, compress=False):
+        """Upload CSV file; the server ingests it in the background and returns the job.
+
+        With ``compress`` the file is gzipped first; the server unpacks it.
+        """
+        send_path = self._gzip_copy(file_path) if compress else file_path
+        try:
+            with open(send_path, 'rb') as f:
+                files = {'file': (self._upload_name(file_path, compress), f)}
+                response = self.session.post(
+                    f"{self.base_url}/upload/",
+                    files=files,
+                    timeout=self.timeout,
+                )
+                response.raise_for_status()
+                return response.json()
+        finally:
+            if compress:
+                os.remove(send_path)
+    
+    def upload_file_resumable(self, file_path, chunk_size=None, retries=5, on_progress=None, compress=False):
+        """Upload a file in checksummed chunks and return the accepted ingest job.
+
+        The upload id is remembered on disk per file, so calling this again
+        after an interruption only sends the chunks the server is missing.
+        With ``compress`` a gzipped copy is sent; the copy is kept until the
+        upload completes so a resumed transfer sends identical bytes.
+        """
+        key = f"{os.path.abspath(file_path)}:{os.path.getsize(file_path)}:{os.path.getmtime(file_path)}"
+        send_path = self._gzip_copy(file_path, key) if compress else file_path
+        size = os.path.getsize(send_path)
+        state = self._load_upload_state()
+
+        upload = None
+        if key in state:
+            try:
+                upload = self.get_upload(state[key])
+            except requests.HTTPError:
+                upload = None
+        if upload is None or upload.get('job_id'):
+            payload = {
+                'filename': self._upload_name(file_path, compress),
+                'size': size,
+                'sha256': self._file_sha256(send_path),
+            }
+            if chunk_size:
+                payload['chunk_size'] = chunk_size
+            response = self.session.post(f"{self.base_url}/uploads/", json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            upload = response.json()
+            if upload.get('duplicate'):
+                # The server already holds this exact file; nothing to send.
+                if compress:
+                    os.remove(send_path)
+                return upload
+            state[key] = upload['upload_id']
+            self._save_upload_state(state)
+
+        upload_id = upload['upload_id']
+        chunk_size = upload['chunk_size']
+        received = set(upload['received'])
+        sent = len(received)
+        with open(send_path, 'rb') as f:
+            for index in range(upload['chunk_count']):
+                if index in received:
+                    continue
+                f.seek(index * chunk_size)
+                self._put_chunk(upload_id, index, f.read(chunk_size), retries)
+                sent += 1
+                if on_progress:
+                    on_progress(sent, upload['chunk_count'])
+
+        response = self._with_retries(
+            lambda: self.session.post(f"{self.base_url}/uploads/{upload_id}/complete/", timeout=self.timeout),
+            retries,
+        )
+        state = self._load_upload_state()
+        state.pop(key, None)
+        self._save_upload_state(state)
+        if compress:
+            os.remove(send_path)
+        return response.json()
+    
+    def get_upload(self, upload_id):
+        """Get received chunks and offset of a resumable upload"""
+        response = self.session.get(f"{self.base_url}/uploads/{upload_id}/", timeout=self.timeout)
         response.raise_for_status()
         return response.json()
     
-    def upload_file(self, file_path):
-        """Upload CSV file"""
-        with open(file_path, 'rb') as f:
-            files = {'file': f}
-            response = self.session.post(
-                f"{self.base_url}/upload/",
-                files=files,
+    def _put_chunk(self, upload_id, index, data, retries):
+        checksum = hashlib.sha256(data).hexdigest()
+        return self._with_retries(
+            lambda: self.session.put(
+                f"{self.base_url}/uploads/{upload_id}/chunks/{index}/",
+                data=data,
+                headers={'Content-Type': 'application/octet-stream', 'X-Chunk-SHA256': checksum},
                 timeout=self.timeout,
-            )
-            response.raise_for_status()
-            return response.json()
+            ),
+            retries,
+        )
+    
+    def _with_retries(self, send, retries):
+        delay = 1.0
+        for attempt in range(retries + 1):
+            try:
+                response = send()
+                if response.status_code < 500:
+                    response.raise_for_status()
+                    return response
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == retries:
+                    raise
+            if attempt == retries:
+                response.raise_for_status()
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
+    
+    @staticmethod
+    def _upload_name(file_path, compress):
+        name = os.path.basename(file_path)
+        return f"{name}.gz" if compress else name
+    
+    @staticmethod
+    def _gzip_copy(file_path, key=None):
+        """Write a gzipped copy of ``file_path`` to the outbox and return its path.
+
+        The name is derived from ``key`` and the header has a fixed mtime, so
+        the same source always maps to the same compressed bytes.
+        """
+        name = hashlib.sha1((key or os.path.abspath(file_path)).encode()).hexdigest()
+        dest = os.path.join(OUTBOX_DIR, f"{name}.csv.gz")
+        if os.path.exists(dest):
+            return dest
+        os.makedirs(OUTBOX_DIR, exist_ok=True)
+        tmp = f"{dest}.tmp"
+        with open(file_path, 'rb') as src, open(tmp, 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as out:
+                shutil.copyfileobj(src, out, 1024 * 1024)
+        os.replace(tmp, dest)
+        return dest
+    
+    @staticmethod
+    def _file_sha256(file_path):
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _load_upload_state(self):
+        try:
+            with open(self.upload_state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_upload_state(self, state):
+        try:
+            os.makedirs(os.path.dirname(self.upload_state_path), exist_ok=True)
+            with open(self.upload_state_path, 'w') as f:
+                json.dump(state, f)
+        except OSError:
+            pass
+    
+    def get_job(self, job_id):
+        """Get status and progress of a background job"""
+        response = self.session.get(f"{self.base_url}/jobs/{job_id}/", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    def wait_for_job(self, job_id, poll_interval=1.0, timeout=None, on_progress=None):
+        """Poll a job until it is done or failed and return its final status"""
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            job = self.get_job(job_id)
+            if job['status'] in ('done', 'failed'):
+                return job
+            if on_progress:
+                on_progress(job)
+            if deadline and time.monotonic() > deadline:
+                raise TimeoutError(f"Job {job_id} did not finish in {timeout}s")
+            time.sleep(poll_interval)
     
     def get_summary(self, batch_id):
-        """Get dataset summary and data"""
+        """Get dataset summary statistics"""
+        return self._get_cached(f"{self.base_url}/summary/{batch_id}/")
+    
+    def get_rows(self, batch_id, after=None, page_size=None, fields=None, columnar=False):
+        """Get one page of equipment rows; pass the returned 'next' as after.
+
+        With columnar=True 'results' is a dict of NumPy arrays, one per field,
+        transferred as msgpack when available.
+        """
+        params = {}
+        if after is not None:
+            params['after'] = after
+        if page_size:
+            params['page_size'] = page_size
+        if fields:
+            params['fields'] = ','.join(fields)
+        headers = {'Accept': 'application/x-msgpack'} if columnar and msgpack else {}
         response = self.session.get(
-            f"{self.base_url}/summary/{batch_id}/",
+            f"{self.base_url}/rows/{batch_id}/",
+            params=params,
+            headers=headers,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        if response.headers.get('Content-Type', '').startswith('application/x-msgpack'):
+            page = msgpack.unpackb(response.content, raw=False)
+            page['results'] = {
+                field: self._decode_column(column) for field, column in page['results'].items()
+            }
+            return page
+        page = response.json()
+        if columnar:
+            rows = page['results']
+            names = list(rows[0]) if rows else []
+            page['results'] = {field: np.array([row[field] for row in rows]) for field in names}
+        return page
+    
+    def get_columns(self, batch_id, fields=None, page_size=50000):
+        """Get whole columns of a batch as NumPy arrays, fetched page by page"""
+        pages = []
+        after = None
+        while True:
+            page = self.get_rows(batch_id, after=after, page_size=page_size, fields=fields, columnar=True)
+            pages.append(page['results'])
+            after = page['next']
+            if after is None:
+                break
+        return {field: np.concatenate([p[field] for p in pages]) for field in pages[0]}
+    
+    @staticmethod
+    def _decode_column(column):
+        if isinstance(column, list):
+            return np.array(column, dtype=object)
+        if 'labels' in column:
+            labels = np.array(column['labels'], dtype=object)
+            return labels[APIClient._decode_column(column['codes'])]
+        return np.frombuffer(column['data'], dtype=column['dtype'])
+    
+    def get_series(self, batch_id, metric, points=500, method='lttb'):
+        """Get a downsampled series of one metric over the whole batch"""
+        response = self.session.get(
+            f"{self.base_url}/series/{batch_id}/",
+            params={'metric': metric, 'points': points, 'method': method},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def get_histogram(self, batch_id, metric, bins=30):
+        """Get a histogram of one metric over the whole batch"""
+        response = self.session.get(
+            f"{self.base_url}/histogram/{batch_id}/",
+            params={'metric': metric, 'bins': bins},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def get_density(self, batch_id, x, y, bins=40):
+        """Get a 2D density grid of two metrics over the whole batch"""
+        response = self.session.get(
+            f"{self.base_url}/density/{batch_id}/",
+            params={'x': x, 'y': y, 'bins': bins},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def get_aggregate(self, batch_id, metrics=None, functions=None, group_by=None):
+        """Get aggregates of a batch, e.g. functions=['mean', 'p90'], group_by='equipment_type'"""
+        params = {}
+        if metrics:
+            params['metrics'] = ','.join(metrics)
+        if functions:
+            params['functions'] = ','.join(functions)
+        if group_by:
+            params['group_by'] = group_by
+        response = self.session.get(
+            f"{self.base_url}/aggregate/{batch_id}/",
+            params=params,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def get_compare(self, batch_id, other_id, limit=None, sort=None):
+        """Compare batch ``other_id`` against ``batch_id`` by equipment name"""
+        params = {}
+        if limit is not None:
+            params['limit'] = limit
+        if sort:
+            params['sort'] = sort
+        response = self.session.get(
+            f"{self.base_url}/compare/{batch_id}/{other_id}/",
+            params=params,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def get_rejections(self, batch_id):
+        """Get the rows rejected by validation when the batch was uploaded"""
+        response = self.session.get(
+            f"{self.base_url}/rejections/{batch_id}/",
             timeout=self.timeout,
         )
         response.raise_for_status()
@@ -88,3 +416,37 @@ class APIClient:
     def get_report_url(self, batch_id):
         """Get PDF report URL"""
         return f"{self.base_url}/report/{batch_id}/"
+    
+    def submit_report(self, batch_id, chart_config, detail='full'):
+        """Queue a PDF report; the returned job is already 'done' if the server has it stored.
+
+        detail is 'summary', 'top' (outliers per type), 'sample' or 'full'.
+        """
+        response = self.session.post(
+            f"{self.base_url}/reports/{batch_id}/",
+            json={'chart_config': chart_config, 'detail': detail},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def download_job_report(self, job_id, save_path, timeout=300):
+        """Download the PDF of a finished report job to save_path"""
+        response = self.session.get(f"{self.base_url}/jobs/{job_id}/report/", stream=True, timeout=timeout)
+        response.raise_for_status()
+        partial = save_path + ".part"
+        with open(partial, "wb") as f:
+            for chunk in response.iter_content(chunk_size=65536):
+                f.write(chunk)
+        os.replace(partial, save_path)
+        return save_path
+    
+    def download_report(self, batch_id, chart_config, save_path, detail='full', timeout=300):
+        """Generate the PDF report as a job, wait for it and download it to save_path"""
+        job = self.submit_report(batch_id, chart_config, detail)
+        job_id = job['job_id']
+        if job['status'] != 'done':
+            job = self.wait_for_job(job_id, timeout=timeout)
+            if job['status'] == 'failed':
+                raise RuntimeError(f"Report failed: {job['error']}")
+        return self.download_job_report(job_id, save_path, timeout=timeout)
@@ -14,6 +14,11 @@ from matplotlib.figure import Figure
 import matplotlib.pyplot as plt
 import numpy as np
 
+# Points requested for Line/Area charts; about one per horizontal pixel
+SERIES_POINTS = 500
+HISTOGRAM_BINS = 30
+DENSITY_BINS = 40
+
 
 class ChartWidget(QFrame):
     closed = pyqtSignal(object)
@@ -29,6 +34,8 @@ class ChartWidget(QFrame):
 
         self._rows = []
         self._distribution = {}
+        self._provider = None
+        self._provider_cache = {}
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(12, 12, 12, 12)
@@ -44,7 +51,7 @@ class ChartWidget(QFrame):
         toolbar.addWidget(title)
 
         self.chart_type = QComboBox()
-        self.chart_type.addItems(["Bar", "Line", "Scatter", "Pie", "Doughnut", "Area"])
+        self.chart_type.addItems(["Bar", "Line", "Scatter", "Pie", "Doughnut", "Area", "Histogram", "Density"])
         self.chart_type.currentIndexChanged.connect(self.update_metric_options)
 
         self.metric = QComboBox()
@@ -93,8 +100,17 @@ class ChartWidget(QFrame):
     def minimumSizeHint(self):
         return QSize(480, 280)
 
-    def set_data(self, rows, distribution=None):
+    def set_data(self, rows, distribution=None, provider=None):
+        """Set the rows to plot.
+
+        provider(artifact, **params) fetches aggregates of the whole batch
+        from the server: "series" (downsampled, used by Line and Area instead
+        of the loaded rows), "histogram" and "density". Histogram and Density
+        charts need it.
+        """
         self._rows = rows or []
+        self._provider = provider
+        self._provider_cache = {}
         if distribution is None or distribution == {}:
             dist = {}
             for row in self._rows:
@@ -140,14 +156,14 @@ class ChartWidget(QFrame):
         chart_type = self.chart_type.currentText().lower()
         if chart_type in ["pie", "doughnut"]:
             items = self._categorical_metrics
-        elif chart_type in ["line", "area"]:
+        elif chart_type in ["line", "area", "histogram"]:
             items = self._continuous_metrics
-        elif chart_type == "scatter":
+        elif chart_type in ["scatter", "density"]:
             items = []
         else:
             items = self._categorical_metrics + self._continuous_metrics
 
-        if chart_type == "scatter":
+        if chart_type in ["scatter", "density"]:
             self.metric.setVisible(False)
             self.x_metric.setVisible(True)
             self.y_metric.setVisible(True)
@@ -177,6 +193,18 @@ class ChartWidget(QFrame):
                 continue
         return labels, values
 
+    def _fetch(self, artifact, **params):
+        """Return the provider's artifact, cached per widget; None without a provider or on error"""
+        if not self._provider:
+            return None
+        key = (artifact, tuple(sorted(params.items())))
+        if key not in self._provider_cache:
+            try:
+                self._provider_cache[key] = self._provider(artifact, **params)
+            except Exception:
+                self._provider_cache[key] = None
+        return self._provider_cache[key]
+
     def refresh(self):
         self.figure.clear()
         ax = self.figure.add_subplot(111)
@@ -224,6 +252,37 @@ class ChartWidget(QFrame):
             ax.scatter(x_vals, y_vals, color=primary, alpha=0.8)
             ax.set_xlabel(x_key, color=text_color)
             ax.set_ylabel(y_key, color=text_color)
+        elif chart_type == "Density":
+            x_key = self.x_metric.currentData()
+            y_key = self.y_metric.currentData()
+            density = self._fetch("density", x=x_key, y=y_key, bins=DENSITY_BINS)
+            if density:
+                counts = np.ma.masked_equal(density["counts"], 0)
+                mesh = ax.pcolormesh(density["x_edges"], density["y_edges"], counts, cmap="viridis")
+                self.figure.colorbar(mesh, ax=ax)
+            else:
+                ax.text(0.5, 0.5, "Density unavailable", ha="center", va="center", color=text_color, transform=ax.transAxes)
+            ax.set_xlabel(x_key, color=text_color)
+            ax.set_ylabel(y_key, color=text_color)
+            ax.tick_params(axis="x", colors=text_color)
+        elif chart_type == "Histogram":
+            hist = self._fetch("histogram", metric=metric_key, bins=HISTOGRAM_BINS)
+            if hist:
+                ax.stairs(hist["counts"], hist["edges"], fill=True, color=primary, alpha=0.85)
+            else:
+                ax.hist(self._series(metric_key)[1], bins=HISTOGRAM_BINS, color=primary, alpha=0.85)
+            ax.set_xlabel(metric_key, color=text_color)
+            ax.set_ylabel("Count", color=text_color)
+            ax.tick_params(axis="x", colors=text_color)
+        elif chart_type in {"Line", "Area"} and self._fetch("series", metric=metric_key, points=SERIES_POINTS):
+            series = self._fetch("series", metric=metric_key, points=SERIES_POINTS)
+            x_vals, y_vals = series["x"], series["y"]
+            ax.plot(x_vals, y_vals, color=primary, linewidth=1.2)
+            if chart_type == "Area":
+                ax.fill_between(x_vals, y_vals, color=accent, alpha=0.4)
+            ax.set_xlabel("Row", color=text_color)
+            ax.tick_params(axis="x", colors=text_color)
+            ax.set_ylabel(metric_key, color=text_color)
         else:
             labels, values = self._series(metric_key)
             labels = labels[:20]
@@ -258,7 +317,7 @@ class ChartWidget(QFrame):
         ax.spines["left"].set_color(text_color)
         ax.spines["bottom"].set_color(text_color)
         ax.title.set_color(text_color)
-        title_metric = self.metric.currentText() if chart_type != "Scatter" else f"{self.x_metric.currentText()} vs {self.y_metric.currentText()}"
+        title_metric = self.metric.currentText() if chart_type not in {"Scatter", "Density"} else f"{self.x_metric.currentText()} vs {self.y_metric.currentText()}"
         ax.set_title(f"{title_metric} ({chart_type})", color=text_color, fontsize=10)
         self.figure.tight_layout()
         self.canvas.draw_idle()
@@ -272,7 +331,7 @@ class ChartWidget(QFrame):
             "Dark Mode": "#1f2937",
         }
 
-        if chart_type == "scatter":
+        if chart_type in ["scatter", "density"]:
             metric_key = f"{self.x_metric.currentData()}_vs_{self.y_metric.currentData()}"
             title = f"{self.x_metric.currentText()} vs {self.y_metric.currentText()}"
         else:
@@ -305,7 +364,7 @@ class ChartWidget(QFrame):
     def set_state(self, state):
         chart_type = state.get("chart_type", "Bar")
         self.chart_type.setCurrentText(chart_type)
-        if chart_type.lower() == "scatter":
+        if chart_type.lower() in ["scatter", "density"]:
             x_metric = state.get("x_metric", "flowrate")
             y_metric = state.get("y_metric", "pressure")
             self.x_metric.setCurrentIndex(self.x_metric.findData(x_metric))
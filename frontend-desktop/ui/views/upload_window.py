@@ -1,8 +1,11 @@
 import json
+import time
 from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import (
     QAction,
+    QApplication,
+    QComboBox,
     QFileDialog,
     QFrame,
     QHBoxLayout,
@@ -19,10 +22,15 @@ from PyQt5.QtWidgets import (
     QWidget,
     QHeaderView,
 )
-from PyQt5.QtCore import QSettings
+from PyQt5.QtCore import QSettings, QTimer
 from ui.components.history_widget import HistoryWidget
 from ui.views.charts_widget import ChartWidget
 
+ROWS_PAGE_SIZE = 500
+TABLE_FIELDS = ["equipment_name", "equipment_type", "flowrate", "pressure", "temperature"]
+# Seconds to wait for a report job before giving up on it
+REPORT_TIMEOUT = 300
+
 
 class UploadWindow(QMainWindow):
     def __init__(self, api_client, user_data, parent=None):
@@ -33,7 +41,17 @@ class UploadWindow(QMainWindow):
         self.current_batch_id = None
         self.current_rows = []
         self.current_distribution = {}
+        self.current_total = 0
+        self.rows_cursor = None
         self.chart_widgets = []
+        self.pending_job_id = None
+        self.job_timer = QTimer(self)
+        self.job_timer.timeout.connect(self.poll_job)
+        self.report_job_id = None
+        self.report_path = None
+        self.report_deadline = None
+        self.report_timer = QTimer(self)
+        self.report_timer.timeout.connect(self.poll_report)
 
         self.setWindowTitle(
             f"ChemLabWizard - BI Dashboard - {user_data['user']['username']}"
@@ -132,10 +150,17 @@ class UploadWindow(QMainWindow):
         )
         self.add_chart_btn.clicked.connect(self.add_chart)
 
+        self.report_detail = QComboBox()
+        self.report_detail.addItem("Full report (all rows)", "full")
+        self.report_detail.addItem("Stratified sample of rows", "sample")
+        self.report_detail.addItem("Outliers per type", "top")
+        self.report_detail.addItem("Summary only", "summary")
+
         self.download_btn = QPushButton("⬇ Download Report")
         self.download_btn.clicked.connect(self.save_report)
 
         action_layout.addWidget(self.add_chart_btn)
+        action_layout.addWidget(self.report_detail)
         action_layout.addWidget(self.download_btn)
         action_layout.addStretch()
         content_layout.addWidget(action_bar)
@@ -177,6 +202,11 @@ class UploadWindow(QMainWindow):
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         table_layout.addWidget(self.table)
 
+        self.load_more_btn = QPushButton("Load more rows")
+        self.load_more_btn.clicked.connect(self.load_more_rows)
+        self.load_more_btn.setVisible(False)
+        table_layout.addWidget(self.load_more_btn)
+
         splitter.addWidget(table_frame)
         splitter.setStretchFactor(0, 3)
         splitter.setStretchFactor(1, 2)
@@ -246,7 +276,7 @@ class UploadWindow(QMainWindow):
         self.chart_widgets.append(chart)
 
         if self.current_rows:
-            chart.set_data(self.current_rows, self.current_distribution)
+            chart.set_data(self.current_rows, self.current_distribution, self.batch_provider())
 
         self.relayout_charts()
 
@@ -306,12 +336,18 @@ class UploadWindow(QMainWindow):
         self.chart_container.adjustSize()
 
     def upload_file(self):
-        fname, _ = QFileDialog.getOpenFileName(self, "Open CSV", ".", "CSV Files (*.csv)")
+        fname, _ = QFileDialog.getOpenFileName(
+            self, "Open CSV", ".", "CSV Files (*.csv *.csv.gz *.csv.zst *.zip)"
+        )
         if fname:
             try:
-                self.api_client.upload_file(fname)
-                self.history_widget.refresh()
-                QMessageBox.information(self, "Success", "Dataset uploaded successfully!")
+                self.statusBar().showMessage("Uploading...")
+                job = self.api_client.upload_file_resumable(
+                    fname,
+                    on_progress=self.show_upload_progress,
+                    compress=fname.lower().endswith(".csv"),
+                )
+                self.watch_job(job["job_id"])
             except Exception as e:
                 error_msg = str(e)
                 if hasattr(e, "response") and e.response is not None:
@@ -320,7 +356,73 @@ class UploadWindow(QMainWindow):
                         error_msg = error_data.get("error", error_msg)
                     except Exception:
                         pass
-                QMessageBox.warning(self, "Error", f"Upload failed: {error_msg}")
+                self.statusBar().clearMessage()
+                QMessageBox.warning(
+                    self, "Error", f"Upload failed: {error_msg}\nUploading the same file again resumes the transfer."
+                )
+
+    def show_upload_progress(self, sent, total):
+        self.statusBar().showMessage(f"Uploading... chunk {sent} of {total}")
+        QApplication.processEvents()
+
+    def watch_job(self, job_id):
+        self.pending_job_id = job_id
+        self.btn_upload.setEnabled(False)
+        self.statusBar().showMessage("Upload accepted, processing...")
+        self.job_timer.start(1000)
+
+    def finish_job(self):
+        self.job_timer.stop()
+        self.pending_job_id = None
+        self.btn_upload.setEnabled(True)
+        self.statusBar().clearMessage()
+
+    def show_rejections(self, job):
+        message = (
+            f"Dataset uploaded with {job['rows_processed']} rows. "
+            f"{job['rows_rejected']} rows were rejected."
+        )
+        try:
+            report = self.api_client.get_rejections(job["batch_id"])
+        except Exception:
+            report = None
+        if report:
+            lines = [
+                f"Row {item['row']}: {item['reason']} in '{item['column']}'"
+                for item in report["rejections"][:10]
+            ]
+            if len(report["rejections"]) > 10 or report["truncated"]:
+                lines.append("...")
+            message += "\n\n" + "\n".join(lines)
+        QMessageBox.warning(self, "Upload Completed With Rejections", message)
+
+    def poll_job(self):
+        if self.pending_job_id is None:
+            self.job_timer.stop()
+            return
+        try:
+            job = self.api_client.get_job(self.pending_job_id)
+        except Exception as e:
+            self.finish_job()
+            QMessageBox.warning(self, "Error", f"Lost track of upload: {str(e)}")
+            return
+
+        if job["status"] == "done":
+            self.finish_job()
+            self.history_widget.refresh()
+            if job.get("rows_rejected"):
+                self.show_rejections(job)
+            else:
+                QMessageBox.information(
+                    self, "Success", f"Dataset uploaded successfully! ({job['rows_processed']} rows)"
+                )
+        elif job["status"] == "failed":
+            self.finish_job()
+            QMessageBox.warning(self, "Error", f"Upload failed: {job['error']}")
+        else:
+            self.statusBar().showMessage(
+                f"Processing upload... {job['progress']:.0f}% ({job['rows_processed']} rows)"
+            )
 
     def load_batch(self, batch_id):
         self.current_batch_id = batch_id
@@ -332,44 +434,71 @@ class UploadWindow(QMainWindow):
             self.update_card_value(self.card_flow, f"{summary['avg_flow']:.2f}")
             self.update_card_value(self.card_press, f"{summary['avg_press']:.2f}")
 
-            self.current_rows = data.get("data", [])
+            self.current_total = summary["total_count"]
             self.current_distribution = data.get("type_distribution", {})
-
-            for chart in self.chart_widgets:
-                chart.set_data(self.current_rows, self.current_distribution)
-
-            rows = self.current_rows
-            self.table.setRowCount(len(rows))
+            self.current_rows = []
+            self.rows_cursor = None
+            self.table.setRowCount(0)
             self.table.setColumnCount(5)
             self.table.setHorizontalHeaderLabels(
                 ["Equipment Name", "Type", "Flowrate", "Pressure", "Temperature"]
             )
-            for i, row in enumerate(rows):
-                self.table.setItem(i, 0, QTableWidgetItem(str(row["equipment_name"])))
-                self.table.setItem(i, 1, QTableWidgetItem(str(row["equipment_type"])))
-                self.table.setItem(i, 2, QTableWidgetItem(str(row["flowrate"])))
-                self.table.setItem(i, 3, QTableWidgetItem(str(row["pressure"])))
-                self.table.setItem(i, 4, QTableWidgetItem(str(row["temperature"])))
+            self.load_more_rows()
+
+            for chart in self.chart_widgets:
+                chart.set_data(self.current_rows, self.current_distribution, self.batch_provider())
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to load data: {str(e)}")
 
+    def batch_provider(self):
+        """Fetch whole-batch chart data (series, histogram, density) of the current batch"""
+        batch_id = self.current_batch_id
+        if not batch_id:
+            return None
+        fetchers = {
+            "series": self.api_client.get_series,
+            "histogram": self.api_client.get_histogram,
+            "density": self.api_client.get_density,
+        }
+        return lambda artifact, **params: fetchers[artifact](batch_id, **params)
+
+    def load_more_rows(self):
+        """Append the next page of rows of the current batch to the table"""
+        if not self.current_batch_id:
+            return
+        try:
+            # Columnar pages come as msgpack arrays instead of per-row JSON.
+            page = self.api_client.get_rows(
+                self.current_batch_id, after=self.rows_cursor, page_size=ROWS_PAGE_SIZE, columnar=True
+            )
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Failed to load rows: {str(e)}")
+            return
+
+        columns = {field: values.tolist() for field, values in page["results"].items()}
+        rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+        start = self.table.rowCount()
+        self.table.setRowCount(start + len(rows))
+        for col, field in enumerate(TABLE_FIELDS):
+            for i, value in enumerate(columns.get(field, []), start):
+                self.table.setItem(i, col, QTableWidgetItem(str(value)))
+        self.current_rows.extend(rows)
+
+        self.rows_cursor = page["next"]
+        self.load_more_btn.setVisible(self.rows_cursor is not None)
+        self.load_more_btn.setText(
+            f"Load more rows ({len(self.current_rows)} of {self.current_total} shown)"
+        )
+
     def save_report(self):
         if not self.current_batch_id:
             QMessageBox.warning(self, "No dataset", "Please select a dataset first.")
             return
+        if self.report_job_id is not None:
+            QMessageBox.information(self, "Report", "A report is already being generated.")
+            return
         try:
-            report_url = self.api_client.get_report_url(self.current_batch_id)
             chart_config = [chart.get_config() for chart in self.chart_widgets]
-            response = self.api_client.session.post(
-                report_url,
-                json={"chart_config": chart_config},
-                stream=True,
-                timeout=30,
-            )
-            if response.status_code != 200:
-                QMessageBox.warning(self, "Error", "Failed to download report.")
-                return
-
             default_name = f"report_{self.current_batch_id}.pdf"
             save_path, _ = QFileDialog.getSaveFileName(
                 self, "Save Report", default_name, "PDF Files (*.pdf)"
@@ -377,20 +506,59 @@ class UploadWindow(QMainWindow):
             if not save_path:
                 return
 
-            with open(save_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+            job = self.api_client.submit_report(
+                self.current_batch_id, chart_config, self.report_detail.currentData()
+            )
+            self.report_job_id = job["job_id"]
+            self.report_path = save_path
+            self.report_deadline = time.monotonic() + REPORT_TIMEOUT
+            self.download_btn.setEnabled(False)
+            if job["status"] == "done":
+                self.poll_report()
+            else:
+                self.statusBar().showMessage("Generating report...")
+                self.report_timer.start(1000)
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Failed to save report: {str(e)}")
 
+    def poll_report(self):
+        """Download the report once its job is done"""
+        job_id, save_path = self.report_job_id, self.report_path
+        try:
+            job = self.api_client.get_job(job_id)
+            if job["status"] in ("pending", "running"):
+                if time.monotonic() > self.report_deadline:
+                    self.finish_report()
+                    QMessageBox.warning(
+                        self, "Error", f"The report did not finish within {REPORT_TIMEOUT} seconds."
+                    )
+                return
+            self.finish_report()
+            if job["status"] == "failed":
+                QMessageBox.warning(self, "Error", f"Failed to generate report: {job['error']}")
+                return
+            self.api_client.download_job_report(job_id, save_path)
             QMessageBox.information(self, "Saved", "Report downloaded successfully.")
         except Exception as e:
+            self.finish_report()
             QMessageBox.warning(self, "Error", f"Failed to save report: {str(e)}")
 
+    def finish_report(self):
+        self.report_timer.stop()
+        self.report_job_id = None
+        self.report_path = None
+        self.report_deadline = None
+        self.download_btn.setEnabled(True)
+        self.statusBar().clearMessage()
+
     def on_batch_deleted(self, batch_id):
         if batch_id is None or getattr(self, "current_batch_id", None) == batch_id:
             self.current_batch_id = None
             self.current_rows = []
             self.current_distribution = {}
+            self.current_total = 0
+            self.rows_cursor = None
+            self.load_more_btn.setVisible(False)
             self.update_card_value(self.card_total, "-")
             self.update_card_value(self.card_flow, "-")
             self.update_card_value(self.card_press, "-")
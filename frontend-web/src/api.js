@@ -86,6 +86,7 @@ export const auth = {
 
 // Data functions
 export const data = {
+    // Uploads are ingested in the background; resolves once the job is done
     uploadFile: async (file) => {
         const formData = new FormData();
         formData.append('file', file);
@@ -95,8 +96,22 @@ export const data = {
                 'Authorization': `Token ${localStorage.getItem('token')}`
             }
         });
+        return data.waitForJob(response.data.job_id);
+    },
+
+    getJob: async (jobId) => {
+        const response = await api.get(`/jobs/${jobId}/`);
         return response.data;
     },
+
+    waitForJob: async (jobId, pollInterval = 1000) => {
+        for (;;) {
+            const job = await data.getJob(jobId);
+            if (job.status === 'done') return job;
+            if (job.status === 'failed') throw new Error(job.error || 'Upload failed');
+            await new Promise((resolve) => setTimeout(resolve, pollInterval));
+        }
+    },
     
     getHistory: async () => {
         const response = await api.get('/history/');
@@ -108,19 +123,58 @@ export const data = {
         return response.data;
     },
     
-    downloadReport: async (batchId, filename, chartConfig = []) => {
+    // One keyset page of rows; pass the returned `next` as `after` for the following page
+    getRows: async (batchId, { after, pageSize, fields } = {}) => {
+        const params = {};
+        if (after != null) params.after = after;
+        if (pageSize) params.page_size = pageSize;
+        if (fields) params.fields = fields.join(',');
+        const response = await api.get(`/rows/${batchId}/`, { params });
+        return response.data;
+    },
+    
+    getSeries: async (batchId, metric, { points = 500, method = 'lttb' } = {}) => {
+        const response = await api.get(`/series/${batchId}/`, { params: { metric, points, method } });
+        return response.data;
+    },
+
+    getAggregate: async (batchId, { metrics, functions, groupBy } = {}) => {
+        const params = {};
+        if (metrics) params.metrics = metrics.join(',');
+        if (functions) params.functions = functions.join(',');
+        if (groupBy) params.group_by = groupBy;
+        const response = await api.get(`/aggregate/${batchId}/`, { params });
+        return response.data;
+    },
+
+    getCompare: async (batchId, otherId, { limit, sort } = {}) => {
+        const params = {};
+        if (limit !== undefined) params.limit = limit;
+        if (sort) params.sort = sort;
+        const response = await api.get(`/compare/${batchId}/${otherId}/`, { params });
+        return response.data;
+    },
+
+    getRejections: async (batchId) => {
+        const response = await api.get(`/rejections/${batchId}/`);
+        return response.data;
+    },
+    
+    // Reports are rendered as background jobs; resolves once the PDF is saved
+    downloadReport: async (batchId, filename, chartConfig = [], detail = 'full') => {
         try {
+            const submitted = await api.post(`/reports/${batchId}/`, { chart_config: chartConfig, detail });
+            const jobId = submitted.data.job_id;
+            if (submitted.data.status !== 'done') {
+                await data.waitForJob(jobId);
+            }
             const token = localStorage.getItem('token');
-            const response = await axios.post(
-                `${API_URL}/report/${batchId}/`,
-                { chart_config: chartConfig },
-                {
-                    headers: {
-                        'Authorization': `Token ${token}`
-                    },
-                    responseType: 'blob',
-                }
-            );
+            const response = await axios.get(`${API_URL}/jobs/${jobId}/report/`, {
+                headers: {
+                    'Authorization': `Token ${token}`
+                },
+                responseType: 'blob',
+            });
             
             // Create a blob URL and trigger download
             const blob = new Blob([response.data], { type: 'application/pdf' });
@@ -136,7 +190,11 @@ export const data = {
             return true;
         } catch (error) {
             console.error('Error downloading PDF:', error);
-            if (error.response?.status === 404) {
+            if (!error.response) {
+                throw new Error(error.message || 'Failed to generate report');
+            } else if (error.response.status === 400) {
+                throw new Error(error.response.data?.error || 'Invalid report request');
+            } else if (error.response.status === 404) {
                 throw new Error('Report not found');
             } else if (error.response?.status === 401) {
                 throw new Error('Authentication required');
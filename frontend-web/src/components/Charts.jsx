@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Bar, Line, Pie, Doughnut, Radar, PolarArea, Scatter } from 'react-chartjs-2';
 import { X, Plus, TrendingUp, BarChart3, PieChart, Activity, Target, Edit3 } from 'lucide-react';
+import { data as dataAPI } from '../api';
 
 // Professional color palettes
 const COLOR_THEMES = {
@@ -99,12 +100,29 @@ const DEFAULT_WIDGETS = [
 ];
 
 const STORAGE_KEY = 'clw_widget_config';
+const SERIES_METRICS = ['flowrate', 'pressure', 'temperature'];
 
-function Charts({ data, onConfigChange }) {
+function Charts({ data, rows = [], onConfigChange }) {
     const [widgets, setWidgets] = useState(DEFAULT_WIDGETS);
     const [nextId, setNextId] = useState(5);
     const [showAddModal, setShowAddModal] = useState(false);
     const [editingWidget, setEditingWidget] = useState(null);
+    // Downsampled whole-batch series for line charts, keyed by metric
+    const [series, setSeries] = useState({});
+
+    useEffect(() => {
+        setSeries({});
+        if (!data?.id) return;
+        let cancelled = false;
+        SERIES_METRICS.forEach(metric => {
+            dataAPI.getSeries(data.id, metric)
+                .then(result => {
+                    if (!cancelled) setSeries(prev => ({ ...prev, [metric]: result }));
+                })
+                .catch(error => console.warn(`Failed to load ${metric} series:`, error));
+        });
+        return () => { cancelled = true; };
+    }, [data?.id]);
 
     useEffect(() => {
         try {
@@ -207,6 +225,8 @@ function Charts({ data, onConfigChange }) {
                         key={widget.id}
                         widget={widget}
                         data={data}
+                        rows={rows}
+                        series={series}
                         onUpdate={(updates) => updateWidget(widget.id, updates)}
                         onRemove={() => removeWidget(widget.id)}
                         onEdit={() => setEditingWidget(widget)}
@@ -235,12 +255,28 @@ function Charts({ data, onConfigChange }) {
 }
 
 // Helper function to prepare chart data based on metric
-function prepareChartData(data, metric, theme) {
+function prepareChartData(data, rows, metric, theme, type, series = {}) {
     const themeColors = COLOR_THEMES[theme];
 
+    if (type === 'line' && series[metric]) {
+        const { x, y } = series[metric];
+        return {
+            labels: x.map(index => `Row ${index + 1}`),
+            datasets: [{
+                label: metric.charAt(0).toUpperCase() + metric.slice(1),
+                data: y,
+                backgroundColor: themeColors.colors[0] + '80',
+                borderColor: themeColors.border,
+                borderWidth: 1,
+                pointRadius: 0,
+                fill: true
+            }]
+        };
+    }
+
     if (metric.includes('_vs_')) {
         const [xMetric, yMetric] = metric.split('_vs_');
-        const scatterData = data.data.slice(0, 50).map(item => ({
+        const scatterData = rows.slice(0, 50).map(item => ({
             x: parseFloat(item[xMetric]) || 0,
             y: parseFloat(item[yMetric]) || 0
         }));
@@ -274,8 +310,8 @@ function prepareChartData(data, metric, theme) {
         case 'flowrate':
         case 'pressure':
         case 'temperature':
-            const values = data.data.map(item => item[metric]);
-            const labels = data.data.map((_, idx) => `Unit ${idx + 1}`);
+            const values = rows.map(item => item[metric]);
+            const labels = rows.map((_, idx) => `Unit ${idx + 1}`);
             return {
                 labels: labels.slice(0, 20), // Limit to 20 for readability
                 datasets: [{
@@ -294,10 +330,10 @@ function prepareChartData(data, metric, theme) {
 }
 
 // Widget Card Component
-function WidgetCard({ widget, data, onUpdate, onRemove, onEdit }) {
+function WidgetCard({ widget, data, rows, series, onUpdate, onRemove, onEdit }) {
     try {
         const theme = COLOR_THEMES[widget.theme];
-        const chartData = prepareChartData(data, widget.metric, widget.theme);
+        const chartData = prepareChartData(data, rows, widget.metric, widget.theme, widget.type, series);
 
         if (!chartData || !chartData.datasets) {
             return (
@@ -3,13 +3,18 @@ import api, { data as dataAPI, auth } from '../api';
 import Charts from '../components/Charts';
 import History from '../components/History';
 
+const ROWS_PAGE_SIZE = 100;
+
 function Upload({ user, onLogout }) {
     const [history, setHistory] = useState([]);
     const [selectedData, setSelectedData] = useState(null);
+    const [rows, setRows] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
     const [loading, setLoading] = useState(false);
     const [pdfLoading, setPdfLoading] = useState(false);
     const [error, setError] = useState(null);
     const [chartConfig, setChartConfig] = useState([]);
+    const [reportDetail, setReportDetail] = useState('full');
 
     useEffect(() => {
         fetchHistory();
@@ -35,11 +40,20 @@ function Upload({ user, onLogout }) {
         
         setLoading(true);
         try {
-            await dataAPI.uploadFile(file);
-            alert("Dataset uploaded successfully!");
+            const job = await dataAPI.uploadFile(file);
+            if (job.rows_rejected) {
+                const report = await dataAPI.getRejections(job.batch_id);
+                const lines = report.rejections
+                    .slice(0, 10)
+                    .map((item) => `Row ${item.row}: ${item.reason} in '${item.column}'`);
+                if (report.rejections.length > 10 || report.truncated) lines.push('...');
+                alert(`Dataset uploaded with ${job.rows_processed} rows. ${job.rows_rejected} rows were rejected.\n\n${lines.join('\n')}`);
+            } else {
+                alert("Dataset uploaded successfully!");
+            }
             fetchHistory();
         } catch (error) {
-            alert(error.response?.data?.error || "Upload Failed. Please check CSV format.");
+            alert(error.response?.data?.error || error.message || "Upload Failed. Please check CSV format.");
         }
         setLoading(false);
     };
@@ -47,8 +61,13 @@ function Upload({ user, onLogout }) {
     const handleLoadBatch = async (id) => {
         setLoading(true);
         try {
-            const res = await dataAPI.getSummary(id);
+            const [res, page] = await Promise.all([
+                dataAPI.getSummary(id),
+                dataAPI.getRows(id, { pageSize: ROWS_PAGE_SIZE }),
+            ]);
             setSelectedData(res);
+            setRows(page.results);
+            setNextCursor(page.next);
             setError(null);
         } catch (error) {
             console.error('Error loading batch:', error);
@@ -58,6 +77,18 @@ function Upload({ user, onLogout }) {
         setLoading(false);
     };
 
+    const handleLoadMoreRows = async () => {
+        if (!selectedData || nextCursor == null) return;
+        try {
+            const page = await dataAPI.getRows(selectedData.id, { after: nextCursor, pageSize: ROWS_PAGE_SIZE });
+            setRows((current) => [...current, ...page.results]);
+            setNextCursor(page.next);
+        } catch (error) {
+            console.error('Error loading rows:', error);
+            alert('Failed to load more rows');
+        }
+    };
+
     const handleLogout = async () => {
         await auth.logout();
         onLogout();
@@ -69,7 +100,11 @@ function Upload({ user, onLogout }) {
         try {
             await api.delete(`/summary/${id}/`);
             // If deleted item was selected, clear selection
-            if (selectedData?.id === id) setSelectedData(null);
+            if (selectedData?.id === id) {
+                setSelectedData(null);
+                setRows([]);
+                setNextCursor(null);
+            }
             await fetchHistory();
             alert('Dataset deleted successfully');
         } catch (error) {
@@ -83,7 +118,7 @@ function Upload({ user, onLogout }) {
         if (!selectedData || pdfLoading) return;
         setPdfLoading(true);
         try {
-            await dataAPI.downloadReport(selectedData.id, selectedData.filename, chartConfig);
+            await dataAPI.downloadReport(selectedData.id, selectedData.filename, chartConfig, reportDetail);
         } catch (error) {
             console.error('Download error:', error);
             alert(error.message || 'Failed to download PDF report');
@@ -135,7 +170,7 @@ function Upload({ user, onLogout }) {
                                 <p className="mb-1 text-sm text-gray-500 font-semibold">Click to upload CSV</p>
                                 <p className="text-xs text-gray-400">Chemical Params only</p>
                             </div>
-                            <input type="file" onChange={handleUpload} accept=".csv" className="hidden" />
+                            <input type="file" onChange={handleUpload} accept=".csv,.gz,.zst,.zip" className="hidden" />
                         </label>
                     </div>
 
@@ -169,16 +204,28 @@ function Upload({ user, onLogout }) {
                                     <h1 className="text-3xl font-bold text-slate-800">{selectedData.filename}</h1>
                                     <p className="text-slate-500 mt-1">Chemical Equipment Parameter Analysis</p>
                                 </div>
-                                <button 
-                                    onClick={handleDownloadReport}
-                                    disabled={pdfLoading}
-                                    className="inline-flex items-center px-4 py-2 bg-red-600 hover:bg-red-700 disabled:bg-red-400 text-white text-sm font-medium rounded-md shadow-sm transition-colors"
-                                >
-                                    <svg className={`w-4 h-4 mr-2 ${pdfLoading ? 'animate-spin' : ''}`} fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                                        <path strokeLinecap="round" strokeLinejoin="round" strokeWidth="2" d="M12 10v6m0 0l-3-3m3 3l3-3m2 8H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z"></path>
-                                    </svg>
-                                    {pdfLoading ? 'Generating...' : 'Download PDF Report'}
-                                </button>
+                                <div className="flex items-center gap-2">
+                                    <select
+                                        value={reportDetail}
+                                        onChange={(e) => setReportDetail(e.target.value)}
+                                        className="px-3 py-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-blue-500 focus:border-transparent text-sm"
+                                    >
+                                        <option value="full">Full report (all rows)</option>
+                                        <option value="sample">Stratified sample of rows</option>
+                                        <option value="top">Outliers per type</option>
+                                        <option value="summary">Summary only</option>
+                                    </select>
+                                    <button 
+                                        onClick={handleDownloadReport}
+                                        disabled={pdfLoading}
+                                        className="inline-flex items-center px-4 py-2 bg-red-600 hover:bg-red-700 disabled:bg-red-400 text-white text-sm font-medium rounded-md shadow-sm transition-colors"
+                                    >
+                                        <svg className={`w-4 h-4 mr-2 ${pdfLoading ? 'animate-spin' : ''}`} fill="none" stroke="currentColor" viewBox="0 0 24 24">
+                                            <path strokeLinecap="round" strokeLinejoin="round" strokeWidth="2" d="M12 10v6m0 0l-3-3m3 3l3-3m2 8H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z"></path>
+                                        </svg>
+                                        {pdfLoading ? 'Generating...' : 'Download PDF Report'}
+                                    </button>
+                                </div>
                             </header>
 
                             {/* KPI Grid */}
@@ -189,13 +236,13 @@ function Upload({ user, onLogout }) {
                             </div>
 
                             {/* Visualization */}
-                            <Charts data={selectedData} onConfigChange={setChartConfig} />
+                            <Charts data={selectedData} rows={rows} onConfigChange={setChartConfig} />
 
                             {/* Data Table */}
                             <div className="bg-white rounded-xl shadow-sm border border-gray-200 overflow-hidden">
                                 <div className="px-6 py-4 border-b border-gray-100 bg-gray-50 flex justify-between items-center">
                                     <h3 className="font-bold text-gray-700">Raw Parameter Logs</h3>
-                                    <span className="text-xs text-gray-400 italic">Showing all records</span>
+                                    <span className="text-xs text-gray-400 italic">Showing {rows.length} of {selectedData.summary.total_count} records</span>
                                 </div>
                                 <div className="overflow-x-auto">
                                     <table className="w-full text-sm text-left text-gray-600">
@@ -209,8 +256,8 @@ function Upload({ user, onLogout }) {
                                             </tr>
                                         </thead>
                                         <tbody className="divide-y divide-gray-100">
-                                            {selectedData.data.map((row, idx) => (
-                                                <tr key={idx} className="hover:bg-blue-50/50 transition-colors">
+                                            {rows.map((row) => (
+                                                <tr key={row.id} className="hover:bg-blue-50/50 transition-colors">
                                                     <td className="px-6 py-3 font-medium text-gray-900">{row.equipment_name}</td>
                                                     <td className="px-6 py-3">
                                                         <span className="inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium bg-blue-100 text-blue-800">
@@ -225,6 +272,16 @@ function Upload({ user, onLogout }) {
                                         </tbody>
                                     </table>
                                 </div>
+                                {nextCursor != null && (
+                                    <div className="px-6 py-3 border-t border-gray-100 bg-gray-50 text-center">
+                                        <button
+                                            onClick={handleLoadMoreRows}
+                                            className="text-sm font-medium text-blue-600 hover:text-blue-800"
+                                        >
+                                            Load more rows
+                                        </button>
+                                    </div>
+                                )}
                             </div>
                         </div>
                     ) : !loading && (